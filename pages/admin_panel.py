@@ -13,6 +13,16 @@ import io
 from utils.session_state import SessionStateManager
 from utils.csv_validator import CSVValidator
 from utils.csv_templates import CSVTemplateGenerator
+from utils.file_io import atomic_write_json
+from utils.activity_log import get_activity_log, log_activity
+from utils.write_behind import get_write_queue
+from utils.json_extraction import get_parse_stats
+from utils.population_stats import get_population_stats
+from utils.llm_cache import get_llm_cache
+from utils.single_flight import get_single_flight
+from utils.speculative_prefetch import get_prefetcher
+from utils.provider_health import health_snapshot
+from utils.rate_limiter import scheduler_snapshot
 
 def show_admin_panel():
     """Display the admin panel"""
@@ -56,7 +66,8 @@ def show_admin_dashboard():
         st.metric("Total Users", "2", "Active")
         
     with col2:
-        st.metric("Assessments", "0", "Completed")
+        population = get_population_stats().snapshot()
+        st.metric("Assessments", population['total_assessments'], f"{population['unique_users']} users", delta_color="off")
         
     with col3:
         st.metric("Job Roles", count_job_roles(), "Available")
@@ -66,7 +77,163 @@ def show_admin_dashboard():
     
     # Recent activity
     st.subheader("Recent Activity")
-    st.info("No recent activity to display")
+    show_recent_activity()
+    
+    show_ai_cache_metrics()
+    show_provider_health()
+
+def show_recent_activity(limit: int = 20):
+    """Display the newest audit events, optionally filtered by action"""
+    actions = ["All", "login", "login_failed", "logout", "assessment_submitted",
+               "report_generated", "comparison_export", "history_export", "cohort_export", "csv_upload", "retention"]
+    action = st.selectbox("Activity type", actions, key="activity_filter")
+    
+    writes = get_write_queue().stats()
+    st.caption(
+        f"Write queue ({writes['mode']}): {writes['pending']} pending · "
+        f"{writes['written']} written · {writes['failed']} failed"
+    )
+    
+    events = get_activity_log().tail(limit, action=None if action == "All" else action)
+    if not events:
+        st.info("No recent activity to display")
+        return
+    
+    rows = []
+    for event in events:
+        details = {key: value for key, value in event.items() if key not in ('timestamp', 'action', 'user')}
+        rows.append({
+            "Time": event.get('timestamp', '')[:19].replace('T', ' '),
+            "User": event.get('user') or '-',
+            "Action": event.get('action', ''),
+            "Details": ", ".join(f"{key}: {value}" for key, value in details.items())
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def show_ai_cache_metrics():
+    """Display hit-rate metrics for the shared AI response cache"""
+    st.subheader("AI Response Cache")
+    
+    cache = get_llm_cache()
+    if cache is None:
+        st.info("AI response caching is disabled (LLM_CACHE_ENABLED)")
+        return
+    
+    stats = cache.stats()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Hit Rate", f"{stats['hit_rate'] * 100:.1f}%")
+    
+    with col2:
+        st.metric("Hits / Misses", f"{stats['hits']} / {stats['misses']}")
+    
+    with col3:
+        st.metric("Cached Responses", stats['entries'], f"max {stats['max_entries']}", delta_color="off")
+    
+    with col4:
+        st.metric("Cache Size", f"{stats['size_bytes'] / 1024:.0f} KB", f"{stats['evictions']} evicted", delta_color="off")
+    
+    in_process = get_single_flight().stats()
+    st.caption(
+        f"Coalesced duplicate requests: {in_process['coalesced']} in this process, "
+        f"{stats['coalesced']} across processes ({in_process['in_flight']} in flight)"
+    )
+    
+    speculation = get_prefetcher().stats()
+    st.caption(
+        f"Speculative prefetches: {speculation['started']} started, {speculation['adopted']} used, "
+        f"{speculation['discarded']} discarded ({speculation['pending']} pending)"
+    )
+    
+    if st.button("🗑️ Clear AI Cache", type="secondary"):
+        cache.clear()
+        st.success("AI response cache cleared")
+        st.rerun()
+
+def show_provider_health():
+    """Display latency, errors and circuit breaker state per AI provider"""
+    st.subheader("AI Provider Health")
+    
+    snapshots = health_snapshot()
+    if not snapshots:
+        st.info("No AI provider calls in this server process yet")
+        return
+    
+    state_labels = {"closed": "🟢 Closed", "half_open": "🟡 Half-open", "open": "🔴 Open"}
+    
+    def format_ms(seconds):
+        return f"{seconds * 1000:.0f}" if seconds is not None else "-"
+    
+    rows = []
+    for snapshot in snapshots:
+        rows.append({
+            "Provider": snapshot["provider"],
+            "Circuit": state_labels.get(snapshot["state"], snapshot["state"]),
+            "Requests": snapshot["requests"],
+            "Errors": snapshot["errors"],
+            "Skipped": snapshot["rejected"],
+            "Error Rate": f"{snapshot['error_rate'] * 100:.0f}%",
+            "p50 (ms)": format_ms(snapshot["p50_seconds"]),
+            "p95 (ms)": format_ms(snapshot["p95_seconds"]),
+            "p99 (ms)": format_ms(snapshot["p99_seconds"]),
+            "Prompt Tokens": snapshot["prompt_tokens"],
+            "Completion Tokens": snapshot["completion_tokens"],
+            "Last Error": snapshot["last_error"] or ""
+        })
+    
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    
+    show_provider_queues(format_ms)
+    show_parse_stats()
+
+def show_provider_queues(format_ms):
+    """Display rate limiter queue depth and wait times per AI provider"""
+    snapshots = scheduler_snapshot()
+    if not snapshots:
+        return
+    
+    st.markdown("**Rate Limiter Queues**")
+    
+    def format_limit(value):
+        return f"{value:,}" if value > 0 else "unlimited"
+    
+    rows = []
+    for snapshot in snapshots:
+        depth = snapshot["depth_by_priority"]
+        rows.append({
+            "Provider": snapshot["provider"],
+            "Requests/min": format_limit(snapshot["requests_per_minute"]),
+            "Tokens/min": format_limit(snapshot["tokens_per_minute"]),
+            "Queued (interactive / batch)": f"{depth.get('interactive', 0)} / {depth.get('batch', 0)}",
+            "Peak Queue": snapshot["max_depth"],
+            "Sent": snapshot["granted"],
+            "Timed Out": snapshot["timed_out"],
+            "429s": snapshot["throttled"],
+            "p50 Wait (ms)": format_ms(snapshot["p50_wait_seconds"]),
+            "p95 Wait (ms)": format_ms(snapshot["p95_wait_seconds"]),
+            "Max Wait (ms)": format_ms(snapshot["max_wait_seconds"])
+        })
+    
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def show_parse_stats():
+    """Display how often AI answers needed repair or could not be parsed"""
+    rows = get_parse_stats().snapshot()
+    if not rows:
+        return
+    
+    st.markdown("**Response Parsing**")
+    st.dataframe(pd.DataFrame([{
+        "Provider": row["provider"],
+        "Model": row["model"],
+        "Responses": row["total"],
+        "Clean JSON": row["clean"],
+        "Repaired": row["repaired"],
+        "Unusable": row["failed"],
+        "Failure Rate": f"{row['failure_rate'] * 100:.1f}%"
+    } for row in rows]), use_container_width=True, hide_index=True)
 
 def show_csv_upload():
     """Display CSV upload interface"""
@@ -237,10 +404,7 @@ def process_csv_upload(file_type: str, df: pd.DataFrame) -> bool:
         
         # Save to file
         filepath = storage_map[file_type]
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        atomic_write_json(filepath, data, indent=2)
         
         # Log the upload
         log_upload(file_type, len(df))
@@ -347,29 +511,8 @@ def convert_skills_ka_to_json(df: pd.DataFrame) -> Dict:
 
 def log_upload(file_type: str, row_count: int):
     """Log CSV upload activity"""
-    log_entry = {
-        "timestamp": datetime.now().isoformat(),
-        "user": SessionStateManager.get('username'),
-        "action": "csv_upload",
-        "file_type": file_type,
-        "row_count": row_count
-    }
-    
-    # Create logs directory if it doesn't exist
-    os.makedirs("data/logs", exist_ok=True)
-    
-    # Append to log file
-    log_file = "data/logs/admin_activity.json"
-    logs = []
-    
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            logs = json.load(f)
-    
-    logs.append(log_entry)
-    
-    with open(log_file, 'w') as f:
-        json.dump(logs, f, indent=2)
+    get_write_queue().submit(
+        log_activity, "csv_upload", SessionStateManager.get('username'), file_type=file_type, row_count=row_count)
 
 def count_job_roles() -> int:
     """Count total job roles in the system"""
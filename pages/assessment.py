@@ -1,6 +1,9 @@
 import streamlit as st
 from utils.data_manager import DataManager
 from utils.llm_manager import LLMManager
+from utils.background_jobs import assessment_key, get_job_store, precompute_assessment
+from utils.session_state import SessionStateManager
+from utils.speculative_prefetch import get_prefetcher, speculation_enabled
 import json
 from datetime import datetime
 
@@ -61,6 +64,10 @@ def show_assessment():
     if 'responses' not in st.session_state:
         st.session_state.responses = {}
     
+    # Sliders the user has actually moved (untouched ones sit at the default)
+    if 'answered_questions' not in st.session_state:
+        st.session_state.answered_questions = set()
+    
     # Progress tracking
     total_questions = sum(len(q) for q in questions.values())
     answered = len(st.session_state.responses)
@@ -87,7 +94,9 @@ def show_assessment():
                     value=st.session_state.responses.get(question_key, 3),
                     key=question_key,
                     label_visibility="collapsed",
-                    help="1 = Strongly Disagree, 5 = Strongly Agree"
+                    help="1 = Strongly Disagree, 5 = Strongly Agree",
+                    on_change=mark_answered,
+                    args=(question_key,)
                 )
                 st.session_state.responses[question_key] = response
         
@@ -126,6 +135,19 @@ def show_assessment():
             key="goals"
         )
     
+    # Start recommendations early once the top Holland letters can no longer
+    # change; later edits restart them after a short pause
+    if speculation_enabled():
+        get_prefetcher().observe(
+            st.session_state.username,
+            st.session_state.responses,
+            st.session_state.answered_questions,
+            questions,
+            {"education": education, "experience": experience, "interests": interests, "goals": goals},
+            calculate_riasec_scores(st.session_state.responses, questions),
+            SessionStateManager.get('skills_assessment_responses', {})
+        )
+    
     # Submit button
     if st.button("Submit Assessment", type="primary", use_container_width=True):
         if len(st.session_state.responses) < total_questions:
@@ -141,6 +163,7 @@ def show_assessment():
                     "timestamp": datetime.now().isoformat(),
                     "responses": st.session_state.responses,
                     "scores": scores,
+                    "persona": SessionStateManager.get('persona'),
                     "additional_info": {
                         "education": education,
                         "experience": experience,
@@ -149,8 +172,32 @@ def show_assessment():
                     }
                 }
                 
-                # Save assessment data
-                data_manager.save_assessment(assessment_data)
+                # Save assessment data (queued; confirmed below)
+                try:
+                    saved = data_manager.save_assessment(assessment_data)
+                except Exception as e:
+                    st.error(f"Your assessment could not be saved: {str(e)}")
+                    return
+                
+                # Start AI results and comparison data in the background,
+                # reusing the speculative recommendations if the code held
+                skills_responses = SessionStateManager.get('skills_assessment_responses', {})
+                get_prefetcher().claim(assessment_data, skills_responses)
+                precompute_assessment(assessment_data, skills=skills_responses)
+                get_job_store().submit(
+                    assessment_key(assessment_data),
+                    'comparison',
+                    build_comparison_job,
+                    skills_responses
+                )
+                
+                # Only report success once the save has been written
+                try:
+                    if saved is not None:
+                        saved.result()
+                except Exception as e:
+                    st.error(f"Your assessment could not be saved: {str(e)}")
+                    return
                 
                 # Store in session state for results page
                 st.session_state.assessment_complete = True
@@ -159,6 +206,15 @@ def show_assessment():
                 
                 st.success("Assessment completed! Go to Results to see your career profile.")
 
+def mark_answered(question_key):
+    """Record that the user moved a slider"""
+    st.session_state.answered_questions.add(question_key)
+
+def build_comparison_job(skills_responses):
+    """Load the comparison view's skills data off the page thread"""
+    from pages.comparison_view import build_comparison_data
+    return build_comparison_data(skills_responses)
+
 def calculate_riasec_scores(responses, questions):
     """Calculate RIASEC scores from responses"""
     scores = {}
@@ -9,6 +9,9 @@ import pandas as pd
 from utils.session_state import SessionStateManager
 from utils.data_manager import DataManager
 from utils.career_manager import CareerManager
+from utils.background_jobs import assessment_key, get_job_store
+from utils.quantile_sketches import get_cohort_sketches, ordinal
+from utils.activity_log import log_activity
 import json
 import os
 from typing import Dict, List, Tuple
@@ -38,15 +41,20 @@ def show_comparison_view():
     data_manager = DataManager()
     career_manager = CareerManager()
     
-    # Load job skills data
-    job_skills_data = load_job_skills_data()
-    
-    if not job_skills_data:
+    # Use the data precomputed when the assessment was saved, unless the
+    # skills assessment has changed since
+    comparison_data = None
+    assessment_data = SessionStateManager.get('assessment_data')
+    if assessment_data:
+        key = assessment_key(assessment_data)
+        if get_job_store().ready(key, 'comparison'):
+            comparison_data = get_job_store().get(key, 'comparison').result()
+    if comparison_data is None or comparison_data['skills_responses'] != skills_responses:
+        comparison_data = build_comparison_data(skills_responses)
+    
+    if comparison_data['default_mapping']:
         st.info("No job skills data uploaded yet. Using default skill mappings.")
-        job_skills_data = get_default_job_skills_mapping()
-    
-    # Calculate skills confidence by RIASEC type
-    skills_by_riasec = map_skills_to_riasec(skills_responses, job_skills_data)
+    skills_by_riasec = comparison_data['skills_by_riasec']
     
     # Create comparison visualization
     col1, col2 = st.columns([3, 1])
@@ -75,6 +83,23 @@ def show_comparison_view():
     styled_df = comparison_df.style.background_gradient(subset=['RIASEC Score', 'Skills Confidence'], cmap='RdYlGn')
     st.dataframe(styled_df, use_container_width=True)
     
+    # Percentiles against everyone who took the assessment
+    assessment_info = assessment_data or {}
+    cohort, percentiles = get_cohort_sketches().percentiles(
+        riasec_scores,
+        persona=assessment_info.get('persona')
+    )
+    if percentiles:
+        st.markdown("### 👥 How You Compare")
+        cohort_label = "everyone" if cohort == 'all' else f"the {cohort.split(':', 1)[1]} group"
+        st.caption(f"Compared with {cohort_label} who took the assessment")
+        columns = st.columns(len(percentiles))
+        for column, (riasec_type, percentile) in zip(columns, percentiles.items()):
+            column.metric(riasec_type, f"{ordinal(percentile)} percentile")
+        top_type = max(riasec_scores, key=riasec_scores.get)
+        if top_type in percentiles:
+            st.info(f"You are in the {ordinal(percentiles[top_type])} percentile for {top_type}")
+    
     # Gap analysis
     st.markdown("### 🎯 Gap Analysis")
     gaps = analyze_gaps(riasec_scores, skills_by_riasec)
@@ -134,6 +159,7 @@ def show_comparison_view():
     with col1:
         if st.button("📄 Export Comparison Report", use_container_width=True):
             report_data = generate_comparison_report(riasec_scores, skills_by_riasec, gaps, aligned_careers)
+            log_activity('comparison_export', SessionStateManager.get('username'))
             st.download_button(
                 label="Download Report",
                 data=report_data,
@@ -149,6 +175,19 @@ def show_comparison_view():
         if st.button("📊 View Full Results", use_container_width=True):
             SessionStateManager.navigate_to('results')
 
+def build_comparison_data(skills_responses: Dict) -> Dict:
+    """Load job skills data and map the user's skills confidence to RIASEC types"""
+    job_skills_data = load_job_skills_data()
+    default_mapping = not job_skills_data
+    if default_mapping:
+        job_skills_data = get_default_job_skills_mapping()
+    
+    return {
+        'skills_responses': dict(skills_responses),
+        'default_mapping': default_mapping,
+        'skills_by_riasec': map_skills_to_riasec(skills_responses, job_skills_data)
+    }
+
 def load_job_skills_data() -> Dict:
     """Load uploaded job skills data from the correct directory"""
     try:
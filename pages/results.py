@@ -1,8 +1,9 @@
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
-from utils.llm_manager import LLMManager
 from utils.data_manager import DataManager
+from utils.background_jobs import precompute_assessment
+from utils.session_state import SessionStateManager
 import pandas as pd
 
 def show_results():
@@ -14,13 +15,16 @@ def show_results():
         return
     
     # Initialize managers
-    llm_manager = LLMManager()
     data_manager = DataManager()
     
     # Get assessment data
     scores = st.session_state.assessment_scores
     assessment_data = st.session_state.assessment_data
     
+    # Started when the assessment was saved; reruns reuse the same jobs
+    jobs = precompute_assessment(
+        assessment_data, skills=SessionStateManager.get('skills_assessment_responses', {}))
+    
     # Display RIASEC Profile
     st.subheader("Your RIASEC Profile")
     
@@ -70,10 +74,7 @@ def show_results():
     
     with st.spinner("Generating personalized career recommendations..."):
         # Get AI-powered recommendations
-        career_recommendations = llm_manager.generate_career_recommendations(
-            scores=scores,
-            additional_info=assessment_data['additional_info']
-        )
+        career_recommendations = jobs['recommendations'].result()
         
         if career_recommendations:
             # Display recommendations in expandable sections
@@ -99,21 +100,22 @@ def show_results():
                         st.progress(match_score/100)
                         st.caption(f"{match_score}% match")
                         
-                        st.write("**Salary Range:**")
-                        st.write(career.get('salary_range', 'Varies'))
-                        
-                        st.write("**Growth Outlook:**")
-                        st.write(career.get('growth_outlook', 'Average'))
+                        if career.get('sector'):
+                            # Roles from the jobskills corpus carry sector, not salary data
+                            st.write("**Sector:**")
+                            st.write(f"{career['sector']} ({career.get('track', '')})")
+                        else:
+                            st.write("**Salary Range:**")
+                            st.write(career.get('salary_range', 'Varies'))
+                            
+                            st.write("**Growth Outlook:**")
+                            st.write(career.get('growth_outlook', 'Average'))
     
     # Career Development Plan
     st.subheader("📈 Your Career Development Plan")
     
     with st.spinner("Creating your personalized development plan..."):
-        development_plan = llm_manager.generate_development_plan(
-            scores=scores,
-            careers=career_recommendations[:3],
-            additional_info=assessment_data['additional_info']
-        )
+        development_plan = jobs['development_plan'].result()
         
         if development_plan:
             tabs = st.tabs(["Short-term Goals", "Skills to Develop", "Resources", "Action Steps"])
@@ -164,4 +166,5 @@ def show_results():
             # Clear assessment data
             st.session_state.assessment_complete = False
             st.session_state.responses = {}
+            st.session_state.answered_questions = set()
             st.rerun()
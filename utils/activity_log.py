@@ -0,0 +1,247 @@
+"""
+Activity Log for Career Atlas
+
+Append-only JSON Lines audit log for logins, assessments, exports and admin
+uploads. Each event is one line appended with a single write, so logging
+costs the same however long the history is and concurrent writers never
+overwrite each other. When the live file grows past ACTIVITY_LOG_MAX_BYTES
+it is rotated to activity.1.jsonl.gz (older segments shift up and the
+oldest beyond ACTIVITY_LOG_BACKUPS are deleted). Readers tail the live file
+backwards and only open rotated segments when they need older events.
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .file_io import atomic_write, file_lock, read_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+TAIL_BLOCK_SIZE = 64 * 1024
+LEGACY_LOG = 'admin_activity.json'
+
+
+class ActivityLog:
+    """Size-rotated, append-only JSONL event log"""
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_bytes: Optional[int] = None,
+                 backups: Optional[int] = None,
+                 compress: Optional[bool] = None):
+        self.path = path or os.getenv('ACTIVITY_LOG_PATH', os.path.join('data', 'logs', 'activity.jsonl'))
+        self.max_bytes = max_bytes or int(os.getenv('ACTIVITY_LOG_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.backups = backups if backups is not None else int(os.getenv('ACTIVITY_LOG_BACKUPS', DEFAULT_BACKUPS))
+        if compress is None:
+            compress = os.getenv('ACTIVITY_LOG_COMPRESS', 'true').lower() in ('1', 'true', 'yes')
+        self.compress = compress
+
+    def _segment_path(self, index: int, compressed: bool) -> str:
+        """Path of a rotated segment (1 is the newest)"""
+        base, ext = os.path.splitext(self.path)
+        path = f"{base}.{index}{ext}"
+        return f"{path}.gz" if compressed else path
+
+    def _existing_segment(self, index: int) -> Optional[str]:
+        for compressed in (True, False):
+            path = self._segment_path(index, compressed)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _segments(self) -> List[str]:
+        """Existing rotated segments, newest first"""
+        segments = [self._existing_segment(index) for index in range(1, self.backups + 1)]
+        return [path for path in segments if path is not None]
+
+    def log(self, action: str, user: Optional[str] = None, **details: Any) -> Dict[str, Any]:
+        """
+        Append an event
+
+        Args:
+            action: Event name, e.g. 'login', 'assessment_submitted', 'csv_upload'
+            user: Username the event belongs to
+            **details: Extra JSON-serialisable fields
+
+        Returns:
+            The event written
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        # Stamped under the lock so the file stays in time order, which
+        # lets readers stop at the first event older than `since`
+        with file_lock(self.path):
+            event = {'timestamp': datetime.now().isoformat(), 'action': action, 'user': user, **details}
+            line = (json.dumps(event, default=str) + '\n').encode('utf-8')
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size >= self.max_bytes:
+                self._rotate()
+        return event
+
+    def _rotate(self) -> None:
+        for index in range(self.backups, 0, -1):
+            path = self._existing_segment(index)
+            if path is None:
+                continue
+            if index == self.backups:
+                os.remove(path)
+            else:
+                os.replace(path, self._segment_path(index + 1, path.endswith('.gz')))
+
+        if self.backups == 0:
+            os.remove(self.path)
+            return
+        rotated = self._segment_path(1, False)
+        os.replace(self.path, rotated)
+        if self.compress:
+            with open(rotated, 'rb') as src, gzip.open(self._segment_path(1, True), 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+
+    def rotate(self) -> bool:
+        """Rotate the live file if it is over the size limit; returns True if it was rotated"""
+        with file_lock(self.path):
+            try:
+                if os.path.getsize(self.path) < self.max_bytes:
+                    return False
+            except OSError:
+                return False
+            self._rotate()
+            return True
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _tail_lines(self) -> Iterator[bytes]:
+        """Lines of the live file, last first, reading backwards in blocks"""
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return
+        with f:
+            position = f.seek(0, os.SEEK_END)
+            remainder = b''
+            while position > 0:
+                step = min(TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + remainder).split(b'\n')
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line
+            if remainder.strip():
+                yield remainder
+
+    def _segment_lines(self, path: str) -> Iterator[bytes]:
+        """Lines of a rotated segment, last first"""
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rb') as f:
+                lines = f.read().split(b'\n')
+        except OSError as e:
+            logger.warning("Skipping unreadable activity log segment %s: %s", path, e)
+            return
+        for line in reversed(lines):
+            if line.strip():
+                yield line
+
+    def events(self,
+               action: Optional[str] = None,
+               user: Optional[str] = None,
+               since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over events newest first, optionally filtered
+
+        Args:
+            action: Only events with this action
+            user: Only events for this user
+            since: Stop at events older than this ISO timestamp
+        """
+        sources = [self._tail_lines()] + [self._segment_lines(path) for path in self._segments()]
+        for source in sources:
+            for line in source:
+                event = self._parse(line)
+                if event is None:
+                    continue
+                if since and event.get('timestamp', '') < since:
+                    return
+                if action and event.get('action') != action:
+                    continue
+                if user and event.get('user') != user:
+                    continue
+                yield event
+
+    def tail(self, limit: int = 20, **filters: Any) -> List[Dict[str, Any]]:
+        """Get the newest events (newest first), with the same filters as events()"""
+        results = []
+        for event in self.events(**filters):
+            results.append(event)
+            if len(results) >= limit:
+                break
+        return results
+
+    def import_legacy(self, legacy_path: str) -> int:
+        """
+        Move the events of an old admin_activity.json array in front of the
+        live log, then rename the old file to <name>.imported
+
+        Returns:
+            Number of events imported
+        """
+        with file_lock(self.path), file_lock(legacy_path):
+            entries = read_json(legacy_path)
+            if not isinstance(entries, list):
+                return 0
+            lines = ''.join(json.dumps(entry, default=str) + '\n' for entry in entries if isinstance(entry, dict))
+            try:
+                with open(self.path, 'r') as f:
+                    lines += f.read()
+            except OSError:
+                pass
+            atomic_write(self.path, lines)
+            os.replace(legacy_path, f"{legacy_path}.imported")
+            return len(entries)
+
+
+_activity_log = None
+_activity_log_lock = threading.Lock()
+
+
+def get_activity_log() -> ActivityLog:
+    """Get the shared activity log, importing the old admin_activity.json once"""
+    global _activity_log
+    if _activity_log is None:
+        with _activity_log_lock:
+            if _activity_log is None:
+                activity_log = ActivityLog()
+                legacy_path = os.path.join(os.path.dirname(activity_log.path), LEGACY_LOG)
+                if os.path.exists(legacy_path):
+                    activity_log.import_legacy(legacy_path)
+                _activity_log = activity_log
+    return _activity_log
+
+
+def log_activity(action: str, user: Optional[str] = None, **details: Any) -> None:
+    """Record an audit event, never letting logging break the caller"""
+    try:
+        get_activity_log().log(action, user, **details)
+    except Exception as e:
+        logger.warning("Could not write activity log event %s: %s", action, e)
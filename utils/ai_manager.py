@@ -1,73 +1,114 @@
 import os
 import json
-from typing import Dict, List, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Any, Callable, Iterator, Tuple
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
-import openai
-import anthropic
-import google.generativeai as genai
+from .career_retrieval import (candidate_count, create_rerank_prompt, get_career_retriever, merge_ranked,
+                               retrieval_enabled)
+from .hedging import hedging_enabled
+from .llm_router import create_career_prompt, get_llm_router, normalize_recommendations, parse_text_response
+from .prompt_budget import compact_json, compact_scores, fit_team_profiles
+from .profile_buckets import get_bucket_step, quantize_scores
+from .rate_limiter import INTERACTIVE
 
 load_dotenv()
 
+# Team batches: parallel generations and the score bucket used to share answers
+DEFAULT_TEAM_CONCURRENCY = 8
+DEFAULT_TEAM_BUCKET_STEP = 0.5
+
 class AIManager:
-    def __init__(self):
-        """Initialize AI Manager with API keys"""
-        self.openai_api_key = os.getenv('OPENAI_API_KEY')
-        self.anthropic_api_key = os.getenv('ANTHROPIC_API_KEY')
-        self.google_api_key = os.getenv('GOOGLE_API_KEY')
-        
-        # Initialize clients
-        if self.openai_api_key and self.openai_api_key != 'your_openai_api_key_here':
-            openai.api_key = self.openai_api_key
-            self.openai_available = True
-        else:
-            self.openai_available = False
-        
-        if self.anthropic_api_key and self.anthropic_api_key != 'your_anthropic_api_key_here':
-            self.anthropic_client = anthropic.Anthropic(api_key=self.anthropic_api_key)
-            self.anthropic_available = True
-        else:
-            self.anthropic_available = False
-        
-        if self.google_api_key and self.google_api_key != 'your_google_api_key_here':
-            genai.configure(api_key=self.google_api_key)
-            self.google_available = True
-        else:
-            self.google_available = False
+    def __init__(self,
+                 bucket_step: Optional[float] = None,
+                 hedging: Optional[bool] = None,
+                 priority: int = INTERACTIVE,
+                 retrieval: Optional[bool] = None):
+        """
+        Initialize AI Manager on the shared provider router
+        
+        Args:
+            bucket_step: Quantize RIASEC scores to this step before building
+                prompts so similar profiles share cached answers. Defaults to
+                LLM_PROFILE_BUCKET_STEP; 0 keeps raw scores.
+            hedging: Race the next provider when the current one is slower
+                than its p95 latency. Defaults to LLM_HEDGING.
+            priority: Queue priority for outbound provider calls; batch jobs
+                pass rate_limiter.BATCH so page requests go first.
+            retrieval: Recommend roles retrieved from the jobskills corpus and
+                re-ranked by the model instead of free-form generated careers.
+                Defaults to LLM_RECOMMENDATION_MODE=retrieval.
+        """
+        # Shared provider router (clients, cache, limits and fallback policy)
+        self.router = get_llm_router()
+        self.bucket_step = get_bucket_step() if bucket_step is None else bucket_step
+        self.hedging = hedging_enabled() if hedging is None else hedging
+        self.priority = priority
+        self.retrieval = retrieval_enabled() if retrieval is None else retrieval
     
     def get_available_providers(self) -> List[str]:
         """Get list of available AI providers"""
-        providers = []
-        if self.openai_available:
-            providers.append("OpenAI")
-        if self.anthropic_available:
-            providers.append("Anthropic")
-        if self.google_available:
-            providers.append("Google")
-        return providers
+        return self.router.available_providers()
+    
+    def _bucket_scores(self, riasec_scores: Dict[str, float]) -> Dict[str, float]:
+        """Quantize RIASEC scores when profile bucketing is enabled"""
+        return quantize_scores(riasec_scores, self.bucket_step)
     
     def generate_career_recommendations(self, 
                                       riasec_scores: Dict[str, float], 
                                       additional_info: Dict[str, Any],
-                                      num_recommendations: int = 5) -> List[Dict[str, Any]]:
-        """Generate AI-powered career recommendations based on RIASEC scores"""
+                                      num_recommendations: int = 5,
+                                      skills: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Generate AI-powered career recommendations based on RIASEC scores (skills steer retrieved roles)"""
+        
+        riasec_scores = self._bucket_scores(riasec_scores)
+        
+        if self.retrieval:
+            recommendations = self._generate_grounded_recommendations(riasec_scores, additional_info,
+                                                                      num_recommendations, skills)
+            if recommendations is not None:
+                return recommendations
         
         # Create the prompt
-        prompt = self._create_career_prompt(riasec_scores, additional_info, num_recommendations)
+        prompt = create_career_prompt(riasec_scores, additional_info, num_recommendations)
         
         # Try providers in order of preference
-        try:
-            if self.openai_available:
-                return self._get_openai_recommendations(prompt)
-            elif self.anthropic_available:
-                return self._get_anthropic_recommendations(prompt)
-            elif self.google_available:
-                return self._get_google_recommendations(prompt)
-            else:
-                return self._get_fallback_recommendations(riasec_scores)
-        except Exception as e:
-            st.error(f"Error generating recommendations: {str(e)}")
-            return self._get_fallback_recommendations(riasec_scores)
+        return normalize_recommendations(self._generate(
+            "recommendations",
+            prompt,
+            fallback=lambda: self._get_fallback_recommendations(riasec_scores),
+            parse_fallback=lambda text: (parse_text_response(text, num_recommendations)
+                                         or self._get_fallback_recommendations(riasec_scores)),
+            error_label="generating recommendations"
+        ))
+    
+    def _generate_grounded_recommendations(self,
+                                           riasec_scores: Dict[str, float],
+                                           additional_info: Dict[str, Any],
+                                           num_recommendations: int,
+                                           skills: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Have the model re-rank job roles retrieved from the jobskills corpus
+        
+        Returns None when no corpus is available. Without a usable model
+        answer the top retrieved roles are returned in retrieval order.
+        """
+        retriever = get_career_retriever()
+        if retriever is None:
+            return None
+        
+        candidates = retriever.retrieve(riasec_scores, additional_info,
+                                        limit=max(candidate_count(), num_recommendations), skills=skills)
+        prompt = create_rerank_prompt(riasec_scores, additional_info, candidates, num_recommendations)
+        ranked = self._generate(
+            "rerank_recommendations",
+            prompt,
+            fallback=lambda: [],
+            error_label="ranking career matches"
+        )
+        return merge_ranked(candidates, ranked, num_recommendations)
     
     def generate_coaching_questions(self,
                                   coachee_riasec_scores: Dict[str, float],
@@ -75,20 +116,15 @@ class AIManager:
                                   coachee_info: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Generate RIASEC-tailored coaching questions for career coaches"""
         
+        coachee_riasec_scores = self._bucket_scores(coachee_riasec_scores)
         prompt = self._create_coaching_questions_prompt(coachee_riasec_scores, coaching_context, coachee_info)
         
-        try:
-            if self.openai_available:
-                return self._get_openai_coaching_questions(prompt)
-            elif self.anthropic_available:
-                return self._get_anthropic_coaching_questions(prompt)
-            elif self.google_available:
-                return self._get_google_coaching_questions(prompt)
-            else:
-                return self._get_fallback_coaching_questions(coachee_riasec_scores, coaching_context)
-        except Exception as e:
-            st.error(f"Error generating coaching questions: {str(e)}")
-            return self._get_fallback_coaching_questions(coachee_riasec_scores, coaching_context)
+        return self._generate(
+            "coaching_questions",
+            prompt,
+            fallback=lambda: self._get_fallback_coaching_questions(coachee_riasec_scores, coaching_context),
+            error_label="generating coaching questions"
+        )
     
     def generate_manager_coaching_questions(self,
                                           team_member_riasec: Dict[str, float],
@@ -96,20 +132,84 @@ class AIManager:
                                           management_context: str = "development") -> List[Dict[str, Any]]:
         """Generate RIASEC-tailored coaching questions for managers"""
         
+        team_member_riasec = self._bucket_scores(team_member_riasec)
         prompt = self._create_manager_coaching_prompt(team_member_riasec, team_member_info, management_context)
         
+        return self._generate(
+            "manager_questions",
+            prompt,
+            fallback=lambda: self._get_fallback_manager_questions(team_member_riasec, management_context),
+            error_label="generating manager questions"
+        )
+    
+    def generate_team_manager_questions(self,
+                                        team_members: List[Dict[str, Any]],
+                                        management_context: str = "development",
+                                        max_workers: Optional[int] = None,
+                                        bucket_step: Optional[float] = None
+                                        ) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Generate manager coaching questions for a whole team
+        
+        Members in the same role whose bucketed RIASEC scores match share one
+        generation; the prompt for a shared group only includes the member
+        details (tenure, performance, ...) that every member in it has in
+        common. Each member gets their own copy of the questions labelled
+        with their name and role. Groups run on a bounded worker pool and
+        results are yielded as they complete, so a large team takes roughly
+        as long as a few single calls.
+        
+        Args:
+            team_members: Member dicts with 'riasec_scores' plus the optional
+                fields used by generate_manager_coaching_questions (name,
+                role, tenure, performance, aspirations)
+            management_context: Conversation focus for every member
+            max_workers: Parallel generations (defaults to LLM_TEAM_CONCURRENCY)
+            bucket_step: Score rounding used to group members (defaults to
+                the manager's bucket_step, or 0.5 when bucketing is off)
+        
+        Yields:
+            Tuples of (member, questions) in completion order; each question
+            carries the member's 'team_member' name and 'role'
+        """
+        if max_workers is None:
+            max_workers = int(os.getenv('LLM_TEAM_CONCURRENCY', DEFAULT_TEAM_CONCURRENCY))
+        if bucket_step is None:
+            bucket_step = self.bucket_step or DEFAULT_TEAM_BUCKET_STEP
+        
+        groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for member in team_members:
+            scores = quantize_scores(member.get('riasec_scores', {}), bucket_step)
+            groups.setdefault((tuple(sorted(scores.items())), member.get('role')), []).append(member)
+        if not groups:
+            return
+        
+        def generate(key: Tuple, members: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            shared_info = {
+                field: value for field, value in members[0].items()
+                if field != 'riasec_scores' and all(m.get(field) == value for m in members[1:])
+            }
+            return self.generate_manager_coaching_questions(dict(key[0]), shared_info, management_context)
+        
+        # Worker threads inherit the page's script context so warnings still render
+        ctx = get_script_run_ctx()
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(groups))),
+            thread_name_prefix='team-questions',
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+        )
         try:
-            if self.openai_available:
-                return self._get_openai_manager_questions(prompt)
-            elif self.anthropic_available:
-                return self._get_anthropic_manager_questions(prompt)
-            elif self.google_available:
-                return self._get_google_manager_questions(prompt)
-            else:
-                return self._get_fallback_manager_questions(team_member_riasec, management_context)
-        except Exception as e:
-            st.error(f"Error generating manager questions: {str(e)}")
-            return self._get_fallback_manager_questions(team_member_riasec, management_context)
+            futures = {executor.submit(generate, key, members): members for key, members in groups.items()}
+            for future in as_completed(futures):
+                questions = future.result()
+                for member in futures[future]:
+                    yield member, [
+                        dict(question, team_member=member.get('name', 'Team Member'), role=member.get('role'))
+                        if isinstance(question, dict) else question
+                        for question in questions
+                    ]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
     def generate_team_insights(self,
                              team_riasec_profiles: List[Dict[str, Any]],
@@ -118,18 +218,12 @@ class AIManager:
         
         prompt = self._create_team_insights_prompt(team_riasec_profiles, team_context)
         
-        try:
-            if self.openai_available:
-                return self._get_openai_team_insights(prompt)
-            elif self.anthropic_available:
-                return self._get_anthropic_team_insights(prompt)
-            elif self.google_available:
-                return self._get_google_team_insights(prompt)
-            else:
-                return self._get_fallback_team_insights(team_riasec_profiles)
-        except Exception as e:
-            st.error(f"Error generating team insights: {str(e)}")
-            return self._get_fallback_team_insights(team_riasec_profiles)
+        return self._generate(
+            "team_insights",
+            prompt,
+            fallback=lambda: self._get_fallback_team_insights(team_riasec_profiles),
+            error_label="generating team insights"
+        )
     
     def generate_development_plan(self,
                                 riasec_scores: Dict[str, float],
@@ -137,38 +231,27 @@ class AIManager:
                                 additional_info: Dict[str, Any]) -> Dict[str, Any]:
         """Generate personalized development plan"""
         
+        riasec_scores = self._bucket_scores(riasec_scores)
         prompt = self._create_development_prompt(riasec_scores, selected_careers, additional_info)
         
-        try:
-            if self.openai_available:
-                return self._get_openai_development_plan(prompt)
-            elif self.anthropic_available:
-                return self._get_anthropic_development_plan(prompt)
-            elif self.google_available:
-                return self._get_google_development_plan(prompt)
-            else:
-                return self._get_fallback_development_plan(selected_careers)
-        except Exception as e:
-            st.error(f"Error generating development plan: {str(e)}")
-            return self._get_fallback_development_plan(selected_careers)
+        return self._generate(
+            "development_plan",
+            prompt,
+            fallback=lambda: self._get_fallback_development_plan(selected_careers),
+            error_label="generating development plan"
+        )
     
     def generate_interview_questions(self, career_title: str, level: str = "entry") -> List[Dict[str, str]]:
         """Generate interview preparation questions"""
         
         prompt = self._create_interview_prompt(career_title, level)
         
-        try:
-            if self.openai_available:
-                return self._get_openai_interview_questions(prompt)
-            elif self.anthropic_available:
-                return self._get_anthropic_interview_questions(prompt)
-            elif self.google_available:
-                return self._get_google_interview_questions(prompt)
-            else:
-                return self._get_fallback_interview_questions(career_title)
-        except Exception as e:
-            st.error(f"Error generating interview questions: {str(e)}")
-            return self._get_fallback_interview_questions(career_title)
+        return self._generate(
+            "interview_questions",
+            prompt,
+            fallback=lambda: self._get_fallback_interview_questions(career_title),
+            error_label="generating interview questions"
+        )
     
     def analyze_skills_gap(self,
                           current_skills: List[str],
@@ -176,69 +259,15 @@ class AIManager:
                           riasec_scores: Dict[str, float]) -> Dict[str, Any]:
         """Analyze skills gap for target career"""
         
+        riasec_scores = self._bucket_scores(riasec_scores)
         prompt = self._create_skills_gap_prompt(current_skills, target_career, riasec_scores)
         
-        try:
-            if self.openai_available:
-                return self._get_openai_skills_analysis(prompt)
-            elif self.anthropic_available:
-                return self._get_anthropic_skills_analysis(prompt)
-            elif self.google_available:
-                return self._get_google_skills_analysis(prompt)
-            else:
-                return self._get_fallback_skills_analysis(target_career)
-        except Exception as e:
-            st.error(f"Error analyzing skills gap: {str(e)}")
-            return self._get_fallback_skills_analysis(target_career)
-    
-    def _create_career_prompt(self, riasec_scores: Dict[str, float], 
-                            additional_info: Dict[str, Any], 
-                            num_recommendations: int) -> str:
-        """Create prompt for career recommendations"""
-        
-        sorted_scores = sorted(riasec_scores.items(), key=lambda x: x[1], reverse=True)
-        top_types = sorted_scores[:3]
-        
-        prompt = f"""As a career counselor, analyze these RIASEC assessment results and provide {num_recommendations} specific career recommendations.
-
-RIASEC Scores:
-{json.dumps(riasec_scores, indent=2)}
-
-Top 3 Types: {', '.join([f"{t[0]} ({t[1]:.1f})" for t in top_types])}
-
-Additional Information:
-- Education Level: {additional_info.get('education', 'Not specified')}
-- Years of Experience: {additional_info.get('experience', 0)}
-- Interests: {additional_info.get('interests', 'Not specified')}
-- Career Goals: {additional_info.get('goals', 'Not specified')}
-- Preferred Work Environment: {additional_info.get('work_environment', 'Not specified')}
-- Salary Expectations: {additional_info.get('salary_expectations', 'Not specified')}
-
-For each career recommendation, provide:
-1. Job title
-2. Brief description (2-3 sentences)
-3. Why it matches their RIASEC profile
-4. Required skills (top 5)
-5. Typical education requirements
-6. Salary range (entry to senior level)
-7. Growth outlook (next 5-10 years)
-8. Day-to-day responsibilities
-
-Return the response as a JSON array with the following structure:
-[
-  {{
-    "title": "Job Title",
-    "description": "Brief description",
-    "match_reason": "Why it matches their profile",
-    "required_skills": ["skill1", "skill2", ...],
-    "education": "Typical education requirements",
-    "salary_range": "Entry to senior level range",
-    "growth_outlook": "Growth prospects",
-    "daily_tasks": ["task1", "task2", ...]
-  }}
-]"""
-        
-        return prompt
+        return self._generate(
+            "skills_analysis",
+            prompt,
+            fallback=lambda: self._get_fallback_skills_analysis(target_career),
+            error_label="analyzing skills gap"
+        )
     
     def _create_coaching_questions_prompt(self, 
                                         coachee_riasec_scores: Dict[str, float],
@@ -252,7 +281,7 @@ Return the response as a JSON array with the following structure:
         prompt = f"""As an expert career coach, generate coaching questions tailored to this coachee's RIASEC profile.
 
 Coachee's RIASEC Profile:
-{json.dumps(coachee_riasec_scores, indent=2)}
+{compact_json(compact_scores(coachee_riasec_scores))}
 
 Top 3 Types: {', '.join([f"{t[0]} ({t[1]:.1f})" for t in top_types])}
 
@@ -302,7 +331,7 @@ Return as JSON array:
         prompt = f"""As a management coach, generate coaching questions for a manager to use with their team member based on the team member's RIASEC profile.
 
 Team Member's RIASEC Profile:
-{json.dumps(team_member_riasec, indent=2)}
+{compact_json(compact_scores(team_member_riasec))}
 
 Top 3 Types: {', '.join([f"{t[0]} ({t[1]:.1f})" for t in top_types])}
 
@@ -346,10 +375,13 @@ Return as JSON array:
                                    team_context: Dict[str, Any]) -> str:
         """Create prompt for team insights based on RIASEC profiles"""
         
+        # Large teams are summarized so the prompt stays within its token budget
+        team_profiles, _ = fit_team_profiles(team_riasec_profiles)
+        
         prompt = f"""Analyze this team's RIASEC profiles to provide insights on team dynamics and recommendations.
 
-Team RIASEC Profiles:
-{json.dumps(team_riasec_profiles, indent=2)}
+Team RIASEC Profiles (summary, then one member per line):
+{team_profiles}
 
 Team Context:
 - Team Size: {len(team_riasec_profiles)}
@@ -510,317 +542,23 @@ Return as JSON:
         
         return prompt
     
-    # OpenAI implementations
-    def _get_openai_recommendations(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get recommendations using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert career counselor specializing in RIASEC assessments and career guidance."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
+    # Provider dispatch
+    def _generate(self,
+                  task: str,
+                  prompt: str,
+                  fallback: Callable[[], Any],
+                  error_label: str,
+                  parse_fallback: Optional[Callable[[str], Any]] = None) -> Any:
+        """Get a JSON answer for a task through the shared provider router"""
+        return self.router.generate(
+            task,
+            prompt,
+            fallback=fallback,
+            error_label=error_label,
+            parse_fallback=parse_fallback,
+            hedging=self.hedging,
+            priority=self.priority
         )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback parsing
-            return self._parse_text_response(content)
-    
-    def _get_openai_coaching_questions(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get coaching questions using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert career coach specializing in RIASEC-based coaching."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_coaching_questions({}, "general")
-    
-    def _get_openai_manager_questions(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get manager coaching questions using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a management coach helping managers have effective career conversations."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_manager_questions({}, "development")
-    
-    def _get_openai_team_insights(self, prompt: str) -> Dict[str, Any]:
-        """Get team insights using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an organizational psychologist specializing in team dynamics and RIASEC profiles."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_team_insights([])
-    
-    def _get_openai_development_plan(self, prompt: str) -> Dict[str, Any]:
-        """Get development plan using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a career development expert creating actionable development plans."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_development_plan([])
-    
-    def _get_openai_interview_questions(self, prompt: str) -> List[Dict[str, str]]:
-        """Get interview questions using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert interviewer and career coach."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1500
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_interview_questions("")
-    
-    def _get_openai_skills_analysis(self, prompt: str) -> Dict[str, Any]:
-        """Get skills analysis using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a skills assessment and career transition expert."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1500
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_skills_analysis("")
-    
-    # Anthropic implementations
-    def _get_anthropic_recommendations(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get recommendations using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=2000,
-            temperature=0.7,
-            system="You are an expert career counselor specializing in RIASEC assessments.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._parse_text_response(content)
-    
-    def _get_anthropic_coaching_questions(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get coaching questions using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=2000,
-            temperature=0.7,
-            system="You are an expert career coach specializing in RIASEC-based coaching.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_coaching_questions({}, "general")
-    
-    def _get_anthropic_manager_questions(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get manager coaching questions using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=2000,
-            temperature=0.7,
-            system="You are a management coach helping managers have effective career conversations.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_manager_questions({}, "development")
-    
-    def _get_anthropic_team_insights(self, prompt: str) -> Dict[str, Any]:
-        """Get team insights using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=2000,
-            temperature=0.7,
-            system="You are an organizational psychologist specializing in team dynamics.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_team_insights([])
-    
-    def _get_anthropic_development_plan(self, prompt: str) -> Dict[str, Any]:
-        """Get development plan using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=2000,
-            temperature=0.7,
-            system="You are a career development expert.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_development_plan([])
-    
-    def _get_anthropic_interview_questions(self, prompt: str) -> List[Dict[str, str]]:
-        """Get interview questions using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1500,
-            temperature=0.7,
-            system="You are an expert interviewer and career coach.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_interview_questions("")
-    
-    def _get_anthropic_skills_analysis(self, prompt: str) -> Dict[str, Any]:
-        """Get skills analysis using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1500,
-            temperature=0.7,
-            system="You are a skills assessment expert.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return self._get_fallback_skills_analysis("")
-    
-    # Google implementations
-    def _get_google_recommendations(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get recommendations using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return self._parse_text_response(response.text)
-    
-    def _get_google_coaching_questions(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get coaching questions using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return self._get_fallback_coaching_questions({}, "general")
-    
-    def _get_google_manager_questions(self, prompt: str) -> List[Dict[str, Any]]:
-        """Get manager coaching questions using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return self._get_fallback_manager_questions({}, "development")
-    
-    def _get_google_team_insights(self, prompt: str) -> Dict[str, Any]:
-        """Get team insights using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return self._get_fallback_team_insights([])
-    
-    def _get_google_development_plan(self, prompt: str) -> Dict[str, Any]:
-        """Get development plan using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return self._get_fallback_development_plan([])
-    
-    def _get_google_interview_questions(self, prompt: str) -> List[Dict[str, str]]:
-        """Get interview questions using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return self._get_fallback_interview_questions("")
-    
-    def _get_google_skills_analysis(self, prompt: str) -> Dict[str, Any]:
-        """Get skills analysis using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return self._get_fallback_skills_analysis("")
     
     # Fallback implementations
     def _get_fallback_recommendations(self, riasec_scores: Dict[str, float]) -> List[Dict[str, Any]]:
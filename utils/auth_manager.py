@@ -1,5 +1,6 @@
 # Simple hardcoded authentication manager
 import streamlit as st
+from .activity_log import log_activity
 
 class AuthManager:
     """Simple authentication with hardcoded credentials"""
@@ -26,6 +27,7 @@ class AuthManager:
         if username in AuthManager.USERS:
             user = AuthManager.USERS[username]
             if user['password'] == password:
+                log_activity('login', username)
                 return {
                     'username': username,
                     'name': user['name'],
@@ -33,11 +35,13 @@ class AuthManager:
                     'email': user['email'],
                     'authenticated': True
                 }
+        log_activity('login_failed', username)
         return {'authenticated': False}
     
     @staticmethod
     def logout():
         """Clear authentication from session state"""
+        log_activity('logout', st.session_state.get('username'))
         keys_to_clear = ['authenticated', 'username', 'name', 'role', 'email']
         for key in keys_to_clear:
             if key in st.session_state:
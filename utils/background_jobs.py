@@ -0,0 +1,151 @@
+"""
+Background Jobs for Career Atlas
+
+In-process worker pool that precomputes an assessment's results as soon as it
+is saved. Every job's future is kept in a per-assessment store, so the results
+page reads finished data, or waits on the job already running, instead of
+generating it again on every rerun.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from .llm_manager import LLMManager
+
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_STORED_ASSESSMENTS = 200
+
+
+def assessment_key(assessment_data: Dict[str, Any]) -> str:
+    """Get the store key for an assessment (username and submit time)"""
+    return f"{assessment_data.get('username')}_{assessment_data.get('timestamp')}"
+
+
+def _in_script_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap fn to run with the submitting page's script context, so its warnings render"""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return fn
+
+    def run(*args, **kwargs):
+        thread = threading.current_thread()
+        add_script_run_ctx(thread, ctx)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            # Pool threads are shared, so don't leave this session's context behind
+            add_script_run_ctx(thread, None)
+
+    return run
+
+
+class AssessmentJobStore:
+    """Runs jobs on a thread pool and keeps their futures per assessment"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_assessments: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv('BACKGROUND_JOB_WORKERS', DEFAULT_JOB_WORKERS))
+        self.max_assessments = max_assessments or int(os.getenv('BACKGROUND_JOB_ASSESSMENTS', DEFAULT_STORED_ASSESSMENTS))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='assessment-jobs')
+        self._jobs: "OrderedDict[str, Dict[str, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Start a job for an assessment unless it is already running or done
+
+        A job that failed is started again. The oldest assessments are
+        dropped from the store once it holds more than max_assessments. Jobs
+        run with the submitting page's script context, so st.warning and
+        st.error calls inside them reach that page.
+        """
+        with self._lock:
+            jobs = self._jobs.setdefault(key, {})
+            self._jobs.move_to_end(key)
+            future = jobs.get(name)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._executor.submit(_in_script_context(fn), *args, **kwargs)
+                jobs[name] = future
+            while len(self._jobs) > self.max_assessments:
+                self._jobs.popitem(last=False)
+            return future
+
+    def adopt(self, key: str, name: str, future: Future) -> None:
+        """Use a job started elsewhere (e.g. a speculative prefetch) for an assessment"""
+        with self._lock:
+            jobs = self._jobs.setdefault(key, {})
+            self._jobs.move_to_end(key)
+            jobs.setdefault(name, future)
+
+    def get(self, key: str, name: str) -> Optional[Future]:
+        """Get a job's future, or None if it was never submitted"""
+        with self._lock:
+            return self._jobs.get(key, {}).get(name)
+
+    def ready(self, key: str, name: str) -> bool:
+        """Check whether a job finished without raising"""
+        future = self.get(key, name)
+        return future is not None and future.done() and future.exception() is None
+
+    def forget(self, key: str) -> None:
+        """Drop an assessment's jobs (running jobs still finish)"""
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get stored assessment and job counts for dashboards"""
+        with self._lock:
+            futures = [future for jobs in self._jobs.values() for future in jobs.values()]
+        return {
+            'assessments': len(self._jobs),
+            'running': sum(1 for future in futures if not future.done()),
+            'done': sum(1 for future in futures if future.done() and future.exception() is None),
+            'failed': sum(1 for future in futures if future.done() and future.exception() is not None)
+        }
+
+
+def precompute_assessment(assessment_data: Dict[str, Any],
+                          store: Optional[AssessmentJobStore] = None,
+                          skills: Optional[Dict[str, Any]] = None) -> Dict[str, Future]:
+    """
+    Start career recommendations and the development plan for an assessment
+
+    skills are the user's skills assessment responses, used to steer
+    retrieved roles. Safe to call again for the same assessment: jobs already running or done
+    are reused. The development plan job waits for the recommendations job,
+    which is always submitted first, so it cannot starve the pool.
+
+    Returns:
+        Dict of job name to future ('recommendations', 'development_plan')
+    """
+    store = store or get_job_store()
+    key = assessment_key(assessment_data)
+    scores = assessment_data['scores']
+    additional_info = assessment_data.get('additional_info', {})
+    manager = LLMManager()
+
+    recommendations = store.submit(
+        key, 'recommendations', manager.generate_career_recommendations, scores, additional_info, skills)
+    development_plan = store.submit(
+        key, 'development_plan',
+        lambda: manager.generate_development_plan(scores, recommendations.result()[:3], additional_info))
+
+    return {'recommendations': recommendations, 'development_plan': development_plan}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> AssessmentJobStore:
+    """Get the process-wide job store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AssessmentJobStore()
+    return _store
@@ -0,0 +1,158 @@
+"""
+AI Cache Warmer for Career Atlas
+
+Pregenerates career recommendations, development plans and coaching questions
+for the most common (bucketed) RIASEC profiles so that most users are served
+from the shared response cache. Intended to run off-peak, e.g. from cron:
+
+    python -m utils.cache_warmer --limit 20
+
+Profiles are bucketed with the app's LLM_PROFILE_BUCKET_STEP; warming with
+any other step would build prompts that live pages never send, so it is
+refused.
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ai_manager import AIManager
+from .llm_manager import LLMManager
+from .profile_buckets import RIASEC_TYPES, get_bucket_step, holland_code, quantize_scores, representative_scores
+from .rate_limiter import BATCH
+from .storage import get_storage
+
+# Values the assessment form submits when the optional fields are left alone
+EDUCATION_LEVELS = ["High School", "Some College", "Bachelor's Degree", "Master's Degree", "Doctorate"]
+DEFAULT_COACHING_CONTEXTS = ["general"]
+
+
+def frequent_profiles(data_dir: str = 'data',
+                      step: Optional[float] = None,
+                      limit: int = 20) -> List[Tuple[Dict[str, float], int]]:
+    """
+    Get the most frequent bucketed RIASEC profiles from saved assessments
+
+    Padded with typical profiles for two-letter Holland codes when there is
+    not enough history yet.
+
+    Returns:
+        List of (scores, number of assessments) pairs, most frequent first
+    """
+    step = get_bucket_step() if step is None else step
+    counts = Counter()
+    for assessment in get_storage(data_dir).iter_assessments():
+        scores = assessment.get('scores', {})
+        if scores:
+            counts[tuple(sorted(quantize_scores(scores, step).items()))] += 1
+
+    profiles = [(dict(key), count) for key, count in counts.most_common(limit)]
+
+    seen_codes = {holland_code(scores, 2) for scores, _ in profiles}
+    for first in RIASEC_TYPES:
+        for second in RIASEC_TYPES:
+            if len(profiles) >= limit:
+                return profiles
+            code = first[0] + second[0]
+            if first != second and code not in seen_codes:
+                profiles.append((quantize_scores(representative_scores(code), step), 0))
+                seen_codes.add(code)
+
+    return profiles
+
+
+def warm_cache(limit: int = 20,
+               step: Optional[float] = None,
+               education_levels: Optional[List[str]] = None,
+               coaching_contexts: Optional[List[str]] = None,
+               pause: float = 0.0,
+               data_dir: str = 'data') -> Dict[str, Any]:
+    """
+    Pregenerate AI output for frequent profiles and store it in the cache
+
+    Args:
+        limit: Number of profiles to warm
+        step: Score bucket width (defaults to the app's LLM_PROFILE_BUCKET_STEP)
+        education_levels: Assessment contexts to warm (defaults to all levels)
+        coaching_contexts: Coaching contexts to warm
+        pause: Seconds to wait between profiles to spread provider load
+
+    Returns:
+        Summary with number of profiles and generations
+
+    Raises:
+        ValueError: If step differs from LLM_PROFILE_BUCKET_STEP, so the
+            warmed prompts would never match the app's
+    """
+    app_step = get_bucket_step()
+    step = app_step if step is None else step
+    if step != app_step:
+        raise ValueError(f"Bucket step {step:g} does not match the app's LLM_PROFILE_BUCKET_STEP ({app_step:g}); "
+                         "warmed answers would never be used")
+
+    # Batch priority keeps warm-up calls behind live page requests
+    llm_manager = LLMManager(bucket_step=step, priority=BATCH)
+    ai_manager = AIManager(bucket_step=step, priority=BATCH)
+
+    summary = {'profiles': 0, 'generations': 0, 'started_at': time.time()}
+    if not ai_manager.get_available_providers():
+        summary['skipped'] = 'No AI provider API keys configured'
+        return summary
+
+    education_levels = education_levels or EDUCATION_LEVELS
+    coaching_contexts = coaching_contexts or DEFAULT_COACHING_CONTEXTS
+
+    for scores, _count in frequent_profiles(data_dir, step, limit):
+        for education in education_levels:
+            additional_info = {
+                "education": education,
+                "experience": 0,
+                "interests": "",
+                "goals": ""
+            }
+            careers = llm_manager.generate_career_recommendations(scores, additional_info)
+            llm_manager.generate_development_plan(scores, careers[:3], additional_info)
+            summary['generations'] += 2
+
+        for context in coaching_contexts:
+            ai_manager.generate_coaching_questions(scores, context, {})
+            summary['generations'] += 1
+
+        summary['profiles'] += 1
+        if pause:
+            time.sleep(pause)
+
+    summary['duration_seconds'] = time.time() - summary.pop('started_at')
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pregenerate AI output for common RIASEC profiles")
+    parser.add_argument('--limit', type=int, default=20, help="Number of profiles to warm")
+    parser.add_argument('--step', type=float,
+                        help="Score bucket width (defaults to, and must match, LLM_PROFILE_BUCKET_STEP)")
+    parser.add_argument('--education', action='append', help="Education level to warm (repeatable)")
+    parser.add_argument('--coaching-context', action='append', help="Coaching context to warm (repeatable)")
+    parser.add_argument('--pause', type=float, default=0.0, help="Seconds to wait between profiles")
+    parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    try:
+        summary = warm_cache(
+            limit=args.limit,
+            step=args.step,
+            education_levels=args.education,
+            coaching_contexts=args.coaching_context,
+            pause=args.pause,
+            data_dir=args.data_dir
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+"""
+Career Candidate Retrieval for Career Atlas
+
+Retrieves candidate job roles from the jobskills corpus
+(data/jobskills/*jobroledesc*.csv) for a RIASEC profile, so the AI only has to
+re-rank and explain a short list of real roles instead of inventing careers.
+Each role gets a RIASEC profile from keyword matches in its title and
+description; candidates are ranked by fit with the person's profile plus
+overlap with their stated interests and goals and the skills they rated
+themselves confident in on the skills assessment.
+"""
+
+import csv
+import glob
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .profile_buckets import RIASEC_TYPES, holland_code
+
+DEFAULT_CANDIDATES = 12
+MAX_PER_SECTOR = 2
+SUMMARY_CHARS = 160
+
+# Skills assessment ratings that count as having a skill (Beginner does not)
+CONFIDENT_SKILL_LEVELS = {'Intermediate', 'Advanced', 'Expert', 2, 3, 4}
+
+# Word stems that signal each RIASEC type in a job role description
+RIASEC_KEYWORDS = {
+    'Realistic': [
+        'equipment', 'machin', 'mainten', 'repair', 'install', 'operat', 'technician', 'mechanic',
+        'construct', 'vehicle', 'aircraft', 'vessel', 'plant', 'tool', 'inspect', 'build', 'hands-on',
+        'field', 'site', 'fabricat', 'assembl', 'electrical', 'hardware', 'driv', 'crane', 'landscap'
+    ],
+    'Investigative': [
+        'research', 'analy', 'scien', 'data', 'investigat', 'laborator', 'test', 'model', 'diagnos',
+        'engineer', 'evaluat', 'statistic', 'algorithm', 'experiment', 'clinical', 'technical',
+        'problem', 'assess', 'insight', 'forensic', 'quantitative'
+    ],
+    'Artistic': [
+        'design', 'creativ', 'art', 'content', 'media', 'visual', 'music', 'writ', 'edit', 'film',
+        'produc', 'brand', 'aesthetic', 'concept', 'story', 'graphic', 'animat', 'photograph',
+        'perform', 'curat', 'innovat'
+    ],
+    'Social': [
+        'care', 'patient', 'counsel', 'teach', 'train', 'educat', 'support', 'communit', 'client',
+        'guest', 'customer', 'welfare', 'social', 'nurs', 'therap', 'child', 'learner', 'coach',
+        'mentor', 'volunteer', 'famil', 'service user', 'empath'
+    ],
+    'Enterprising': [
+        'manag', 'lead', 'sales', 'business', 'strateg', 'market', 'negotiat', 'direct', 'develop new',
+        'growth', 'entrepreneur', 'revenue', 'stakeholder', 'partner', 'commercial', 'invest',
+        'portfolio', 'influenc', 'head', 'chief', 'drive'
+    ],
+    'Conventional': [
+        'record', 'complian', 'procedur', 'account', 'audit', 'document', 'administr', 'schedul',
+        'inventor', 'regulat', 'process', 'report', 'policy', 'policies', 'control', 'budget',
+        'payroll', 'clerk', 'accura', 'standard', 'quality', 'tax', 'coordinat'
+    ]
+}
+
+_STOPWORDS = {
+    'and', 'the', 'for', 'with', 'that', 'this', 'from', 'into', 'their', 'they', 'have', 'will',
+    'work', 'working', 'able', 'also', 'well', 'other', 'such', 'across', 'within', 'role',
+    'specified', 'none', 'want', 'like', 'more', 'some', 'about'
+}
+
+_WORD = re.compile(r"[a-z][a-z\-]+")
+
+_KEYWORD_PATTERNS = {
+    riasec_type: re.compile(r'\b(?:' + '|'.join(re.escape(stem) for stem in stems) + ')')
+    for riasec_type, stems in RIASEC_KEYWORDS.items()
+}
+
+
+def retrieval_enabled() -> bool:
+    """Check whether recommendations re-rank retrieved roles (LLM_RECOMMENDATION_MODE=retrieval)"""
+    return os.getenv('LLM_RECOMMENDATION_MODE', 'generate').lower() == 'retrieval'
+
+
+def candidate_count() -> int:
+    """Get how many retrieved roles go into a re-rank prompt"""
+    try:
+        return max(int(os.getenv('LLM_RETRIEVAL_CANDIDATES', DEFAULT_CANDIDATES)), 1)
+    except ValueError:
+        return DEFAULT_CANDIDATES
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD.findall((text or '').lower())
+
+
+def _terms(text: str) -> set:
+    """Content words of a free-text field, for overlap matching"""
+    return {token for token in _tokens(text) if len(token) > 3 and token not in _STOPWORDS}
+
+
+def _riasec_profile(text: str) -> Dict[str, float]:
+    """Share of RIASEC keyword hits per type in a text"""
+    lowered = (text or '').lower()
+    hits = {riasec_type: len(pattern.findall(lowered)) for riasec_type, pattern in _KEYWORD_PATTERNS.items()}
+    total = sum(hits.values())
+    if not total:
+        return {riasec_type: 1.0 / len(RIASEC_TYPES) for riasec_type in RIASEC_TYPES}
+    return {riasec_type: hits[riasec_type] / total for riasec_type in RIASEC_TYPES}
+
+
+def _summary(description: str, limit: int = SUMMARY_CHARS) -> str:
+    """First sentence of a description, trimmed to limit characters"""
+    text = ' '.join((description or '').split())
+    sentence = text.split('. ')[0].rstrip('.')
+    if len(sentence) > limit:
+        sentence = sentence[:limit - 1].rsplit(' ', 1)[0] + '…'
+    return sentence
+
+
+def _source_files(data_dir: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(data_dir, '*jobroledesc*.csv')))
+
+
+def corpus_signature(data_dir: str) -> tuple:
+    """Identify a corpus version by its file names and modification times"""
+    return tuple((path, os.path.getmtime(path)) for path in _source_files(data_dir))
+
+
+class CareerRetriever:
+    """In-memory index of job roles from the jobskills corpus"""
+
+    def __init__(self, data_dir: str = os.path.join('data', 'jobskills')):
+        self.data_dir = data_dir
+        self.signature = corpus_signature(data_dir)
+        self.roles: List[Dict[str, Any]] = []
+        self._load()
+
+    def _load(self) -> None:
+        """Read job roles and precompute their RIASEC profiles and terms"""
+        seen = set()
+        for path in _source_files(self.data_dir):
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                for row in csv.DictReader(f):
+                    title = (row.get('Job Role') or '').strip()
+                    sector = (row.get('Sector') or '').strip()
+                    if not title or (sector, title) in seen:
+                        continue
+                    seen.add((sector, title))
+
+                    track = (row.get('Track') or '').strip()
+                    description = (row.get('Job Role Description') or '').strip()
+                    self.roles.append({
+                        'title': title,
+                        'sector': sector,
+                        'track': track,
+                        'description': description,
+                        'summary': _summary(description),
+                        'riasec': _riasec_profile(f"{title} {title} {track} {description}"),
+                        'title_terms': _terms(f"{title} {track}"),
+                        'terms': _terms(description)
+                    })
+
+    def retrieve(self,
+                 riasec_scores: Dict[str, float],
+                 additional_info: Optional[Dict[str, Any]] = None,
+                 limit: int = DEFAULT_CANDIDATES,
+                 max_per_sector: int = MAX_PER_SECTOR,
+                 skills: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Get the job roles that best fit a profile
+
+        Args:
+            riasec_scores: RIASEC type to score mapping
+            additional_info: Optional interests and goals (free text from the
+                assessment form) whose words are matched against role titles
+                and descriptions
+            limit: Number of candidates to return
+            max_per_sector: Cap per sector so candidates stay varied
+            skills: Optional skills assessment responses (skill name to
+                confidence level); roles mentioning skills rated
+                Intermediate or above rank higher
+
+        Returns:
+            Roles (title, sector, track, description, summary, retrieval_score)
+            in descending order of fit
+        """
+        weights = self._profile_weights(riasec_scores)
+        wanted = self._wanted_terms(additional_info or {})
+        skilled = self._skill_terms(skills or {})
+
+        scored = []
+        for role in self.roles:
+            score = sum(weights[t] * role['riasec'][t] for t in RIASEC_TYPES)
+            if wanted:
+                score += 0.15 * min(len(wanted & role['title_terms']), 2)
+                score += 0.05 * min(len(wanted & role['terms']), 4)
+            if skilled:
+                score += 0.05 * min(len(skilled & role['title_terms']) + len(skilled & role['terms']), 4)
+            scored.append((score, role))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        candidates = []
+        per_sector = {}
+        for score, role in scored:
+            if per_sector.get(role['sector'], 0) >= max_per_sector:
+                continue
+            per_sector[role['sector']] = per_sector.get(role['sector'], 0) + 1
+            candidates.append({
+                key: role[key] for key in ('title', 'sector', 'track', 'description', 'summary')
+            })
+            candidates[-1]['retrieval_score'] = round(score, 4)
+            if len(candidates) >= limit:
+                break
+        return candidates
+
+    @staticmethod
+    def _profile_weights(riasec_scores: Dict[str, float]) -> Dict[str, float]:
+        """Weight each type by how far it sits above the person's average"""
+        values = {t: float(riasec_scores.get(t, 0) or 0) for t in RIASEC_TYPES}
+        mean = sum(values.values()) / len(values)
+        above = {t: max(value - mean, 0.0) for t, value in values.items()}
+        total = sum(above.values())
+        if not total:
+            return {t: 1.0 / len(RIASEC_TYPES) for t in RIASEC_TYPES}
+        return {t: value / total for t, value in above.items()}
+
+    @staticmethod
+    def _wanted_terms(additional_info: Dict[str, Any]) -> set:
+        terms = set()
+        for field in ('interests', 'goals'):
+            terms |= _terms(str(additional_info.get(field) or ''))
+        return terms
+
+    @staticmethod
+    def _skill_terms(skills: Dict[str, Any]) -> set:
+        terms = set()
+        for skill, level in skills.items():
+            if level in CONFIDENT_SKILL_LEVELS:
+                terms |= _terms(str(skill))
+        return terms
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_career_retriever(data_dir: str = os.path.join('data', 'jobskills')) -> Optional[CareerRetriever]:
+    """Get the shared retriever, or None without a corpus; reloads when the corpus files change"""
+    global _retriever
+    with _retriever_lock:
+        try:
+            if (_retriever is None or _retriever.data_dir != data_dir
+                    or _retriever.signature != corpus_signature(data_dir)):
+                _retriever = CareerRetriever(data_dir)
+        except (OSError, csv.Error):
+            return None
+        return _retriever if _retriever.roles else None
+
+
+def create_rerank_prompt(riasec_scores: Dict[str, float],
+                         additional_info: Dict[str, Any],
+                         candidates: List[Dict[str, Any]],
+                         count: int) -> str:
+    """Build a compact prompt asking the model to pick and explain the best candidates"""
+    scores = {riasec_type[0]: round(float(score), 1) for riasec_type, score in riasec_scores.items()
+              if isinstance(score, (int, float))}
+    lines = [f"{i} | {c['title']} | {c['sector']} | {c['summary']}" for i, c in enumerate(candidates, 1)]
+
+    return f"""Pick the {count} best-fitting careers for this person from the candidate job roles below. Use only listed candidates.
+
+RIASEC scores: {json.dumps(scores, separators=(',', ':'))} (Holland code {holland_code(riasec_scores)})
+Education: {additional_info.get('education', 'Not specified')}; Experience: {additional_info.get('experience', 0)} years
+Interests: {additional_info.get('interests') or 'Not specified'}; Goals: {additional_info.get('goals') or 'Not specified'}
+
+Candidates (id | role | sector | summary):
+{chr(10).join(lines)}
+
+Return a JSON array of {count} objects, best first:
+[{{"id": <candidate id>, "match_score": <0-100>, "match_reason": "<one sentence>", "skills": ["<up to 5 key skills>"]}}]"""
+
+
+def merge_ranked(candidates: List[Dict[str, Any]], ranked: Any, count: int) -> List[Dict[str, Any]]:
+    """
+    Turn the model's ranking into full recommendations
+
+    Titles, sectors and descriptions always come from the corpus. Unknown or
+    repeated ids are ignored, and if the model picked fewer than count roles
+    the list is topped up in retrieval order.
+    """
+    if isinstance(ranked, dict):
+        ranked = next((value for value in ranked.values() if isinstance(value, list)), [])
+    if not isinstance(ranked, list):
+        ranked = []
+
+    recommendations = []
+    used = set()
+    for item in ranked:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get('id')) - 1
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= index < len(candidates) or index in used:
+            continue
+        used.add(index)
+        skills = item.get('skills') if isinstance(item.get('skills'), list) else []
+        recommendations.append(_recommendation(
+            candidates[index],
+            match_score=item.get('match_score'),
+            match_reason=item.get('match_reason'),
+            skills=skills[:5]
+        ))
+        if len(recommendations) >= count:
+            return recommendations
+
+    for index, candidate in enumerate(candidates):
+        if len(recommendations) >= count:
+            break
+        if index not in used:
+            recommendations.append(_recommendation(candidate))
+    return recommendations
+
+
+def _recommendation(candidate: Dict[str, Any],
+                    match_score: Any = None,
+                    match_reason: Optional[str] = None,
+                    skills: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    if not isinstance(match_score, (int, float)):
+        match_score = int(50 + 50 * min(candidate.get('retrieval_score', 0.5), 1.0))
+    return {
+        'title': candidate['title'],
+        'description': candidate['description'],
+        'sector': candidate['sector'],
+        'track': candidate['track'],
+        'match_score': match_score,
+        'match_reason': match_reason or f"{candidate['track']} role in {candidate['sector']} that fits your RIASEC profile",
+        'skills': list(skills or []),
+        'source': 'jobskills'
+    }
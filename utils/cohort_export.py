@@ -0,0 +1,285 @@
+"""
+Cohort Export for Career Atlas
+
+Bulk export of every user's assessments (with scores) and reports for
+analysts, as Parquet (needs pyarrow) or CSV. Users are split into shards that
+are exported in parallel worker processes; each shard streams its records
+into its own part file in fixed-size chunks, so memory stays bounded however
+many assessments there are. Assessments are selected from the per-user
+manifests by date before any document is opened. From the command line:
+
+    python -m utils.cohort_export --format parquet --since 2026-01-01 --cohort persona:coach
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .activity_log import log_activity
+from .profile_buckets import RIASEC_TYPES, holland_code
+from .quantile_sketches import cohorts
+from .storage import create_storage, get_storage
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # Parquet export is optional; CSV always works
+    pyarrow = None
+    parquet = None
+
+FORMATS = ('csv', 'parquet')
+DEFAULT_WORKERS = 4
+DEFAULT_CHUNK_ROWS = 5000
+
+ASSESSMENT_COLUMNS = (['username', 'record_id', 'created_at', 'timestamp', 'persona']
+                      + RIASEC_TYPES
+                      + ['top_type', 'holland_code', 'education', 'experience', 'interests', 'goals'])
+REPORT_COLUMNS = ['username', 'record_id', 'created_at', 'generated_at', 'assessment_date',
+                  'top_types', 'recommendation_count', 'recommendations', 'interpretation']
+NUMERIC_COLUMNS = {**{riasec_type: float for riasec_type in RIASEC_TYPES},
+                   'experience': float, 'recommendation_count': int}
+
+
+def _stamp(date: Optional[str]) -> Optional[str]:
+    """Turn YYYY-MM-DD into the YYYYmmdd prefix of record timestamps"""
+    return date.replace('-', '') if date else None
+
+
+def _in_range(created_at: str, since: Optional[str], until: Optional[str]) -> bool:
+    day = created_at[:8]
+    return (since is None or day >= since) and (until is None or day <= until)
+
+
+def assessment_row(username: str, record_id: str, created_at: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten an assessment into an export row"""
+    scores = data.get('scores') or {}
+    additional_info = data.get('additional_info') or {}
+    row = {
+        'username': username,
+        'record_id': record_id,
+        'created_at': created_at,
+        'timestamp': data.get('timestamp'),
+        'persona': data.get('persona'),
+        'top_type': max(scores, key=scores.get) if scores else None,
+        'holland_code': holland_code(scores) if scores else None,
+        'education': additional_info.get('education'),
+        'experience': additional_info.get('experience'),
+        'interests': additional_info.get('interests'),
+        'goals': additional_info.get('goals')
+    }
+    for riasec_type in RIASEC_TYPES:
+        row[riasec_type] = scores.get(riasec_type)
+    return row
+
+
+def report_row(username: str, record_id: str, created_at: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a report into an export row"""
+    recommendations = data.get('career_recommendations') or []
+    return {
+        'username': username,
+        'record_id': record_id,
+        'created_at': created_at,
+        'generated_at': data.get('generated_at'),
+        'assessment_date': (data.get('user_info') or {}).get('assessment_date'),
+        'top_types': ','.join(item.get('type', '') for item in data.get('top_types') or []),
+        'recommendation_count': len(recommendations),
+        'recommendations': '; '.join(
+            str(item.get('title', '')) if isinstance(item, dict) else str(item) for item in recommendations),
+        'interpretation': data.get('interpretation')
+    }
+
+
+class _PartWriter:
+    """Writes rows to one CSV or Parquet part file in chunks"""
+
+    def __init__(self, path: str, columns: List[str], fmt: str, chunk_rows: int):
+        self.path = path
+        self.columns = columns
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._chunk: List[Dict[str, Any]] = []
+        self._file = None
+        self._writer = None
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._chunk.append(row)
+        if len(self._chunk) >= self.chunk_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._chunk:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self.fmt == 'csv':
+            if self._writer is None:
+                self._file = open(self.path, 'w', newline='')
+                self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+                self._writer.writeheader()
+            self._writer.writerows(self._chunk)
+        else:
+            schema = self._schema()
+            table = pyarrow.Table.from_pylist(
+                [{column: self._column_value(column, row.get(column)) for column in self.columns}
+                 for row in self._chunk],
+                schema=schema)
+            if self._writer is None:
+                self._writer = parquet.ParquetWriter(self.path, schema, compression='zstd')
+            self._writer.write_table(table)
+        self.rows += len(self._chunk)
+        self._chunk = []
+
+    def _schema(self) -> "pyarrow.Schema":
+        types = {float: pyarrow.float64(), int: pyarrow.int64()}
+        return pyarrow.schema([(column, types.get(NUMERIC_COLUMNS.get(column), pyarrow.string()))
+                               for column in self.columns])
+
+    @staticmethod
+    def _column_value(column: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if column in NUMERIC_COLUMNS:
+            try:
+                return NUMERIC_COLUMNS[column](value)
+            except (TypeError, ValueError):
+                return None
+        return str(value)
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is not None:
+            if self.fmt == 'csv':
+                self._file.close()
+            else:
+                self._writer.close()
+
+
+def _export_shard(backend: str,
+                  data_dir: str,
+                  usernames: List[str],
+                  out_dir: str,
+                  shard: int,
+                  fmt: str,
+                  since: Optional[str],
+                  until: Optional[str],
+                  cohort: str,
+                  chunk_rows: int) -> Dict[str, int]:
+    """Export one shard of users to its own part files (runs in a worker process)"""
+    storage = create_storage(backend, data_dir)
+    assessments = _PartWriter(os.path.join(out_dir, 'assessments', f"part-{shard:05d}.{fmt}"),
+                              ASSESSMENT_COLUMNS, fmt, chunk_rows)
+    reports = _PartWriter(os.path.join(out_dir, 'reports', f"part-{shard:05d}.{fmt}"),
+                          REPORT_COLUMNS, fmt, chunk_rows)
+    try:
+        for username in usernames:
+            in_cohort = False
+            for entry in storage.manifest(username):
+                if not _in_range(entry.created_at, since, until):
+                    continue
+                data = storage.get('assessment', username, entry.record_id)
+                if data is None or cohort not in cohorts(data):
+                    continue
+                in_cohort = True
+                assessments.write(assessment_row(username, entry.record_id, entry.created_at, data))
+            if not in_cohort and cohort != 'all':
+                continue
+            for record in storage.records('report', username):
+                if _in_range(record.created_at, since, until):
+                    reports.write(report_row(username, record.record_id, record.created_at, record.data))
+    finally:
+        assessments.close()
+        reports.close()
+    return {'assessments': assessments.rows, 'reports': reports.rows}
+
+
+def export_cohort(data_dir: str = 'data',
+                  out_dir: Optional[str] = None,
+                  fmt: str = 'csv',
+                  since: Optional[str] = None,
+                  until: Optional[str] = None,
+                  cohort: str = 'all',
+                  workers: Optional[int] = None,
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Export assessments and reports for a date range and cohort
+
+    Args:
+        data_dir: Data directory to read from
+        out_dir: Directory for the export (default data/exports/cohort_<time>)
+        fmt: 'csv' or 'parquet'
+        since: First day to include (YYYY-MM-DD)
+        until: Last day to include (YYYY-MM-DD)
+        cohort: 'all' or 'persona:<name>'; reports are exported for users
+            with an assessment in the cohort
+        workers: Parallel worker processes (EXPORT_WORKERS, default 4)
+        chunk_rows: Rows buffered per part file before writing
+
+    Returns:
+        Dict with the output directory, part files and row counts
+    """
+    if cohort != 'all' and not cohort.startswith('persona:'):
+        raise ValueError(f"Unknown cohort '{cohort}' (expected all or persona:<name>)")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of {', '.join(FORMATS)})")
+    if fmt == 'parquet' and pyarrow is None:
+        raise ValueError("Parquet export needs the pyarrow package (pip install pyarrow)")
+
+    storage = get_storage(data_dir)
+    out_dir = out_dir or os.path.join(data_dir, 'exports', f"cohort_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    workers = max(1, workers or int(os.getenv('EXPORT_WORKERS', DEFAULT_WORKERS)))
+    usernames = storage.usernames()
+    shards = [usernames[index::workers] for index in range(workers) if usernames[index::workers]]
+    jobs = [(storage.name, data_dir, shard, out_dir, index, fmt, _stamp(since), _stamp(until), cohort, chunk_rows)
+            for index, shard in enumerate(shards)]
+
+    if len(jobs) > 1:
+        # Spawned, not forked, so exporting from the threaded app is safe
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=multiprocessing.get_context('spawn')) as pool:
+            counts = list(pool.map(_export_shard, *zip(*jobs)))
+    else:
+        counts = [_export_shard(*job) for job in jobs]
+
+    log_activity('cohort_export', cohort=cohort, format=fmt, since=since, until=until,
+                 assessments=sum(count['assessments'] for count in counts))
+    files = []
+    for kind in ('assessments', 'reports'):
+        directory = os.path.join(out_dir, kind)
+        if os.path.isdir(directory):
+            files.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory)))
+    return {
+        'out_dir': out_dir,
+        'format': fmt,
+        'users': len(usernames),
+        'assessments': sum(count['assessments'] for count in counts),
+        'reports': sum(count['reports'] for count in counts),
+        'files': files
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Career Atlas assessments and reports in bulk")
+    parser.add_argument('--format', dest='fmt', choices=FORMATS, default='csv')
+    parser.add_argument('--since', help="First day to include (YYYY-MM-DD)")
+    parser.add_argument('--until', help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument('--cohort', default='all', help="all or persona:<name>")
+    parser.add_argument('--out', dest='out_dir', help="Output directory")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    try:
+        result = export_cohort(args.data_dir, args.out_dir, args.fmt, args.since, args.until,
+                               args.cohort, args.workers, args.chunk_rows)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
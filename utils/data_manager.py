@@ -1,13 +1,29 @@
+import copy
 import json
 import os
 from datetime import datetime
 import pandas as pd
 import streamlit as st
+from .activity_log import log_activity
+from .population_stats import get_population_stats
+from .quantile_sketches import get_cohort_sketches
+from .storage import get_storage
+from .write_behind import get_write_queue
 
 class DataManager:
     def __init__(self, data_dir='data'):
         self.data_dir = data_dir
         self.ensure_data_directory()
+        
+        # Assessments, reports and preferences go through the configured backend
+        self.storage = get_storage(data_dir)
+        self.population_stats = get_population_stats(data_dir)
+        self.cohort_sketches = get_cohort_sketches(data_dir)
+        
+        # Saves run on the background writer (WRITE_BEHIND_MODE), tagged with
+        # the username; reads wait for that user's pending saves only, so a
+        # user always sees their own writes without queueing behind others
+        self.writes = get_write_queue()
     
     def ensure_data_directory(self):
         """Ensure data directory exists"""
@@ -22,100 +38,78 @@ class DataManager:
                 os.makedirs(path)
     
     def save_assessment(self, assessment_data):
-        """Save assessment data locally"""
+        """
+        Queue assessment data to be saved locally
+        
+        Returns:
+            Future resolving to where the assessment was stored (raising if
+            the save failed); None in WRITE_BEHIND_MODE=async. Callers that
+            confirm the save to the user should wait on it.
+        """
+        return self.writes.submit_for(
+            assessment_data['username'], self._save_assessment, copy.deepcopy(assessment_data))
+    
+    def _save_assessment(self, assessment_data):
+        """Save assessment data and update the statistics built from it"""
         username = assessment_data['username']
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"assessment_{username}_{timestamp}.json"
-        
-        # Create user directory if it doesn't exist
-        user_dir = os.path.join(self.data_dir, 'user_data', username)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        
-        # Save to user directory
-        filepath = os.path.join(user_dir, filename)
-        with open(filepath, 'w') as f:
-            json.dump(assessment_data, f, indent=2)
+        new_user = not self.storage.has_records('assessment', username)
+        location = self.storage.save_assessment(username, assessment_data)
         
-        # Also save to assessments directory for easy access
-        assessments_filepath = os.path.join(self.data_dir, 'assessments', filename)
-        with open(assessments_filepath, 'w') as f:
-            json.dump(assessment_data, f, indent=2)
+        # Keep the running population statistics and percentiles current
+        self.population_stats.record_assessment(assessment_data, new_user)
+        self.cohort_sketches.record_assessment(assessment_data)
         
-        return filepath
+        scores = assessment_data.get('scores') or {}
+        log_activity('assessment_submitted', username,
+                     top_type=max(scores, key=scores.get) if scores else None)
+        return location
     
     def load_assessment(self, username, latest=True):
         """Load assessment data for a user"""
-        user_dir = os.path.join(self.data_dir, 'user_data', username)
-        
-        # Check if user directory exists
-        if not os.path.exists(user_dir):
-            return None
-        
-        user_files = [f for f in os.listdir(user_dir) 
-                     if f.startswith(f"assessment_{username}_") and f.endswith('.json')]
-        
-        if not user_files:
-            return None
-        
+        self.writes.flush(username)
         if latest:
-            # Get the most recent assessment
-            user_files.sort(reverse=True)
-            filepath = os.path.join(user_dir, user_files[0])
-            
-            with open(filepath, 'r') as f:
-                return json.load(f)
-        else:
-            # Return all assessments
-            assessments = []
-            for file in sorted(user_files, reverse=True):
-                filepath = os.path.join(user_dir, file)
-                with open(filepath, 'r') as f:
-                    assessments.append(json.load(f))
-            return assessments
+            # The manifest names the most recent assessment; only it is read
+            return self.storage.latest_assessment(username)
+        
+        # Return all assessments
+        return self.storage.load_assessments(username) or None
+    
+    def iter_assessments(self):
+        """Iterate over every saved assessment"""
+        self.writes.flush()
+        return self.storage.iter_assessments()
     
     def get_user_history(self, username):
-        """Get assessment history for a user"""
-        assessments = self.load_assessment(username, latest=False)
-        if not assessments:
+        """Get assessment history for a user (from the manifest, without loading documents)"""
+        self.writes.flush(username)
+        entries = self.storage.manifest(username)
+        if not entries:
             return pd.DataFrame()
         
         history = []
-        for assessment in assessments:
+        for entry in entries:
             history.append({
-                'Date': assessment.get('timestamp', 'Unknown'),
-                'Realistic': assessment.get('scores', {}).get('Realistic', 0),
-                'Investigative': assessment.get('scores', {}).get('Investigative', 0),
-                'Artistic': assessment.get('scores', {}).get('Artistic', 0),
-                'Social': assessment.get('scores', {}).get('Social', 0),
-                'Enterprising': assessment.get('scores', {}).get('Enterprising', 0),
-                'Conventional': assessment.get('scores', {}).get('Conventional', 0),
-                'Top Type': assessment.get('top_type', 'Unknown')
+                'Date': entry.timestamp or 'Unknown',
+                'Realistic': entry.scores.get('Realistic', 0),
+                'Investigative': entry.scores.get('Investigative', 0),
+                'Artistic': entry.scores.get('Artistic', 0),
+                'Social': entry.scores.get('Social', 0),
+                'Enterprising': entry.scores.get('Enterprising', 0),
+                'Conventional': entry.scores.get('Conventional', 0),
+                'Top Type': entry.top_type
             })
         
         return pd.DataFrame(history)
     
     def save_report(self, username, report_data):
-        """Save generated report"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"report_{username}_{timestamp}.json"
-        
-        # Create user directory if it doesn't exist
-        user_dir = os.path.join(self.data_dir, 'user_data', username)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        
-        # Save to user directory
-        filepath = os.path.join(user_dir, filename)
-        with open(filepath, 'w') as f:
-            json.dump(report_data, f, indent=2)
-        
-        # Also save to reports directory
-        reports_filepath = os.path.join(self.data_dir, 'reports', filename)
-        with open(reports_filepath, 'w') as f:
-            json.dump(report_data, f, indent=2)
-        
-        return filepath
+        """
+        Queue a generated report to be saved
+        
+        Returns:
+            Future resolving to where the report was stored; None in
+            WRITE_BEHIND_MODE=async
+        """
+        return self.writes.submit_for(username, self.storage.save_report, username, copy.deepcopy(report_data))
     
     def export_to_csv(self, username):
         """Export user data to CSV"""
@@ -128,10 +122,11 @@ class DataManager:
         filepath = os.path.join(self.data_dir, 'exports', filename)
         
         history.to_csv(filepath, index=False)
+        log_activity('history_export', username, rows=len(history))
         return filepath
     
     def generate_report(self, assessment_data, career_recommendations=None):
-        """Generate a comprehensive report"""
+        """Generate a comprehensive report (its stored copy is saved in the background)"""
         report = {
             'generated_at': datetime.now().isoformat(),
             'user_info': {
@@ -147,6 +142,7 @@ class DataManager:
         
         # Save report
         self.save_report(assessment_data['username'], report)
+        self.writes.submit(log_activity, 'report_generated', assessment_data['username'])
         
         return report
     
@@ -187,61 +183,9 @@ class DataManager:
     
     def get_statistics(self):
         """Get overall statistics from all assessments"""
-        assessments_dir = os.path.join(self.data_dir, 'assessments')
-        
-        if not os.path.exists(assessments_dir):
-            return None
-        
-        all_files = [f for f in os.listdir(assessments_dir) if f.endswith('.json')]
-        
-        if not all_files:
+        stats = self.population_stats.snapshot()
+        if not stats['total_assessments']:
             return None
-        
-        all_scores = {
-            'Realistic': [],
-            'Investigative': [],
-            'Artistic': [],
-            'Social': [],
-            'Enterprising': [],
-            'Conventional': []
-        }
-        
-        total_assessments = 0
-        users = set()
-        
-        for file in all_files:
-            filepath = os.path.join(assessments_dir, file)
-            try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                    scores = data.get('scores', {})
-                    username = data.get('username', 'unknown')
-                    users.add(username)
-                    total_assessments += 1
-                    
-                    for category, score in scores.items():
-                        if category in all_scores:
-                            all_scores[category].append(score)
-            except Exception as e:
-                st.warning(f"Error reading file {file}: {str(e)}")
-                continue
-        
-        # Calculate statistics
-        stats = {
-            'total_assessments': total_assessments,
-            'unique_users': len(users),
-            'category_stats': {}
-        }
-        
-        for category, scores in all_scores.items():
-            if scores:
-                stats['category_stats'][category] = {
-                    'mean': sum(scores) / len(scores),
-                    'min': min(scores),
-                    'max': max(scores),
-                    'count': len(scores)
-                }
-        
         return stats
     
     def load_questions(self):
@@ -330,26 +274,13 @@ class DataManager:
         return career_scores[:top_n]
     
     def save_user_preferences(self, username, preferences):
-        """Save user preferences"""
-        prefs_file = os.path.join(self.data_dir, 'user_data', username, 'preferences.json')
-        
-        # Ensure user directory exists
-        user_dir = os.path.join(self.data_dir, 'user_data', username)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        
-        with open(prefs_file, 'w') as f:
-            json.dump(preferences, f, indent=2)
+        """Queue user preferences to be saved"""
+        self.writes.submit_for(username, self.storage.put_preferences, username, copy.deepcopy(preferences))
     
     def load_user_preferences(self, username):
         """Load user preferences"""
-        prefs_file = os.path.join(self.data_dir, 'user_data', username, 'preferences.json')
-        
-        if not os.path.exists(prefs_file):
-            return {}
-        
+        self.writes.flush(username)
         try:
-            with open(prefs_file, 'r') as f:
-                return json.load(f)
+            return self.storage.get_preferences(username)
         except Exception:
             return {}
@@ -0,0 +1,209 @@
+"""
+Safe File Writes for Career Atlas
+
+Crash- and concurrency-safe replacements for open(path, 'w') + json.dump.
+Writes go to a temporary file in the same directory, are fsynced and then
+renamed over the target, so readers only ever see the old or the new file.
+Read-modify-write cycles hold an advisory lock file (<path>.lock) that
+serialises them across threads and worker processes on one machine.
+
+FILE_FSYNC picks the durability mode:
+    always  fsync every file and its directory before returning (default)
+    batch   group commit: writes that arrive while a flush is running are
+            flushed together, fsyncing each directory once per batch
+            (FILE_FSYNC_BATCH_MS optionally holds a batch open longer)
+    off     atomic rename only, no fsync (development and tests)
+"""
+
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+FSYNC_MODES = ('always', 'batch', 'off')
+DEFAULT_BATCH_WINDOW_MS = 0
+
+
+def fsync_mode() -> str:
+    """Get the configured durability mode (FILE_FSYNC)"""
+    mode = os.getenv('FILE_FSYNC', 'always').lower()
+    return mode if mode in FSYNC_MODES else 'always'
+
+
+def _fsync_path(path: str) -> None:
+    """fsync a file or directory by path"""
+    flags = (os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0)) if os.path.isdir(path) else os.O_RDONLY
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Some filesystems (and Windows directories) cannot be fsynced
+    finally:
+        os.close(fd)
+
+
+class _GroupCommitter:
+    """Flushes and renames pending writes in batches on a background thread"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: List[Tuple[str, str, threading.Event, List[BaseException]]] = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='file-io-commit', daemon=True)
+        self._thread.start()
+
+    def commit(self, tmp_path: str, path: str) -> None:
+        """Queue a written temp file and wait until it has been flushed into place"""
+        done = threading.Event()
+        errors: List[BaseException] = []
+        with self._condition:
+            self._pending.append((tmp_path, path, done, errors))
+            self._condition.notify()
+        done.wait()
+        if errors:
+            raise errors[0]
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            if self.window:
+                time.sleep(self.window)
+            with self._condition:
+                batch, self._pending = self._pending, []
+
+            directories = set()
+            for tmp_path, path, done, errors in batch:
+                try:
+                    _fsync_path(tmp_path)
+                    os.replace(tmp_path, path)
+                    directories.add(os.path.dirname(path) or '.')
+                except OSError as e:
+                    errors.append(e)
+            for directory in directories:
+                _fsync_path(directory)
+            for _, _, done, _ in batch:
+                done.set()
+
+
+_committer: Optional[_GroupCommitter] = None
+_committer_lock = threading.Lock()
+
+
+def _get_committer() -> _GroupCommitter:
+    global _committer
+    if _committer is None:
+        with _committer_lock:
+            if _committer is None:
+                window = float(os.getenv('FILE_FSYNC_BATCH_MS', DEFAULT_BATCH_WINDOW_MS)) / 1000
+                _committer = _GroupCommitter(window)
+    return _committer
+
+
+def atomic_write(path: str, data: Union[str, bytes]) -> None:
+    """Replace a file's contents atomically (temp file, fsync, rename)"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    mode = fsync_mode()
+    try:
+        # mkstemp creates files as 0600; keep the target's permissions instead
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+            if mode == 'always':
+                f.flush()
+                os.fsync(f.fileno())
+        if mode == 'batch':
+            _get_committer().commit(tmp_path, path)
+        else:
+            os.replace(tmp_path, path)
+            if mode == 'always':
+                _fsync_path(directory)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """Serialise data to JSON and write it atomically"""
+    atomic_write(path, json.dumps(data, indent=indent))
+
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock for a file
+
+    Locks <path>.lock with flock where available, so read-modify-write cycles
+    on the same file are serialised across processes as well as threads.
+    """
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+        lock_path = f"{path}.lock"
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Read a JSON file, returning default if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def update_json(path: str,
+                update: Callable[[Any], Any],
+                default: Any = None,
+                indent: Optional[int] = None) -> Any:
+    """
+    Read, change and rewrite a JSON file under its lock
+
+    Args:
+        path: File to update
+        update: Function given the current data (or default) returning the new data
+        default: Data to start from when the file is missing or unreadable
+        indent: JSON indentation for the rewritten file
+
+    Returns:
+        The data written
+    """
+    with file_lock(path):
+        data = update(read_json(path, default))
+        atomic_write_json(path, data, indent=indent)
+        return data
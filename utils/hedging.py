@@ -0,0 +1,133 @@
+"""
+Provider Hedging for Career Atlas
+
+Runs an ordered list of provider attempts with per-provider timeout budgets.
+In hedged mode the next provider is started when the current one has not
+answered within its p95 latency, and the first valid answer wins. Without
+hedging, the next provider starts only once the current one has failed,
+returned an invalid answer or run out of time.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .provider_health import get_provider_health
+
+DEFAULT_TIMEOUT_SECONDS = 30.0
+DEFAULT_HEDGE_DELAY_SECONDS = 4.0
+MIN_HEDGE_DELAY_SECONDS = 0.5
+MIN_LATENCY_SAMPLES = 20
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('LLM_MAX_WORKERS', '16')),
+    thread_name_prefix='llm-provider'
+)
+
+
+class NoValidResponse(Exception):
+    """Raised when no provider produced a valid answer"""
+
+    def __init__(self, last_error: Optional[BaseException] = None, last_result: Any = None):
+        super().__init__(str(last_error) if last_error else "No provider returned a valid response")
+        self.last_error = last_error
+        self.last_result = last_result
+
+
+def hedging_enabled() -> bool:
+    """Check whether hedged provider requests are switched on"""
+    return os.getenv('LLM_HEDGING', 'false').lower() in ('1', 'true', 'yes')
+
+
+def provider_timeout(provider: str) -> float:
+    """Get the timeout budget for a provider (LLM_TIMEOUT_<PROVIDER>)"""
+    value = os.getenv(f'LLM_TIMEOUT_{provider.upper()}', os.getenv('LLM_TIMEOUT', DEFAULT_TIMEOUT_SECONDS))
+    try:
+        return float(value)
+    except ValueError:
+        return DEFAULT_TIMEOUT_SECONDS
+
+
+def hedge_delay(provider: str) -> float:
+    """Get how long to wait on a provider before starting the next one"""
+    window = get_provider_health(provider).latency
+    p95 = window.percentile(95) if len(window) >= MIN_LATENCY_SAMPLES else None
+    if p95 is None:
+        p95 = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', DEFAULT_HEDGE_DELAY_SECONDS))
+    return min(max(p95, MIN_HEDGE_DELAY_SECONDS), provider_timeout(provider))
+
+
+def run_hedged(attempts: List[Tuple[str, Callable[[], Any]]],
+               is_valid: Callable[[Any], bool],
+               hedged: bool = True,
+               delay_for: Callable[[str], float] = hedge_delay,
+               timeout_for: Callable[[str], float] = provider_timeout) -> Tuple[str, Any]:
+    """
+    Run provider attempts and return the first valid result
+
+    Args:
+        attempts: (provider name, zero-argument call) pairs in preference order
+        is_valid: Whether a call's result is acceptable
+        hedged: Start the next provider after delay_for(provider) even if the
+            current one is still running
+        delay_for: Hedge delay per provider
+        timeout_for: Timeout budget per provider
+
+    Returns:
+        Tuple of (winning provider, result)
+
+    Raises:
+        NoValidResponse: If every attempt failed, timed out or was invalid.
+            Carries the last exception and the last invalid result.
+
+    Losing calls are cancelled if they have not started yet; calls already in
+    flight cannot be interrupted, so their results are discarded and their
+    own client timeouts bound how long they keep running.
+    """
+    remaining = list(attempts)
+    pending = {}
+    last_error = None
+    last_result = None
+    next_launch_at = None
+
+    def launch():
+        provider, call = remaining.pop(0)
+        now = time.monotonic()
+        pending[_executor.submit(call)] = (provider, now + timeout_for(provider))
+        return (now + delay_for(provider)) if hedged else None
+
+    try:
+        while remaining or pending:
+            if remaining and (not pending or (next_launch_at is not None and time.monotonic() >= next_launch_at)):
+                next_launch_at = launch()
+                continue
+
+            now = time.monotonic()
+            wake_at = min(deadline for _, deadline in pending.values())
+            if remaining and next_launch_at is not None:
+                wake_at = min(wake_at, next_launch_at)
+            done, _ = wait(list(pending), timeout=max(wake_at - now, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider, _ = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if is_valid(result):
+                    return provider, result
+                last_result = result
+
+            now = time.monotonic()
+            for future, (provider, deadline) in list(pending.items()):
+                if now >= deadline:
+                    pending.pop(future)
+                    future.cancel()
+                    last_error = TimeoutError(f"{provider} did not respond within {timeout_for(provider):.0f}s")
+    finally:
+        for future in pending:
+            future.cancel()
+
+    raise NoValidResponse(last_error, last_result)
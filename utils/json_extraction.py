@@ -0,0 +1,278 @@
+"""
+Tolerant JSON Extraction for Career Atlas
+
+Pulls the JSON answer out of an LLM completion even when the model wrapped it
+in markdown fences, surrounded it with prose, left trailing commas or ran out
+of tokens mid-value, then checks it against a small per-task schema. Outcomes
+are counted per provider and model so the parse-failure rate is visible.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no usable JSON value can be recovered from a completion"""
+
+
+class ParsedCompletion(NamedTuple):
+    """A raw completion with the value extracted from it"""
+    content: Optional[str]
+    value: Any
+    valid: bool
+    truncated: bool = False
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the completion may be replayed from the cache (valid and not cut off)"""
+        return self.valid and not self.truncated
+
+
+def _scan(text: str, start: int) -> Tuple[int, List[str], bool]:
+    """
+    Walk a JSON value from its opening bracket
+
+    Returns:
+        Tuple of (end index, brackets still open, whether the scan stopped
+        inside a string). The end index is exclusive; brackets is empty when
+        the value closed normally.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in '}]':
+            if stack and _CLOSERS[stack[-1]] == char:
+                stack.pop()
+            if not stack:
+                return index + 1, [], False
+    return len(text), stack, in_string
+
+
+def _repair_truncated(fragment: str, max_attempts: int = 50) -> Tuple[bool, Any]:
+    """
+    Recover a value that was cut off mid-output
+
+    Only the outer value's complete members are kept: the member that was
+    being written when the output stopped (a half-written item or string)
+    is dropped, backing off to earlier members until the remainder parses.
+    """
+    boundaries = []
+    depth = 0
+    in_string = False
+    escaped = False
+    for index, char in enumerate(fragment):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 1:
+                boundaries.append(index + 1)
+        elif char == ',' and depth == 1:
+            boundaries.append(index)
+
+    closer = _CLOSERS[fragment[0]]
+    for boundary in reversed(boundaries[-max_attempts:]):
+        head = fragment[:boundary].rstrip().rstrip(',')
+        ok, value = _loads(_TRAILING_COMMA.sub(r'\1', head + closer))
+        if ok:
+            return ok, value
+    return False, None
+
+
+def _loads(candidate: str) -> Tuple[bool, Any]:
+    try:
+        return True, json.loads(candidate)
+    except (TypeError, ValueError):
+        return False, None
+
+
+def extract_json(text: Optional[str],
+                 schema: Optional[Dict[str, Any]] = None,
+                 max_starts: int = 20) -> Tuple[Any, bool, bool]:
+    """
+    Recover the outermost JSON value from a completion
+
+    Fenced blocks are tried first, then the whole text; within each, every
+    opening bracket is tried in order until one yields a value that fits the
+    schema (normalized by conform()), so a stray "[1]" in the prose does not
+    hide the real answer after it.
+
+    Returns:
+        Tuple of (value, repaired, truncated) where repaired says whether
+        fences, prose, trailing commas or truncation had to be dealt with and
+        truncated whether the value was cut off (and lost members)
+
+    Raises:
+        JSONExtractionError: If nothing parseable fits the schema
+    """
+    if not text or not text.strip():
+        raise JSONExtractionError("Empty completion")
+
+    mismatch = None
+    ok, value = _loads(text)
+    if ok:
+        try:
+            return conform(value, schema), False, False
+        except JSONExtractionError as e:
+            mismatch = e
+
+    sources = [match.group(1) for match in _FENCE.finditer(text)] + [text]
+    for source in sources:
+        starts = [match.start() for match in re.finditer(r'[{\[]', source)][:max_starts]
+        for start in starts:
+            end, stack, _ = _scan(source, start)
+            fragment = source[start:end]
+
+            ok, value = _loads(fragment)
+            if not ok and not stack:
+                ok, value = _loads(_TRAILING_COMMA.sub(r'\1', fragment))
+            truncated = not ok and bool(stack)
+            if truncated:
+                ok, value = _repair_truncated(fragment)
+            if ok:
+                try:
+                    return conform(value, schema), True, truncated
+                except JSONExtractionError as e:
+                    mismatch = e
+            if truncated:
+                # Later starts are nested in this cut-off value; their
+                # members would be just as partial
+                break
+
+    raise mismatch or JSONExtractionError("No JSON value found in completion")
+
+
+def conform(value: Any, schema: Optional[Dict[str, Any]]) -> Any:
+    """
+    Check a parsed value against a task schema, normalizing near misses
+
+    Schemas are plain dicts:
+        {"type": "array", "item_keys": [...]}: a list of objects that each
+            have item_keys. Items missing keys are dropped; an object that
+            wraps the list (e.g. {"careers": [...]}) or a single bare item is
+            accepted.
+        {"type": "object", "any_of": [...]}: an object with at least one of
+            the listed keys.
+
+    Raises:
+        JSONExtractionError: If the value does not fit the schema
+    """
+    if not schema:
+        return value
+
+    if schema.get('type') == 'array':
+        item_keys = schema.get('item_keys', [])
+        if isinstance(value, dict):
+            wrapped = [v for v in value.values() if isinstance(v, list)]
+            if wrapped:
+                value = wrapped[0]
+            elif all(key in value for key in item_keys):
+                value = [value]
+        if not isinstance(value, list):
+            raise JSONExtractionError("Expected a JSON array")
+        items = [item for item in value
+                 if isinstance(item, dict) and all(key in item for key in item_keys)]
+        if not items:
+            raise JSONExtractionError(f"No array items with keys {item_keys}")
+        return items
+
+    if schema.get('type') == 'object':
+        if not isinstance(value, dict):
+            raise JSONExtractionError("Expected a JSON object")
+        any_of = schema.get('any_of', [])
+        if any_of and not any(key in value for key in any_of):
+            raise JSONExtractionError(f"JSON object has none of {any_of}")
+        return value
+
+    return value
+
+
+class ParseStats:
+    """Counts clean, repaired and failed parses per provider and model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    def record(self, provider: str, model: str, outcome: str) -> None:
+        """Record one parse outcome: 'clean', 'repaired' or 'failed'"""
+        with self._lock:
+            counts = self._counts.setdefault((provider, model), {'clean': 0, 'repaired': 0, 'failed': 0})
+            counts[outcome] += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get parse counts and failure rates for dashboards"""
+        with self._lock:
+            items = [(key, dict(counts)) for key, counts in self._counts.items()]
+        rows = []
+        for (provider, model), counts in sorted(items):
+            total = sum(counts.values())
+            rows.append({
+                'provider': provider,
+                'model': model,
+                'total': total,
+                **counts,
+                'failure_rate': counts['failed'] / total if total else 0.0
+            })
+        return rows
+
+
+_parse_stats = ParseStats()
+
+
+def get_parse_stats() -> ParseStats:
+    """Get the process-wide parse statistics"""
+    return _parse_stats
+
+
+def parse_completion(content: Optional[str],
+                     schema: Optional[Dict[str, Any]],
+                     provider: str,
+                     model: str,
+                     record: bool = True) -> ParsedCompletion:
+    """
+    Extract and validate a completion
+
+    The outcome is counted for provider and model when record is set; callers
+    re-parsing a cached completion pass record=False so replays don't skew
+    the parse-failure rate.
+    """
+    try:
+        value, repaired, truncated = extract_json(content, schema)
+    except JSONExtractionError:
+        if record:
+            _parse_stats.record(provider, model, 'failed')
+        return ParsedCompletion(content, None, False)
+    if record:
+        _parse_stats.record(provider, model, 'repaired' if repaired else 'clean')
+    return ParsedCompletion(content, value, True, truncated)
@@ -0,0 +1,367 @@
+"""
+LLM Response Cache for Career Atlas
+
+Disk-backed (SQLite) cache of raw provider completions. The database lives on
+local disk and runs in WAL mode, so every Streamlit session and worker process
+on the host shares the same entries and hit/miss counters. A lease table lets
+one process compute a missing entry while the others wait for it.
+
+Lookups only read: hit/miss counts and last-access times are buffered in
+memory and written in one transaction every few seconds (or on the next
+store), so cache hits never queue behind other writers.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Buffered lookup bookkeeping is written at least this often
+COUNTER_FLUSH_SECONDS = 5.0
+COUNTER_FLUSH_LOOKUPS = 100
+
+
+class LLMResponseCache:
+    """SQLite-backed cache of LLM completions with TTL and size-bounded eviction"""
+
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 ttl_seconds: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.db_path = db_path or os.getenv(
+            'LLM_CACHE_PATH', os.path.join('data', 'cache', 'llm_cache.sqlite3'))
+        self.ttl_seconds = int(ttl_seconds if ttl_seconds is not None
+                               else os.getenv('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+        self.max_entries = int(max_entries if max_entries is not None
+                               else os.getenv('LLM_CACHE_MAX_ENTRIES', 5000))
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._pending_counts: Dict[str, int] = {}
+        self._pending_touches: Dict[str, list] = {}
+        self._last_flush = time.monotonic()
+        self._ensure_schema()
+
+    @staticmethod
+    def make_key(provider: str,
+                 model: str,
+                 temperature: Optional[float],
+                 system_prompt: Optional[str],
+                 prompt: str,
+                 max_tokens: Optional[int] = None,
+                 endpoint: Optional[str] = None) -> str:
+        """
+        Fingerprint a completion request
+
+        endpoint is set for non-default servers (the stand-in), so their
+        answers never share keys with the real provider's.
+        """
+        fields = [provider, model, temperature, system_prompt, prompt, max_tokens]
+        if endpoint:
+            fields.append(endpoint)
+        payload = json.dumps(
+            fields,
+            ensure_ascii=False,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection to the cache database"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self) -> None:
+        """Create cache tables if they don't exist"""
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_accessed ON responses(last_accessed);
+            CREATE INDEX IF NOT EXISTS idx_responses_expires_at ON responses(expires_at);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        """Increment a shared counter"""
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached completion, or None on a miss"""
+        now = time.time()
+        try:
+            row = self._connect().execute(
+                "SELECT response FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+
+        with self._pending_lock:
+            if row is None:
+                self._pending_counts['misses'] = self._pending_counts.get('misses', 0) + 1
+            else:
+                self._pending_counts['hits'] = self._pending_counts.get('hits', 0) + 1
+                touch = self._pending_touches.setdefault(key, [now, 0])
+                touch[0] = now
+                touch[1] += 1
+        self._flush_pending()
+        return row[0] if row else None
+
+    def _flush_pending(self, force: bool = False) -> None:
+        """Write buffered hit/miss counts and access times, best-effort"""
+        with self._pending_lock:
+            lookups = self._pending_counts.get('hits', 0) + self._pending_counts.get('misses', 0)
+            due = (lookups >= COUNTER_FLUSH_LOOKUPS
+                   or time.monotonic() - self._last_flush >= COUNTER_FLUSH_SECONDS)
+            if not (self._pending_counts and (force or due)):
+                return
+            counts, self._pending_counts = self._pending_counts, {}
+            touches, self._pending_touches = self._pending_touches, {}
+            self._last_flush = time.monotonic()
+
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "UPDATE responses SET last_accessed = MAX(last_accessed, ?), hits = hits + ? WHERE key = ?",
+                    [(accessed, hits, key) for key, (accessed, hits) in touches.items()]
+                )
+                for name, amount in counts.items():
+                    self._bump(conn, name, amount)
+        except sqlite3.Error:
+            # Counters are only metrics; dropping a batch is fine
+            pass
+
+    def _peek(self, key: str) -> Optional[str]:
+        """Get a cached completion without touching hit/miss counters"""
+        try:
+            row = self._connect().execute(
+                "SELECT response FROM responses WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+
+    @staticmethod
+    def _owner() -> str:
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def _acquire_lease(self, key: str, owner: str, lease_seconds: float) -> bool:
+        """Try to become the one process computing key"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+            return conn.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + lease_seconds)
+            ).rowcount == 1
+        except sqlite3.Error:
+            # Without a working lock, compute locally rather than wait
+            return True
+
+    def _hold_lease(self, key: str, owner: str, lease_seconds: float, done: threading.Event) -> None:
+        """Keep extending a lease until done is set, however long compute takes"""
+        while not done.wait(lease_seconds / 3):
+            try:
+                self._connect().execute(
+                    "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ?",
+                    (time.time() + lease_seconds, key, owner)
+                )
+            except sqlite3.Error:
+                pass
+
+    def _release_lease(self, key: str, owner: str) -> None:
+        try:
+            self._connect().execute(
+                "DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner)
+            )
+        except sqlite3.Error:
+            pass
+
+    def compute_once(self,
+                     key: str,
+                     compute: Callable[[], str],
+                     provider: str = None,
+                     model: str = None,
+                     lease_seconds: float = 30.0,
+                     poll_interval: float = 0.2,
+                     is_valid: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Compute and cache a missing entry, at most once across processes
+
+        The caller holding the lease runs compute and renews the lease until
+        it returns, so a slow call (rate-limit queueing, retries after a 429)
+        never lets a second process start the same request. Other processes
+        poll until the entry appears or the lease is released or lapses
+        without one (the holder failed or died); then one of them takes over.
+        When is_valid is given, only completions passing it are stored, and a
+        stored entry failing it is evicted and computed again.
+        """
+        owner = self._owner()
+        waited = False
+        while True:
+            cached = self._peek(key)
+            if cached is not None and is_valid is not None and not is_valid(cached):
+                self.delete(key)
+                cached = None
+            if cached is not None:
+                if waited:
+                    try:
+                        self._bump(self._connect(), 'coalesced')
+                    except sqlite3.Error:
+                        pass
+                return cached
+
+            if self._acquire_lease(key, owner, lease_seconds):
+                done = threading.Event()
+                threading.Thread(target=self._hold_lease, args=(key, owner, lease_seconds, done),
+                                 name="llm-cache-lease", daemon=True).start()
+                try:
+                    content = compute()
+                    if is_valid is None or is_valid(content):
+                        self.set(key, content, provider=provider, model=model)
+                    return content
+                finally:
+                    done.set()
+                    self._release_lease(key, owner)
+
+            waited = True
+            time.sleep(poll_interval)
+
+    def set(self, key: str, response: str, provider: str = None, model: str = None) -> None:
+        """Store a completion and evict entries beyond the size bound"""
+        if response is None:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, provider, model, response, created_at, expires_at, last_accessed, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, provider, model, response, now, now + self.ttl_seconds, now)
+            )
+            self._bump(conn, 'stores')
+            self._evict(conn, now)
+        except sqlite3.Error:
+            pass
+        self._flush_pending(force=True)
+
+    def delete(self, key: str) -> None:
+        """Remove one cached completion"""
+        try:
+            conn = self._connect()
+            if conn.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount:
+                self._bump(conn, 'evictions')
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones over max_entries"""
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count <= self.max_entries:
+            return
+
+        evicted = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        overflow = count - evicted - self.max_entries
+        if overflow > 0:
+            evicted += conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+        if evicted:
+            self._bump(conn, 'evictions', evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate metrics"""
+        self._flush_pending(force=True)
+        try:
+            conn = self._connect()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = conn.execute(
+                "SELECT COUNT(*) FROM responses WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            counters, entries = {}, 0
+
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': hits,
+            'misses': misses,
+            'stores': counters.get('stores', 0),
+            'evictions': counters.get('evictions', 0),
+            'coalesced': counters.get('coalesced', 0),
+            'hit_rate': (hits / lookups) if lookups else 0.0,
+            'size_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        }
+
+    def clear(self) -> None:
+        """Remove all cached completions and reset counters"""
+        with self._pending_lock:
+            self._pending_counts, self._pending_touches = {}, {}
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM counters")
+            conn.execute("DELETE FROM leases")
+        except sqlite3.Error:
+            pass
+
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the process-wide response cache, or None when caching is disabled"""
+    global _cache_instance
+    if os.getenv('LLM_CACHE_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                try:
+                    _cache_instance = LLMResponseCache()
+                except sqlite3.Error:
+                    return None
+    return _cache_instance
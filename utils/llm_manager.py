@@ -1,95 +1,81 @@
 import os
-import openai
-import anthropic
-import google.generativeai as genai
 from dotenv import load_dotenv
 import streamlit as st
-import json
+from .career_retrieval import (candidate_count, create_rerank_prompt, get_career_retriever, merge_ranked,
+                               retrieval_enabled)
+from .hedging import hedging_enabled
+from .llm_router import create_career_prompt, get_llm_router, normalize_recommendations, parse_text_response
+from .profile_buckets import get_bucket_step, quantize_scores
+from .rate_limiter import INTERACTIVE
 
 load_dotenv()
 
 class LLMManager:
-    def __init__(self):
-        self.openai_api_key = os.getenv('OPENAI_API_KEY')
-        self.anthropic_api_key = os.getenv('ANTHROPIC_API_KEY')
-        self.google_api_key = os.getenv('GOOGLE_API_KEY')
-        
-        # Initialize clients
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
+    def __init__(self, bucket_step=None, hedging=None, priority=INTERACTIVE, retrieval=None):
+        """
+        Set up generation on the shared provider router. bucket_step
+        quantizes RIASEC scores before prompts are built (defaults to LLM_PROFILE_BUCKET_STEP; 0 disables).
+        hedging races providers on slow responses (defaults to LLM_HEDGING).
+        priority orders provider calls in the rate limiter queue (BATCH for jobs,
+        or a JobPriority that can be raised while they wait).
+        retrieval re-ranks roles from the jobskills corpus instead of generating
+        careers freely (defaults to LLM_RECOMMENDATION_MODE=retrieval).
+        """
+        # Shared provider router (clients, cache, limits and fallback policy)
+        self.router = get_llm_router()
+        self.bucket_step = get_bucket_step() if bucket_step is None else bucket_step
+        self.hedging = hedging_enabled() if hedging is None else hedging
+        self.priority = priority
+        self.retrieval = retrieval_enabled() if retrieval is None else retrieval
+    
+    def generate_career_recommendations(self, scores, additional_info, skills=None):
+        """Generate career recommendations based on RIASEC scores (skills steer retrieved roles)"""
+        scores = quantize_scores(scores, self.bucket_step)
         
-        if self.anthropic_api_key:
-            self.anthropic_client = anthropic.Anthropic(api_key=self.anthropic_api_key)
+        if self.retrieval:
+            recommendations = self._generate_grounded_recommendations(scores, additional_info, skills=skills)
+            if recommendations is not None:
+                return recommendations
         
-        if self.google_api_key:
-            genai.configure(api_key=self.google_api_key)
-    
-    def generate_career_recommendations(self, scores, additional_info):
-        """Generate career recommendations based on RIASEC scores"""
-        # Create prompt
-        prompt = self._create_career_prompt(scores, additional_info)
+        # Same prompt as AIManager, so either page can serve the other's cache hits
+        prompt = create_career_prompt(scores, additional_info, 5)
         
         # Try different LLMs in order of preference
-        try:
-            if self.openai_api_key:
-                return self._get_openai_recommendations(prompt)
-            elif self.anthropic_api_key:
-                return self._get_anthropic_recommendations(prompt)
-            elif self.google_api_key:
-                return self._get_gemini_recommendations(prompt)
-            else:
-                return self._get_fallback_recommendations(scores)
-        except Exception as e:
-            st.error(f"Error generating recommendations: {str(e)}")
-            return self._get_fallback_recommendations(scores)
+        return normalize_recommendations(self._generate(
+            "recommendations",
+            prompt,
+            fallback=lambda: self._get_fallback_recommendations(scores),
+            parse_fallback=lambda text: parse_text_response(text) or self._get_fallback_recommendations(scores),
+            error_label="generating recommendations"
+        ))
+    
+    def _generate_grounded_recommendations(self, scores, additional_info, count=5, skills=None):
+        """Have the model re-rank job roles retrieved from the jobskills corpus (None without a corpus)"""
+        retriever = get_career_retriever()
+        if retriever is None:
+            return None
+        
+        candidates = retriever.retrieve(scores, additional_info, limit=max(candidate_count(), count), skills=skills)
+        prompt = create_rerank_prompt(scores, additional_info, candidates, count)
+        ranked = self._generate(
+            "rerank_recommendations",
+            prompt,
+            fallback=lambda: [],
+            error_label="ranking career matches"
+        )
+        return merge_ranked(candidates, ranked, count)
     
     def generate_development_plan(self, scores, careers, additional_info):
         """Generate a personalized development plan"""
+        scores = quantize_scores(scores, self.bucket_step)
         prompt = self._create_development_prompt(scores, careers, additional_info)
         
-        try:
-            if self.openai_api_key:
-                return self._get_openai_development_plan(prompt)
-            elif self.anthropic_api_key:
-                return self._get_anthropic_development_plan(prompt)
-            elif self.google_api_key:
-                return self._get_gemini_development_plan(prompt)
-            else:
-                return self._get_fallback_development_plan(careers)
-        except Exception as e:
-            st.error(f"Error generating development plan: {str(e)}")
-            return self._get_fallback_development_plan(careers)
-    
-    def _create_career_prompt(self, scores, additional_info):
-        """Create prompt for career recommendations"""
-        sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        top_types = sorted_scores[:3]
-        
-        prompt = f"""Based on the following RIASEC assessment results, provide 5 specific career recommendations:
-
-RIASEC Scores:
-{json.dumps(scores, indent=2)}
-
-Top 3 Types: {', '.join([f"{t[0]} ({t[1]:.1f})" for t in top_types])}
-
-Additional Information:
-- Education: {additional_info.get('education', 'Not specified')}
-- Experience: {additional_info.get('experience', 0)} years
-- Interests: {additional_info.get('interests', 'Not specified')}
-- Goals: {additional_info.get('goals', 'Not specified')}
-
-For each career recommendation, provide:
-1. Job title
-2. Brief description (2-3 sentences)
-3. Why it matches their profile
-4. Required skills (top 5)
-5. Match score (0-100)
-6. Typical salary range
-7. Growth outlook
-
-Format the response as a JSON array of career objects."""
-        
-        return prompt
+        return self._generate(
+            "action_plan",
+            prompt,
+            fallback=lambda: self._get_fallback_development_plan(careers),
+            error_label="generating development plan"
+        )
     
     def _create_development_prompt(self, scores, careers, additional_info):
         """Create prompt for development plan"""
@@ -111,49 +97,17 @@ Format as JSON with keys: short_term_goals, skills_to_develop, resources, action
         
         return prompt
     
-    def _get_openai_recommendations(self, prompt):
-        """Get recommendations using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a career counselor expert in RIASEC assessments."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1500
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except:
-            return self._parse_text_response(content)
-    
-    def _get_anthropic_recommendations(self, prompt):
-        """Get recommendations using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1500,
-            temperature=0.7,
-            system="You are a career counselor expert in RIASEC assessments.",
-            messages=[{"role": "user", "content": prompt}]
+    def _generate(self, task, prompt, fallback, error_label, parse_fallback=None):
+        """Get a JSON answer for a task through the shared provider router"""
+        return self.router.generate(
+            task,
+            prompt,
+            fallback=fallback,
+            error_label=error_label,
+            parse_fallback=parse_fallback,
+            hedging=self.hedging,
+            priority=self.priority
         )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except:
-            return self._parse_text_response(content)
-    
-    def _get_gemini_recommendations(self, prompt):
-        """Get recommendations using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except:
-            return self._parse_text_response(response.text)
     
     def _get_fallback_recommendations(self, scores):
         """Provide fallback recommendations based on RIASEC scores"""
@@ -243,69 +197,3 @@ Format as JSON with keys: short_term_goals, skills_to_develop, resources, action
                 "Track progress weekly"
             ]
         }
-    
-    def _parse_text_response(self, text):
-        """Parse text response into structured format"""
-        # Basic parsing logic - in production, this would be more sophisticated
-        careers = []
-        lines = text.split('\n')
-        current_career = {}
-        
-        for line in lines:
-            if line.strip():
-                if "title" in line.lower() or "job" in line.lower():
-                    if current_career:
-                        careers.append(current_career)
-                    current_career = {"title": line.strip()}
-                elif current_career:
-                    # Add to description
-                    current_career["description"] = current_career.get("description", "") + " " + line.strip()
-        
-        if current_career:
-            careers.append(current_career)
-        
-        return careers[:5] if careers else self._get_fallback_recommendations({})
-    
-    def _get_openai_development_plan(self, prompt):
-        """Get development plan using OpenAI"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a career development expert."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1000
-        )
-        
-        content = response.choices[0].message.content
-        try:
-            return json.loads(content)
-        except:
-            return self._get_fallback_development_plan([])
-    
-    def _get_anthropic_development_plan(self, prompt):
-        """Get development plan using Anthropic"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1000,
-            temperature=0.7,
-            system="You are a career development expert.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        content = response.content[0].text
-        try:
-            return json.loads(content)
-        except:
-            return self._get_fallback_development_plan([])
-    
-    def _get_gemini_development_plan(self, prompt):
-        """Get development plan using Google Gemini"""
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except:
-            return self._get_fallback_development_plan([])
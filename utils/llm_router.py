@@ -0,0 +1,427 @@
+"""
+LLM Provider Router for Career Atlas
+
+The one provider-routing engine behind AIManager and LLMManager. It owns the
+provider keys and pooled clients, the task catalogue (system prompts, output
+budgets and JSON schemas), the response cache, request coalescing, rate
+limiting, circuit breaking, hedging and the fallback policy. Both managers
+only build prompts and fallbacks, so the same request made from any page
+reaches the same cache entry.
+"""
+
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from .hedging import NoValidResponse, hedging_enabled, provider_timeout, run_hedged
+from .json_extraction import ParsedCompletion, parse_completion
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .prompt_budget import compact_json, compact_scores, record_usage
+from .provider_clients import get_client_registry, provider_api_key, standin_url
+from .provider_health import ProviderUnavailable, get_provider_health
+from .rate_limiter import (INTERACTIVE, RateLimited, estimate_request_tokens, get_scheduler,
+                           is_rate_limit_error, retry_after_seconds)
+from .single_flight import get_single_flight
+
+# Placeholder values shipped in .env.example
+PLACEHOLDER_KEYS = {
+    "OpenAI": "your_openai_api_key_here",
+    "Anthropic": "your_anthropic_api_key_here",
+    "Google": "your_google_api_key_here"
+}
+
+# Model used for each provider
+PROVIDER_MODELS = {
+    "OpenAI": "gpt-3.5-turbo",
+    "Anthropic": "claude-3-sonnet-20240229",
+    "Google": "gemini-pro"
+}
+
+# System prompt, output budget and expected JSON shape for each generation task
+TASK_SETTINGS = {
+    "recommendations": {
+        "system": "You are an expert career counselor specializing in RIASEC assessments and career guidance.",
+        "max_tokens": 2000,
+        "schema": {"type": "array", "item_keys": ["title"]}
+    },
+    "rerank_recommendations": {
+        "system": "You are a career counselor expert in RIASEC assessments. You rank real job roles from a given list and never invent new ones.",
+        "max_tokens": 700,
+        "schema": {"type": "array", "item_keys": ["id"]}
+    },
+    "coaching_questions": {
+        "system": "You are an expert career coach specializing in RIASEC-based coaching.",
+        "max_tokens": 2000,
+        "schema": {"type": "array", "item_keys": ["question"]}
+    },
+    "manager_questions": {
+        "system": "You are a management coach helping managers have effective career conversations.",
+        "max_tokens": 2000,
+        "schema": {"type": "array", "item_keys": ["question"]}
+    },
+    "team_insights": {
+        "system": "You are an organizational psychologist specializing in team dynamics and RIASEC profiles.",
+        "max_tokens": 2000,
+        "schema": {"type": "object", "any_of": ["composition_summary", "team_strengths", "potential_gaps"]}
+    },
+    "development_plan": {
+        "system": "You are a career development expert creating actionable development plans.",
+        "max_tokens": 2000,
+        "schema": {"type": "object", "any_of": ["short_term_goals", "medium_term_goals", "long_term_goals", "skills_to_develop"]}
+    },
+    "action_plan": {
+        "system": "You are a career development expert.",
+        "max_tokens": 1000,
+        "schema": {"type": "object", "any_of": ["short_term_goals", "skills_to_develop", "resources", "action_steps"]}
+    },
+    "interview_questions": {
+        "system": "You are an expert interviewer and career coach.",
+        "max_tokens": 1500,
+        "schema": {"type": "array", "item_keys": ["question"]}
+    },
+    "skills_analysis": {
+        "system": "You are a skills assessment and career transition expert.",
+        "max_tokens": 1500,
+        "schema": {"type": "object", "any_of": ["required_skills", "skills_gap", "learning_priorities"]}
+    }
+}
+
+
+def create_career_prompt(riasec_scores: Dict[str, float],
+                         additional_info: Dict[str, Any],
+                         num_recommendations: int = 5) -> str:
+    """Create the career recommendations prompt shared by every page"""
+    sorted_scores = sorted(riasec_scores.items(), key=lambda x: x[1], reverse=True)
+    top_types = sorted_scores[:3]
+
+    return f"""As a career counselor, analyze these RIASEC assessment results and provide {num_recommendations} specific career recommendations.
+
+RIASEC Scores:
+{compact_json(compact_scores(riasec_scores))}
+
+Top 3 Types: {', '.join([f"{t[0]} ({t[1]:.1f})" for t in top_types])}
+
+Additional Information:
+- Education Level: {additional_info.get('education', 'Not specified')}
+- Years of Experience: {additional_info.get('experience', 0)}
+- Interests: {additional_info.get('interests', 'Not specified')}
+- Career Goals: {additional_info.get('goals', 'Not specified')}
+- Preferred Work Environment: {additional_info.get('work_environment', 'Not specified')}
+- Salary Expectations: {additional_info.get('salary_expectations', 'Not specified')}
+
+For each career recommendation, provide:
+1. Job title
+2. Brief description (2-3 sentences)
+3. Why it matches their RIASEC profile
+4. Required skills (top 5)
+5. Match score (0-100)
+6. Typical education requirements
+7. Salary range (entry to senior level)
+8. Growth outlook (next 5-10 years)
+9. Day-to-day responsibilities
+
+Return the response as a JSON array with the following structure:
+[
+  {{
+    "title": "Job Title",
+    "description": "Brief description",
+    "match_reason": "Why it matches their profile",
+    "required_skills": ["skill1", "skill2", ...],
+    "match_score": 85,
+    "education": "Typical education requirements",
+    "salary_range": "Entry to senior level range",
+    "growth_outlook": "Growth prospects",
+    "daily_tasks": ["task1", "task2", ...]
+  }}
+]"""
+
+
+def normalize_recommendations(recommendations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Give every recommendation both the 'skills' and 'required_skills' keys pages read"""
+    for recommendation in recommendations:
+        if isinstance(recommendation, dict):
+            skills = recommendation.get('skills') or recommendation.get('required_skills') or []
+            recommendation.setdefault('skills', skills)
+            recommendation.setdefault('required_skills', skills)
+    return recommendations
+
+
+def parse_text_response(text: Optional[str], limit: int = 5) -> List[Dict[str, Any]]:
+    """Salvage career titles and descriptions from a completion without JSON"""
+    careers = []
+    current_career = {}
+
+    for line in (text or '').split('\n'):
+        if line.strip():
+            if "title" in line.lower() or "job" in line.lower():
+                if current_career:
+                    careers.append(current_career)
+                current_career = {"title": line.strip()}
+            elif current_career:
+                current_career["description"] = current_career.get("description", "") + " " + line.strip()
+
+    if current_career:
+        careers.append(current_career)
+
+    return careers[:limit]
+
+
+class LLMRouter:
+    """Routes generation tasks to the configured providers"""
+
+    def __init__(self):
+        self.api_keys = {}
+        for provider, placeholder in PLACEHOLDER_KEYS.items():
+            api_key = provider_api_key(provider)
+            if api_key and api_key != placeholder:
+                self.api_keys[provider] = api_key
+
+        # Get pooled clients from the process-wide registry
+        self.clients = get_client_registry()
+
+        if "OpenAI" in self.api_keys:
+            self.openai_client = self.clients.openai(self.api_keys["OpenAI"])
+
+        if "Anthropic" in self.api_keys:
+            self.anthropic_client = self.clients.anthropic(self.api_keys["Anthropic"])
+
+        if "Google" in self.api_keys:
+            self.clients.configure_google(self.api_keys["Google"])
+
+        # Shared on-disk response cache (None when disabled)
+        self.cache = get_llm_cache()
+
+    def available_providers(self) -> List[str]:
+        """Get the providers with usable API keys, in order of preference"""
+        return [provider for provider in PROVIDER_MODELS if provider in self.api_keys]
+
+    def generate(self,
+                 task: str,
+                 prompt: str,
+                 fallback: Callable[[], Any],
+                 error_label: str,
+                 parse_fallback: Optional[Callable[[str], Any]] = None,
+                 hedging: Optional[bool] = None,
+                 priority: int = INTERACTIVE) -> Any:
+        """
+        Get a JSON answer for a task from the available providers
+
+        Providers are tried in order of preference, or raced when hedging is
+        enabled; the first completion holding JSON that fits the task schema
+        wins (fences, surrounding prose and truncation are tolerated). If none
+        does, the last completion's text goes to parse_fallback, otherwise the
+        static fallback is returned.
+
+        Args:
+            task: Key into TASK_SETTINGS
+            prompt: User prompt for the task
+            fallback: Builds the static answer used when no provider answers
+            error_label: Shown in the error message ("Error <label>: ...")
+            parse_fallback: Salvages an answer from a completion without JSON
+            hedging: Race providers on slow responses (defaults to LLM_HEDGING)
+            priority: Queue priority for the rate limiter (BATCH for jobs)
+        """
+        attempts = self._provider_attempts(task, prompt, priority)
+        if not attempts:
+            return fallback()
+
+        try:
+            _, parsed = run_hedged(
+                attempts,
+                is_valid=lambda parsed: parsed.valid,
+                hedged=hedging_enabled() if hedging is None else hedging
+            )
+            return parsed.value
+        except NoValidResponse as e:
+            if e.last_result is not None and parse_fallback is not None:
+                return parse_fallback(e.last_result.content)
+            if isinstance(e.last_error, RateLimited):
+                st.warning("AI services are busy right now, so standard suggestions are shown instead.")
+            elif e.last_error is not None:
+                st.error(f"Error {error_label}: {str(e.last_error)}")
+            return fallback()
+
+    # Provider dispatch
+    def _provider_attempts(self, task: str, prompt: str, priority: int) -> List[Tuple[str, Callable[[], ParsedCompletion]]]:
+        """Build parsed provider calls for a task in order of preference"""
+        settings = TASK_SETTINGS[task]
+        system_prompt = settings["system"]
+        max_tokens = settings["max_tokens"]
+
+        schema = settings.get("schema")
+
+        calls = {
+            "OpenAI": lambda: self._openai_completion(system_prompt, prompt, max_tokens, schema, priority),
+            "Anthropic": lambda: self._anthropic_completion(system_prompt, prompt, max_tokens, schema, priority),
+            "Google": lambda: self._google_completion(prompt, schema, priority)
+        }
+        return [(provider, calls[provider]) for provider in self.available_providers()]
+
+    # Provider completions
+    def _openai_completion(self, system_prompt: str, prompt: str, max_tokens: int, schema: Optional[Dict[str, Any]],
+                           priority: int, temperature: float = 0.7) -> ParsedCompletion:
+        """Get a chat completion from OpenAI"""
+        model = PROVIDER_MODELS["OpenAI"]
+
+        def call():
+            response = self.openai_client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=provider_timeout("OpenAI")
+            )
+            content = response.choices[0].message.content
+            record_usage("OpenAI", model, response, f"{system_prompt}\n{prompt}", content)
+            return content
+
+        return self._cached_completion("OpenAI", model, temperature, system_prompt, prompt, max_tokens,
+                                       schema, priority, call)
+
+    def _anthropic_completion(self, system_prompt: str, prompt: str, max_tokens: int, schema: Optional[Dict[str, Any]],
+                              priority: int, temperature: float = 0.7) -> ParsedCompletion:
+        """Get a message completion from Anthropic"""
+        model = PROVIDER_MODELS["Anthropic"]
+
+        def call():
+            response = self.anthropic_client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system_prompt,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=provider_timeout("Anthropic")
+            )
+            content = response.content[0].text
+            record_usage("Anthropic", model, response, f"{system_prompt}\n{prompt}", content)
+            return content
+
+        return self._cached_completion("Anthropic", model, temperature, system_prompt, prompt, max_tokens,
+                                       schema, priority, call)
+
+    def _google_completion(self, prompt: str, schema: Optional[Dict[str, Any]], priority: int) -> ParsedCompletion:
+        """Get a completion from Google Gemini"""
+        model = PROVIDER_MODELS["Google"]
+
+        def call():
+            response = self.clients.google_model(model).generate_content(prompt)
+            content = response.text
+            record_usage("Google", model, response, prompt, content)
+            return content
+
+        return self._cached_completion("Google", model, None, None, prompt, None, schema, priority, call)
+
+    def _cached_completion(self,
+                           provider: str,
+                           model: str,
+                           temperature: Optional[float],
+                           system_prompt: Optional[str],
+                           prompt: str,
+                           max_tokens: Optional[int],
+                           schema: Optional[Dict[str, Any]],
+                           priority: int,
+                           call: Callable[[], str]) -> ParsedCompletion:
+        """Return a cached or fresh parsed completion, coalescing identical in-flight requests"""
+        key = LLMResponseCache.make_key(provider, model, temperature, system_prompt, prompt, max_tokens,
+                                        endpoint=standin_url())
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                parsed = parse_completion(cached, schema, provider, model, record=False)
+                if parsed.cacheable:
+                    return parsed
+                # Stored before answers were validated; don't keep replaying it
+                self.cache.delete(key)
+
+        tokens = estimate_request_tokens(provider, system_prompt, prompt, max_tokens)
+        parsed = get_single_flight().do(
+            key, lambda: self._fetch_completion(key, provider, model, schema, tokens, priority, call))
+        # Coalesced callers share one result; give each its own value to modify
+        return parsed._replace(value=copy.deepcopy(parsed.value))
+
+    def _fetch_completion(self, key: str, provider: str, model: str, schema: Optional[Dict[str, Any]],
+                          tokens: int, priority: int, call: Callable[[], str]) -> ParsedCompletion:
+        """Call the provider at most once per key across processes, caching only complete answers that fit the schema"""
+        fresh: Dict[str, ParsedCompletion] = {}
+
+        def compute() -> str:
+            fresh['parsed'] = parse_completion(self._call_provider(provider, tokens, priority, call),
+                                               schema, provider, model)
+            return fresh['parsed'].content
+
+        def parsed_for(content: str) -> ParsedCompletion:
+            parsed = fresh.get('parsed')
+            if parsed is not None and parsed.content is content:
+                return parsed
+            # Stored by another process, which counted its own parse
+            return parse_completion(content, schema, provider, model, record=False)
+
+        if self.cache is None:
+            compute()
+            return fresh['parsed']
+
+        content = self.cache.compute_once(
+            key,
+            compute,
+            provider=provider,
+            model=model,
+            lease_seconds=provider_timeout(provider),
+            # Cut-off answers are still shown once but never replayed
+            is_valid=lambda content: parsed_for(content).cacheable
+        )
+        return parsed_for(content)
+
+    def _call_provider(self, provider: str, tokens: int, priority: int, call: Callable[[], str]) -> str:
+        """
+        Call a provider unless its circuit is open, recording latency and errors
+
+        The call waits in the provider's rate limiter queue first. A 429 pauses
+        the provider and the call is queued again until its timeout runs out.
+        """
+        health = get_provider_health(provider)
+        if not health.allow_request():
+            raise ProviderUnavailable(f"{provider} is temporarily unavailable (circuit open)")
+
+        scheduler = get_scheduler(provider)
+        deadline = time.monotonic() + provider_timeout(provider)
+        while True:
+            scheduler.acquire(tokens, priority, timeout=max(deadline - time.monotonic(), 0))
+            started = time.monotonic()
+            try:
+                content = call()
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    scheduler.throttle(retry_after_seconds(e))
+                    continue
+                health.record_failure(e)
+                raise
+            health.record_success(time.monotonic() - started)
+            return content
+
+
+_router = None
+_router_config = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """
+    Get the process-wide router
+
+    The router is rebuilt when provider keys or the stand-in URL change, so
+    editing .env or switching to the stand-in server takes effect without a
+    restart.
+    """
+    global _router, _router_config
+    config = (standin_url(),) + tuple(provider_api_key(provider) for provider in PROVIDER_MODELS)
+    with _router_lock:
+        if _router is None or _router_config != config:
+            _router = LLMRouter()
+            _router_config = config
+        return _router
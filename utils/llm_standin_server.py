@@ -0,0 +1,417 @@
+"""
+Stand-in LLM Server for Career Atlas
+
+Local HTTP server that answers the OpenAI chat completions and Anthropic
+messages APIs with canned JSON, so the AI paths can be load- and
+latency-tested without API keys or network access. Latency distribution,
+error and 429 rates, truncated answers and streaming are configurable.
+
+Start it, then point the app at it:
+
+    python -m utils.llm_standin_server serve --port 8765 --latency lognormal --median 0.8
+    LLM_STANDIN_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Or drive the managers against it directly:
+
+    python -m utils.llm_standin_server bench --url http://127.0.0.1:8765 --requests 200 --concurrency 20
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from .prompt_budget import count_tokens
+
+# Canned answers per task, picked by phrases in the prompt
+CANNED_PAYLOADS = {
+    'rerank_recommendations': [
+        {"id": i, "match_score": 92 - 4 * i, "match_reason": "Fits your strongest RIASEC interests.",
+         "skills": ["Communication", "Problem Solving", "Planning"]}
+        for i in range(1, 6)
+    ],
+    'recommendations': [
+        {"title": title, "description": f"Stand-in description for {title}.",
+         "match_reason": "Matches your top RIASEC types.", "match_score": score,
+         "skills": ["Analysis", "Communication", "Planning", "Teamwork", "Research"],
+         "salary_range": "$60,000 - $110,000", "growth_outlook": "Good"}
+        for title, score in [("Data Analyst", 90), ("UX Researcher", 86), ("Project Coordinator", 82),
+                             ("Training Specialist", 79), ("Operations Analyst", 75)]
+    ],
+    'coaching_questions': [
+        {"question": f"Stand-in coaching question {i}?", "riasec_relevance": "Speaks to their top type.",
+         "follow_up": "What makes that important to you?", "category": "exploration"}
+        for i in range(1, 9)
+    ],
+    'manager_questions': [
+        {"question": f"Stand-in manager question {i}?", "riasec_rationale": "Works for their type.",
+         "listen_for": "Energy and specifics.", "action_tips": "Agree one next step."}
+        for i in range(1, 9)
+    ],
+    'team_insights': {
+        "composition_summary": {"dominant_types": ["Investigative", "Social"],
+                                "missing_types": ["Realistic"], "balance_assessment": "Well-balanced"},
+        "team_strengths": ["Analysis", "Collaboration"],
+        "potential_gaps": ["Hands-on delivery"],
+        "communication_tips": [{"tip": "Share data early", "rationale": "Investigative types want evidence"}],
+        "project_recommendations": [], "development_priorities": ["Delivery focus"],
+        "conflict_areas": [], "collaboration_strategies": ["Pair analysts with facilitators"]
+    },
+    'development_plan': {
+        "short_term_goals": ["Complete an online course", "Update your CV", "Talk to two practitioners",
+                             "Build a small portfolio project", "Join a professional group"],
+        "skills_to_develop": [{"skill": "Data analysis", "priority": "High"},
+                              {"skill": "Presentation", "priority": "Medium"}],
+        "resources": ["Coursera", "LinkedIn Learning", "Local meetups", "Industry newsletters", "Mentors"],
+        "action_steps": [f"Stand-in action step {i}" for i in range(1, 8)]
+    },
+    'interview_questions': [
+        {"question": f"Stand-in interview question {i}?", "type": "behavioral",
+         "why_asked": "To see how you work.", "key_points": ["Situation", "Action", "Result"],
+         "answer_structure": "STAR"}
+        for i in range(1, 11)
+    ],
+    'skills_analysis': {
+        "required_skills": {"essential": ["Analysis"], "important": ["Communication"], "nice_to_have": ["SQL"]},
+        "skills_gap": ["SQL"], "transferable_skills": ["Communication"],
+        "learning_priorities": [{"skill": "SQL", "priority": 1, "estimated_time": "2 months", "difficulty": "medium"}],
+        "learning_resources": [{"skill": "SQL", "resources": ["Online course"]}]
+    }
+}
+
+# Prompt phrases that identify each task, checked in order
+TASK_MARKERS = [
+    ('rerank_recommendations', 'candidate job roles'),
+    ('team_insights', "team's riasec profiles"),
+    ('manager_questions', 'for a manager to use'),
+    ('coaching_questions', 'coaching questions'),
+    ('interview_questions', 'interview preparation'),
+    ('skills_analysis', 'skills gap'),
+    ('development_plan', 'development plan'),
+    ('recommendations', 'career recommendations'),
+]
+
+
+class StandInConfig:
+    """Behaviour knobs for the stand-in server"""
+
+    def __init__(self,
+                 latency: str = 'lognormal',
+                 median: float = 0.8,
+                 spread: float = 0.5,
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 truncate_rate: float = 0.0,
+                 chunk_delay: float = 0.02,
+                 payload_dir: Optional[str] = None,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.median = median
+        self.spread = spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.truncate_rate = truncate_rate
+        self.chunk_delay = chunk_delay
+        self.payloads = dict(CANNED_PAYLOADS)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        if payload_dir:
+            self._load_payloads(payload_dir)
+
+    def _load_payloads(self, payload_dir: str) -> None:
+        """Override canned answers with <task>.json files"""
+        for task in CANNED_PAYLOADS:
+            path = os.path.join(payload_dir, f"{task}.json")
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    self.payloads[task] = json.load(f)
+
+    def sample_latency(self) -> float:
+        """Draw a response time (seconds) from the configured distribution"""
+        with self._lock:
+            if self.latency == 'fixed':
+                return self.median
+            if self.latency == 'uniform':
+                return self._random.uniform(max(self.median - self.spread, 0), self.median + self.spread)
+            return self._random.lognormvariate(0, self.spread) * self.median
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+
+def detect_task(prompt: str) -> str:
+    """Guess which generation task a prompt belongs to"""
+    lowered = prompt.lower()
+    for task, marker in TASK_MARKERS:
+        if marker in lowered:
+            return task
+    return 'recommendations'
+
+
+def canned_completion(config: StandInConfig, prompt: str) -> Tuple[str, bool]:
+    """Get the answer text for a prompt, and whether it was cut short"""
+    text = json.dumps(config.payloads[detect_task(prompt)])
+    if config.roll(config.truncate_rate):
+        return text[:max(len(text) * 2 // 3, 1)], True
+    return text, False
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves /v1/chat/completions (OpenAI) and /v1/messages (Anthropic)"""
+
+    server_version = 'CareerAtlasStandIn/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def config(self) -> StandInConfig:
+        return self.server.config
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('', '/health'):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        path = self.path.split('?')[0].rstrip('/')
+        if path.endswith('/chat/completions'):
+            api = 'openai'
+            prompt = '\n'.join(str(m.get('content', '')) for m in body.get('messages', []))
+        elif path.endswith('/messages'):
+            api = 'anthropic'
+            prompt = str(body.get('system', '')) + '\n' + '\n'.join(
+                str(m.get('content', '')) for m in body.get('messages', []))
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        time.sleep(self.config.sample_latency())
+
+        if self.config.roll(self.config.rate_limit_rate):
+            self._send_json(429, {"error": {"message": "Rate limit reached (stand-in)", "type": "rate_limit_error"}},
+                            headers={'Retry-After': '1'})
+            return
+        if self.config.roll(self.config.error_rate):
+            self._send_json(500, {"error": {"message": "Internal error (stand-in)", "type": "api_error"}})
+            return
+
+        text, truncated = canned_completion(self.config, prompt)
+        model = body.get('model', 'stand-in')
+        usage = (count_tokens(prompt), count_tokens(text))
+
+        if body.get('stream'):
+            self._stream(api, model, text, truncated, usage)
+        elif api == 'openai':
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "length" if truncated else "stop"}],
+                "usage": {"prompt_tokens": usage[0], "completion_tokens": usage[1],
+                          "total_tokens": usage[0] + usage[1]}
+            })
+        else:
+            self._send_json(200, {
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "max_tokens" if truncated else "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": usage[0], "output_tokens": usage[1]}
+            })
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, api: str, model: str, text: str, truncated: bool, usage: Tuple[int, int]) -> None:
+        """Send the answer as server-sent events in the provider's stream format"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        chunks = [text[i:i + 16] for i in range(0, len(text), 16)]
+        if api == 'openai':
+            stream_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            events = [(None, {"id": stream_id, "object": "chat.completion.chunk", "model": model,
+                              "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+                      for chunk in chunks]
+            events.append((None, {"id": stream_id, "object": "chat.completion.chunk", "model": model,
+                                  "choices": [{"index": 0, "delta": {},
+                                               "finish_reason": "length" if truncated else "stop"}]}))
+            self._write_events(events)
+            self.wfile.write(b"data: [DONE]\n\n")
+        else:
+            message_id = f"msg_{uuid.uuid4().hex[:24]}"
+            events = [
+                ('message_start', {"type": "message_start", "message": {
+                    "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+                    "stop_reason": None, "stop_sequence": None,
+                    "usage": {"input_tokens": usage[0], "output_tokens": 0}}}),
+                ('content_block_start', {"type": "content_block_start", "index": 0,
+                                         "content_block": {"type": "text", "text": ""}}),
+            ]
+            events += [('content_block_delta', {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": chunk}})
+                       for chunk in chunks]
+            events += [
+                ('content_block_stop', {"type": "content_block_stop", "index": 0}),
+                ('message_delta', {"type": "message_delta",
+                                   "delta": {"stop_reason": "max_tokens" if truncated else "end_turn",
+                                             "stop_sequence": None},
+                                   "usage": {"output_tokens": usage[1]}}),
+                ('message_stop', {"type": "message_stop"}),
+            ]
+            self._write_events(events)
+        self.wfile.flush()
+
+    def _write_events(self, events: List[Tuple[Optional[str], Dict[str, Any]]]) -> None:
+        for event, payload in events:
+            if event:
+                self.wfile.write(f"event: {event}\n".encode('utf-8'))
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            time.sleep(self.config.chunk_delay)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded stand-in server carrying its configuration"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: StandInConfig, verbose: bool = False):
+        super().__init__(address, StandInHandler)
+        self.config = config
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(config: Optional[StandInConfig] = None,
+                 host: str = '127.0.0.1',
+                 port: int = 0) -> StandInServer:
+    """Start a stand-in server on a background thread (port 0 picks a free port)"""
+    server = StandInServer((host, port), config or StandInConfig())
+    threading.Thread(target=server.serve_forever, name='llm-standin', daemon=True).start()
+    return server
+
+
+def run_benchmark(url: str, requests: int, concurrency: int, distinct_profiles: int) -> Dict[str, Any]:
+    """Fire concurrent career recommendation requests through LLMManager at a stand-in server"""
+    os.environ['LLM_STANDIN_URL'] = url
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .llm_cache import get_llm_cache
+    from .llm_manager import LLMManager
+    from .profile_buckets import RIASEC_TYPES
+
+    manager = LLMManager()
+    rng = random.Random(0)
+    profiles = [{t: round(rng.uniform(1, 5), 1) for t in RIASEC_TYPES} for _ in range(distinct_profiles)]
+    info = {'education': "Bachelor's Degree", 'experience': 2, 'interests': '', 'goals': ''}
+
+    def one(index: int) -> float:
+        started = time.monotonic()
+        manager.generate_career_recommendations(profiles[index % len(profiles)], info)
+        return time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(one, range(requests)))
+    elapsed = time.monotonic() - started
+
+    def pct(p: float) -> float:
+        return latencies[min(int(round(p / 100 * (len(latencies) - 1))), len(latencies) - 1)]
+
+    cache = get_llm_cache()
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_per_second': round(requests / elapsed, 2) if elapsed else None,
+        'p50_seconds': round(pct(50), 3),
+        'p95_seconds': round(pct(95), 3),
+        'p99_seconds': round(pct(99), 3),
+        'cache': cache.stats() if cache else None
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in OpenAI/Anthropic server for offline testing")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Run the stand-in server')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', choices=['fixed', 'uniform', 'lognormal'], default='lognormal')
+    serve.add_argument('--median', type=float, default=0.8, help='Median response time in seconds')
+    serve.add_argument('--spread', type=float, default=0.5,
+                       help='Lognormal sigma, or +/- seconds for uniform')
+    serve.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 500')
+    serve.add_argument('--rate-limit-rate', type=float, default=0.0, help='Share of requests answered with 429')
+    serve.add_argument('--truncate-rate', type=float, default=0.0, help='Share of answers cut off mid-JSON')
+    serve.add_argument('--chunk-delay', type=float, default=0.02, help='Seconds between streamed chunks')
+    serve.add_argument('--payload-dir', help='Directory of <task>.json files overriding canned answers')
+    serve.add_argument('--seed', type=int)
+    serve.add_argument('--verbose', action='store_true')
+
+    bench = commands.add_parser('bench', help='Load-test LLMManager against a running stand-in server')
+    bench.add_argument('--url', default='http://127.0.0.1:8765')
+    bench.add_argument('--requests', type=int, default=100)
+    bench.add_argument('--concurrency', type=int, default=10)
+    bench.add_argument('--profiles', type=int, default=20, help='Distinct RIASEC profiles to cycle through')
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        config = StandInConfig(
+            latency=args.latency, median=args.median, spread=args.spread, error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate, truncate_rate=args.truncate_rate,
+            chunk_delay=args.chunk_delay, payload_dir=args.payload_dir, seed=args.seed
+        )
+        server = StandInServer((args.host, args.port), config, verbose=args.verbose)
+        print(f"Stand-in LLM server listening on {server.url} (set LLM_STANDIN_URL={server.url})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    else:
+        print(json.dumps(run_benchmark(args.url, args.requests, args.concurrency, args.profiles), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Population Statistics for Career Atlas
+
+Running aggregates over every saved assessment: count, mean and variance
+(Welford's method), min/max and a histogram per RIASEC type, plus the number
+of unique users. They are updated on each save and persisted as a small JSON
+file next to the data, so dashboards read them without rescanning
+assessments. If the file is lost or out of date, rebuild it with:
+
+    python -m utils.population_stats rebuild
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from .file_io import atomic_write_json, file_lock, read_json
+from .profile_buckets import RIASEC_TYPES
+from .storage import StorageBackend, get_storage
+
+HISTOGRAM_MIN = 0.0
+HISTOGRAM_MAX = 5.0
+HISTOGRAM_BIN_WIDTH = 0.5
+
+
+class RunningStats:
+    """Streaming count, mean, variance, min, max and histogram of one score"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.histogram = [0] * int(round((HISTOGRAM_MAX - HISTOGRAM_MIN) / HISTOGRAM_BIN_WIDTH))
+
+    def add(self, value: float) -> None:
+        """Fold one score into the aggregates"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        index = int((value - HISTOGRAM_MIN) // HISTOGRAM_BIN_WIDTH)
+        self.histogram[max(0, min(index, len(self.histogram) - 1))] += 1
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0 with fewer than two scores)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min,
+            'max': self.max,
+            'histogram': self.histogram
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        stats = cls()
+        stats.count = data.get('count', 0)
+        stats.mean = data.get('mean', 0.0)
+        stats.m2 = data.get('m2', 0.0)
+        stats.min = data.get('min')
+        stats.max = data.get('max')
+        if len(data.get('histogram', [])) == len(stats.histogram):
+            stats.histogram = list(data['histogram'])
+        return stats
+
+
+class PopulationStats:
+    """Persisted running aggregates over all assessments"""
+
+    def __init__(self, storage: StorageBackend, path: Optional[str] = None, data_dir: str = 'data'):
+        self.storage = storage
+        self.path = path or os.getenv(
+            'POPULATION_STATS_PATH', os.path.join(data_dir, 'stats', 'population_stats.json'))
+        self._lock = threading.Lock()
+
+    def _empty(self) -> Dict[str, Any]:
+        return {
+            'total_assessments': 0,
+            'unique_users': 0,
+            'categories': {riasec_type: RunningStats() for riasec_type in RIASEC_TYPES}
+        }
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        data = read_json(self.path)
+        if not isinstance(data, dict):
+            return None
+        state = self._empty()
+        state['total_assessments'] = data.get('total_assessments', 0)
+        state['unique_users'] = data.get('unique_users', 0)
+        for riasec_type, stats in data.get('categories', {}).items():
+            state['categories'][riasec_type] = RunningStats.from_dict(stats)
+        return state
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        payload = {
+            'total_assessments': state['total_assessments'],
+            'unique_users': state['unique_users'],
+            'categories': {riasec_type: stats.to_dict() for riasec_type, stats in state['categories'].items()}
+        }
+        atomic_write_json(self.path, payload)
+
+    @staticmethod
+    def _add(state: Dict[str, Any], assessment: Dict[str, Any]) -> None:
+        state['total_assessments'] += 1
+        for riasec_type, score in (assessment.get('scores') or {}).items():
+            if isinstance(score, (int, float)):
+                state['categories'].setdefault(riasec_type, RunningStats()).add(float(score))
+
+    def _state(self) -> Dict[str, Any]:
+        """Load the persisted aggregates, rebuilding them the first time"""
+        state = self._load()
+        if state is None:
+            with file_lock(self.path):
+                state = self._load()
+                if state is None:
+                    state = self._rebuild_state()
+                    self._save(state)
+        return state
+
+    def record_assessment(self, assessment: Dict[str, Any], new_user: bool) -> None:
+        """Fold a newly saved assessment into the aggregates"""
+        with self._lock, file_lock(self.path):
+            state = self._load()
+            if state is None:
+                # A rebuild already counts the assessment that was just saved
+                self._save(self._rebuild_state())
+                return
+            self._add(state, assessment)
+            if new_user:
+                state['unique_users'] += 1
+            self._save(state)
+
+    def _rebuild_state(self) -> Dict[str, Any]:
+        state = self._empty()
+        users = set()
+        for assessment in self.storage.iter_assessments():
+            self._add(state, assessment)
+            users.add(assessment.get('username', 'unknown'))
+        state['unique_users'] = len(users)
+        return state
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Recompute the aggregates from every stored assessment"""
+        with self._lock, file_lock(self.path):
+            state = self._rebuild_state()
+            self._save(state)
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get population statistics for dashboards
+
+        Returns:
+            Dict with total_assessments, unique_users and category_stats
+            (per type: mean, std, min, max, count, histogram)
+        """
+        with self._lock:
+            state = self._state()
+        category_stats = {}
+        for riasec_type, stats in state['categories'].items():
+            if stats.count:
+                category_stats[riasec_type] = {
+                    'mean': stats.mean,
+                    'std': math.sqrt(stats.variance),
+                    'min': stats.min,
+                    'max': stats.max,
+                    'count': stats.count,
+                    'histogram': stats.histogram
+                }
+        return {
+            'total_assessments': state['total_assessments'],
+            'unique_users': state['unique_users'],
+            'category_stats': category_stats
+        }
+
+
+_population_stats: Dict[str, PopulationStats] = {}
+_registry_lock = threading.Lock()
+
+
+def get_population_stats(data_dir: str = 'data') -> PopulationStats:
+    """Get the shared population statistics for a data directory"""
+    with _registry_lock:
+        if data_dir not in _population_stats:
+            _population_stats[data_dir] = PopulationStats(get_storage(data_dir), data_dir=data_dir)
+        return _population_stats[data_dir]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain Career Atlas population statistics")
+    commands = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = commands.add_parser('rebuild', help="Recompute statistics from every stored assessment")
+    rebuild_parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    print(json.dumps(get_population_stats(args.data_dir).rebuild(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+RIASEC Profile Bucketing for Career Atlas
+
+Quantizes raw RIASEC scores so that near-identical profiles produce identical
+AI prompts, and therefore share cached AI responses.
+"""
+
+import os
+from typing import Dict, Optional
+
+RIASEC_TYPES = ['Realistic', 'Investigative', 'Artistic', 'Social', 'Enterprising', 'Conventional']
+
+
+def get_bucket_step() -> float:
+    """Get the configured bucket width (0 disables bucketing)"""
+    try:
+        return max(float(os.getenv('LLM_PROFILE_BUCKET_STEP', '0')), 0.0)
+    except ValueError:
+        return 0.0
+
+
+def quantize_scores(scores: Dict[str, float], step: Optional[float] = None) -> Dict[str, float]:
+    """
+    Round each score to the nearest multiple of step
+
+    Args:
+        scores: RIASEC type to score mapping
+        step: Bucket width; defaults to LLM_PROFILE_BUCKET_STEP
+
+    Returns:
+        Scores with the same keys, quantized (unchanged when step is 0)
+    """
+    if step is None:
+        step = get_bucket_step()
+    if not scores or step <= 0:
+        return scores
+
+    return {
+        riasec_type: round(round(score / step) * step, 2) if isinstance(score, (int, float)) else score
+        for riasec_type, score in scores.items()
+    }
+
+
+def holland_code(scores: Dict[str, float], length: int = 3) -> str:
+    """Get the Holland code (top type initials) for a set of scores"""
+    sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    return ''.join(riasec_type[0] for riasec_type, _ in sorted_scores[:length])
+
+
+def representative_scores(code: str, high: float = 4.5, low: float = 2.5) -> Dict[str, float]:
+    """
+    Build a typical score profile for a Holland code
+
+    The first letter gets the high score, each following letter half a point
+    less, and every other type gets the low score.
+    """
+    scores = {riasec_type: low for riasec_type in RIASEC_TYPES}
+    by_initial = {riasec_type[0]: riasec_type for riasec_type in RIASEC_TYPES}
+    for position, initial in enumerate(code.upper()):
+        if initial in by_initial:
+            scores[by_initial[initial]] = max(high - 0.5 * position, low)
+    return scores
@@ -0,0 +1,180 @@
+"""
+Prompt Budgeting for Career Atlas
+
+Helpers for building compact AI prompts and accounting for their size:
+a local token count approximation per provider, compact serialization of
+RIASEC profiles, team lists fitted to a token budget, and per-call logging
+of prompt and completion tokens.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .profile_buckets import RIASEC_TYPES, holland_code
+from .provider_health import get_provider_health
+
+logger = logging.getLogger(__name__)
+
+# Average characters per BPE token for ordinary English words
+CHARS_PER_TOKEN = {'OpenAI': 4.0, 'Anthropic': 3.5, 'Google': 4.0}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+DEFAULT_TEAM_TOKEN_BUDGET = 1200
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: Optional[str], provider: Optional[str] = None) -> int:
+    """
+    Approximate the number of tokens a provider's tokenizer produces
+
+    Words are split into chunks of the provider's average token length and
+    every punctuation mark counts as one token, which tracks BPE tokenizers
+    closely for English prose and JSON.
+    """
+    if not text:
+        return 0
+    chars_per_token = CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        tokens += math.ceil(len(piece) / chars_per_token) if piece[0].isalnum() or piece[0] == '_' else 1
+    return tokens
+
+
+def compact_json(value: Any) -> str:
+    """Serialize without indentation or spaces after separators"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def compact_scores(scores: Dict[str, Any], digits: int = 1) -> Dict[str, Any]:
+    """Round numeric scores so they serialize short"""
+    return {
+        key: round(value, digits) if isinstance(value, float) else value
+        for key, value in (scores or {}).items()
+    }
+
+
+def _member_scores(profile: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """Find the RIASEC scores in a team member profile"""
+    for key in ('riasec_scores', 'scores', 'riasec'):
+        if isinstance(profile.get(key), dict):
+            return profile[key]
+    if any(riasec_type in profile for riasec_type in RIASEC_TYPES):
+        return {t: profile[t] for t in RIASEC_TYPES if t in profile}
+    return None
+
+
+def _compact_member(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty fields and shorten RIASEC score keys to their initials"""
+    compact = {}
+    for key, value in profile.items():
+        if value in (None, '', [], {}):
+            continue
+        if isinstance(value, dict):
+            value = {
+                (k[0] if k in RIASEC_TYPES else k): v
+                for k, v in compact_scores(value).items()
+            }
+        compact[key] = value
+    return compact
+
+
+def summarize_team(profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate a team's RIASEC profiles into average scores and Holland code counts"""
+    scored = [scores for scores in (_member_scores(p) for p in profiles) if scores]
+    averages = {}
+    for riasec_type in RIASEC_TYPES:
+        values = [s[riasec_type] for s in scored if isinstance(s.get(riasec_type), (int, float))]
+        if values:
+            averages[riasec_type] = round(sum(values) / len(values), 1)
+    codes = Counter(holland_code(s) for s in scored)
+    return {
+        'members': len(profiles),
+        'average_scores': averages,
+        'holland_codes': dict(codes.most_common(10))
+    }
+
+
+def fit_team_profiles(profiles: List[Dict[str, Any]],
+                      budget_tokens: Optional[int] = None,
+                      provider: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Serialize a team for a prompt within a token budget
+
+    The team summary always comes first; individual profiles follow one per
+    line until the budget is used up, so prompt size stops growing with team
+    size once the budget is reached.
+
+    Returns:
+        Tuple of (prompt text, number of members listed individually)
+    """
+    if budget_tokens is None:
+        budget_tokens = int(os.getenv('LLM_TEAM_PROMPT_TOKENS', DEFAULT_TEAM_TOKEN_BUDGET))
+
+    lines = [
+        f"Summary: {compact_json(summarize_team(profiles))}",
+        "Member scores use type initials (R, I, A, S, E, C):"
+    ]
+    used = count_tokens('\n'.join(lines), provider)
+    listed = 0
+    for profile in profiles:
+        line = compact_json(_compact_member(profile))
+        cost = count_tokens(line, provider) + 1
+        if used + cost > budget_tokens:
+            break
+        lines.append(line)
+        used += cost
+        listed += 1
+
+    if listed < len(profiles):
+        lines.append(f"({len(profiles) - listed} more members are included in the summary only)")
+    return '\n'.join(lines), listed
+
+
+def usage_from_response(response: Any) -> Optional[Tuple[int, int]]:
+    """Get provider-reported (prompt, completion) token counts from an SDK response"""
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        prompt = getattr(usage, 'prompt_tokens', None) or getattr(usage, 'input_tokens', None)
+        completion = getattr(usage, 'completion_tokens', None) or getattr(usage, 'output_tokens', None)
+        if prompt is not None and completion is not None:
+            return int(prompt), int(completion)
+    metadata = getattr(response, 'usage_metadata', None)
+    if metadata is not None:
+        prompt = getattr(metadata, 'prompt_token_count', None)
+        completion = getattr(metadata, 'candidates_token_count', None)
+        if prompt is not None and completion is not None:
+            return int(prompt), int(completion)
+    return None
+
+
+def record_usage(provider: str,
+                 model: str,
+                 response: Any,
+                 prompt_text: str,
+                 completion_text: Optional[str]) -> Tuple[int, int]:
+    """
+    Log and tally the tokens used by one provider call
+
+    Provider-reported usage is preferred; otherwise both sides are estimated
+    with count_tokens.
+
+    Returns:
+        Tuple of (prompt tokens, completion tokens)
+    """
+    usage = usage_from_response(response)
+    estimated = usage is None
+    if estimated:
+        usage = (count_tokens(prompt_text, provider), count_tokens(completion_text, provider))
+
+    prompt_tokens, completion_tokens = usage
+    get_provider_health(provider).record_tokens(prompt_tokens, completion_tokens)
+    logger.info(
+        "LLM call provider=%s model=%s prompt_tokens=%d completion_tokens=%d%s",
+        provider, model, prompt_tokens, completion_tokens, " (estimated)" if estimated else ""
+    )
+    return usage
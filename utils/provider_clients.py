@@ -0,0 +1,137 @@
+"""
+AI Provider Clients for Career Atlas
+
+Process-wide registry of AI provider clients. Clients are created once per
+API key and endpoint and share one keep-alive HTTP connection pool, so Streamlit reruns and
+new manager instances reuse open connections instead of building clients and
+repeating TLS handshakes. Safe to use from Streamlit's script threads.
+
+Setting LLM_STANDIN_URL points the OpenAI and Anthropic clients at a local
+stand-in server (utils/llm_standin_server.py) for offline testing.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import anthropic
+import google.generativeai as genai
+import httpx
+import openai
+
+
+STANDIN_API_KEY = 'stand-in'
+
+
+def standin_url() -> Optional[str]:
+    """Get the stand-in server URL, if AI calls should go there instead"""
+    url = os.getenv('LLM_STANDIN_URL', '').strip()
+    return url.rstrip('/') or None
+
+
+def provider_api_key(provider: str) -> Optional[str]:
+    """
+    Get the API key to use for a provider
+
+    With a stand-in server configured, OpenAI and Anthropic get a dummy key
+    when none is set, and Google is switched off (the stand-in does not
+    serve Gemini) so no call leaves the machine.
+    """
+    if standin_url():
+        if provider == 'Google':
+            return None
+        return os.getenv(f'{provider.upper()}_API_KEY') or STANDIN_API_KEY
+    return os.getenv(f'{provider.upper()}_API_KEY')
+
+
+class ProviderClientRegistry:
+    """Creates and caches provider clients on top of a shared connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._openai_clients: Dict[Tuple[str, Optional[str]], openai.OpenAI] = {}
+        self._anthropic_clients: Dict[Tuple[str, Optional[str]], anthropic.Anthropic] = {}
+        self._google_models: Dict[Tuple[str, str], genai.GenerativeModel] = {}
+        self._google_api_key: Optional[str] = None
+
+    def http_client(self) -> httpx.Client:
+        """Get the shared keep-alive HTTP client"""
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '20')),
+                        max_keepalive_connections=int(os.getenv('LLM_HTTP_KEEPALIVE_CONNECTIONS', '10')),
+                        keepalive_expiry=float(os.getenv('LLM_HTTP_KEEPALIVE_SECONDS', '60'))
+                    ),
+                    timeout=httpx.Timeout(60.0, connect=10.0)
+                )
+            return self._http_client
+
+    def openai(self, api_key: str) -> openai.OpenAI:
+        """Get the OpenAI client for an API key and the current endpoint (stand-in or real)"""
+        http_client = self.http_client()
+        base_url = standin_url()
+        key = (api_key, base_url)
+        with self._lock:
+            if key not in self._openai_clients:
+                self._openai_clients[key] = openai.OpenAI(
+                    api_key=api_key,
+                    http_client=http_client,
+                    base_url=f"{base_url}/v1" if base_url else None
+                )
+            return self._openai_clients[key]
+
+    def anthropic(self, api_key: str) -> anthropic.Anthropic:
+        """Get the Anthropic client for an API key and the current endpoint (stand-in or real)"""
+        http_client = self.http_client()
+        base_url = standin_url()
+        key = (api_key, base_url)
+        with self._lock:
+            if key not in self._anthropic_clients:
+                self._anthropic_clients[key] = anthropic.Anthropic(
+                    api_key=api_key,
+                    http_client=http_client,
+                    base_url=base_url
+                )
+            return self._anthropic_clients[key]
+
+    def configure_google(self, api_key: str) -> None:
+        """Configure the Gemini SDK once per API key"""
+        with self._lock:
+            if self._google_api_key != api_key:
+                genai.configure(api_key=api_key)
+                self._google_api_key = api_key
+
+    def google_model(self, model_name: str = 'gemini-pro') -> genai.GenerativeModel:
+        """Get a Gemini model handle for the configured API key"""
+        with self._lock:
+            key = (self._google_api_key, model_name)
+            if key not in self._google_models:
+                self._google_models[key] = genai.GenerativeModel(model_name)
+            return self._google_models[key]
+
+    def close(self) -> None:
+        """Close pooled connections and forget all clients"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._openai_clients.clear()
+            self._anthropic_clients.clear()
+            self._google_models.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ProviderClientRegistry:
+    """Get the process-wide client registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ProviderClientRegistry()
+    return _registry
@@ -0,0 +1,219 @@
+"""
+AI Provider Health for Career Atlas
+
+Process-wide record of how each AI provider has been performing: rolling
+latency and error windows, lifetime counters, and a circuit breaker that lets
+callers skip a provider that is failing instead of waiting on it. Latency
+windows also feed the hedging delay used when racing providers.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider's circuit is open"""
+
+
+class LatencyWindow:
+    """Rolling window of the most recent call latencies (seconds)"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Get the pct-th percentile latency, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(int(round(pct / 100.0 * (len(samples) - 1))), len(samples) - 1)
+        return samples[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker over a rolling window of call outcomes
+
+    The circuit opens when at least min_requests calls in the last
+    window_seconds failed at error_rate_threshold or more. After
+    cooldown_seconds one probe call is let through (half-open); its outcome
+    closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self,
+                 window_seconds: Optional[float] = None,
+                 error_rate_threshold: Optional[float] = None,
+                 min_requests: Optional[int] = None,
+                 cooldown_seconds: Optional[float] = None):
+        self.window_seconds = float(window_seconds if window_seconds is not None
+                                    else os.getenv('LLM_BREAKER_WINDOW_SECONDS', 60))
+        self.error_rate_threshold = float(error_rate_threshold if error_rate_threshold is not None
+                                          else os.getenv('LLM_BREAKER_ERROR_RATE', 0.5))
+        self.min_requests = int(min_requests if min_requests is not None
+                                else os.getenv('LLM_BREAKER_MIN_REQUESTS', 5))
+        self.cooldown_seconds = float(cooldown_seconds if cooldown_seconds is not None
+                                      else os.getenv('LLM_BREAKER_COOLDOWN_SECONDS', 30))
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._probe_started_at = None
+        self._outcomes = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go to the provider right now"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.cooldown_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_started_at = None
+            # Half-open: one probe at a time; a probe that never reported back
+            # is replaced after another cooldown
+            if self._probe_started_at is None or now - self._probe_started_at >= self.cooldown_seconds:
+                self._probe_started_at = now
+                return True
+            return False
+
+    def record(self, success: bool) -> None:
+        """Record a call outcome and update the circuit state"""
+        now = time.monotonic()
+        with self._lock:
+            self._outcomes.append((now, success))
+            self._trim(now)
+
+            if self.state == self.HALF_OPEN:
+                if success:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open(now)
+            elif self.state == self.CLOSED and not success:
+                total = len(self._outcomes)
+                failures = sum(1 for _, ok in self._outcomes if not ok)
+                if total >= self.min_requests and failures / total >= self.error_rate_threshold:
+                    self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = self.OPEN
+        self.opened_at = now
+        self._probe_started_at = None
+
+    def error_rate(self) -> float:
+        """Get the failure share of calls in the rolling window"""
+        with self._lock:
+            self._trim(time.monotonic())
+            if not self._outcomes:
+                return 0.0
+            return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+
+class ProviderHealth:
+    """Latency, error and circuit state for one AI provider"""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.latency = LatencyWindow()
+        self.breaker = CircuitBreaker()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Check the circuit before calling the provider"""
+        allowed = self.breaker.allow_request()
+        if not allowed:
+            with self._lock:
+                self.rejected += 1
+        return allowed
+
+    def record_success(self, seconds: float) -> None:
+        """Record a successful call and its latency"""
+        self.latency.record(seconds)
+        self.breaker.record(True)
+        with self._lock:
+            self.requests += 1
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """Record a failed call"""
+        self.breaker.record(False)
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            if error is not None:
+                self.last_error = f"{type(error).__name__}: {error}"
+
+    def record_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        """Add one call's token usage to the totals"""
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a point-in-time view for dashboards"""
+        with self._lock:
+            counters = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'last_error': self.last_error
+            }
+        return {
+            'provider': self.provider,
+            'state': self.breaker.state,
+            'error_rate': self.breaker.error_rate(),
+            'p50_seconds': self.latency.percentile(50),
+            'p95_seconds': self.latency.percentile(95),
+            'p99_seconds': self.latency.percentile(99),
+            'samples': len(self.latency),
+            **counters
+        }
+
+
+_providers: Dict[str, ProviderHealth] = {}
+_registry_lock = threading.Lock()
+
+
+def get_provider_health(provider: str) -> ProviderHealth:
+    """Get the shared health record for a provider"""
+    with _registry_lock:
+        if provider not in _providers:
+            _providers[provider] = ProviderHealth(provider)
+        return _providers[provider]
+
+
+def health_snapshot() -> List[Dict[str, Any]]:
+    """Get health snapshots for every provider used so far"""
+    with _registry_lock:
+        providers = list(_providers.values())
+    return [health.snapshot() for health in providers]
@@ -0,0 +1,354 @@
+"""
+Cohort Quantile Sketches for Career Atlas
+
+KLL quantile sketches of RIASEC scores for everyone and per persona, used to
+tell users which percentile their scores fall in. Sketches take constant
+space, are updated on every assessment save and merge losslessly, so each
+worker process appends to its own shard file and readers merge the shards.
+Once there are more than QUANTILE_SKETCH_MAX_SHARDS shards the next save folds
+them into one base file; that, or recomputing everything from storage, can
+also be run by hand:
+
+    python -m utils.quantile_sketches compact
+    python -m utils.quantile_sketches rebuild
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import socket
+import threading
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_io import atomic_write_json, file_lock, read_json
+from .profile_buckets import RIASEC_TYPES
+from .storage import StorageBackend, get_storage
+
+DEFAULT_K = 200
+MIN_COHORT_SIZE = 30
+DEFAULT_MAX_SHARDS = 16
+
+
+class KLLSketch:
+    """KLL streaming quantile sketch (Karnin, Lang and Liberty, 2016)"""
+
+    def __init__(self, k: int = DEFAULT_K, c: float = 2.0 / 3.0):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.compactors: List[List[float]] = []
+        self.max_size = 0
+        self._grow()
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(height) for height in range(len(self.compactors)))
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.c ** depth * self.k)) + 1
+
+    def _size(self) -> int:
+        return sum(len(compactor) for compactor in self.compactors)
+
+    def _compress(self) -> None:
+        for height in range(len(self.compactors)):
+            if len(self.compactors[height]) >= self._capacity(height):
+                if height + 1 >= len(self.compactors):
+                    self._grow()
+                compactor = sorted(self.compactors[height])
+                # Keep every other item (random offset) at twice the weight
+                leftover = [compactor.pop()] if len(compactor) % 2 else []
+                self.compactors[height + 1].extend(compactor[random.randint(0, 1)::2])
+                self.compactors[height] = leftover
+                if self._size() < self.max_size:
+                    break
+
+    def update(self, value: float) -> None:
+        """Add one value"""
+        self.n += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.compactors[0].append(value)
+        if self._size() >= self.max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold another sketch into this one"""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, compactor in enumerate(other.compactors):
+            self.compactors[height].extend(compactor)
+        self.n += other.n
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        while self._size() >= self.max_size:
+            self._compress()
+
+    def rank(self, value: float) -> Tuple[float, float]:
+        """Estimated number of values below, and equal to, value"""
+        below = equal = 0.0
+        for height, compactor in enumerate(self.compactors):
+            weight = 2 ** height
+            for item in compactor:
+                if item < value:
+                    below += weight
+                elif item == value:
+                    equal += weight
+        return below, equal
+
+    def percentile(self, value: float) -> Optional[float]:
+        """Percentile (0-100) of value, counting ties as half below"""
+        if not self.n:
+            return None
+        below, equal = self.rank(value)
+        total = sum(len(compactor) * 2 ** height for height, compactor in enumerate(self.compactors))
+        return 100.0 * (below + equal / 2) / total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile q (0-1)"""
+        if not self.n:
+            return None
+        weighted = sorted((item, 2 ** height)
+                          for height, compactor in enumerate(self.compactors) for item in compactor)
+        target = q * sum(weight for _, weight in weighted)
+        cumulative = 0
+        for item, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return item
+        return weighted[-1][0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'k': self.k, 'n': self.n, 'min': self.min, 'max': self.max, 'compactors': self.compactors}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=data.get('k', DEFAULT_K))
+        for _ in range(len(data.get('compactors', [])) - 1):
+            sketch._grow()
+        sketch.compactors = [list(compactor) for compactor in data.get('compactors', [[]])] or [[]]
+        sketch.n = data.get('n', 0)
+        sketch.min = data.get('min')
+        sketch.max = data.get('max')
+        return sketch
+
+
+def cohorts(assessment: Dict[str, Any]) -> List[str]:
+    """Cohorts an assessment belongs to: everyone and its persona"""
+    names = ['all']
+    persona = assessment.get('persona')
+    if persona:
+        names.append(f"persona:{persona}")
+    return names
+
+
+def _cohort_size(sketches: Dict[str, KLLSketch], cohort: str) -> int:
+    return max((sketch.n for key, sketch in sketches.items() if key.startswith(f"{cohort}:")), default=0)
+
+
+def _dump(path: str, sketches: Dict[str, KLLSketch]) -> None:
+    atomic_write_json(path, {key: sketch.to_dict() for key, sketch in sketches.items()})
+
+
+def _read(path: str) -> Dict[str, KLLSketch]:
+    data = read_json(path, {})
+    return {key: KLLSketch.from_dict(sketch) for key, sketch in data.items()}
+
+
+def _merge_into(target: Dict[str, KLLSketch], sketches: Dict[str, KLLSketch]) -> None:
+    for key, sketch in sketches.items():
+        if key in target:
+            target[key].merge(sketch)
+        else:
+            target[key] = sketch
+
+
+class CohortSketches:
+    """Per-cohort, per-type score sketches kept in a base file plus one shard per process"""
+
+    def __init__(self, storage: StorageBackend, directory: Optional[str] = None, data_dir: str = 'data'):
+        self.storage = storage
+        self.directory = directory or os.getenv(
+            'QUANTILE_SKETCH_DIR', os.path.join(data_dir, 'stats', 'sketches'))
+        self.shard_path = os.path.join(self.directory, f"shard-{socket.gethostname()}-{os.getpid()}.json")
+        self.max_shards = int(os.getenv('QUANTILE_SKETCH_MAX_SHARDS', DEFAULT_MAX_SHARDS))
+        self._shard: Dict[str, KLLSketch] = {}
+        self._shard_mtime: Optional[int] = None
+        self._merged: Optional[Dict[str, KLLSketch]] = None
+        self._merged_version: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_path(self) -> str:
+        return os.path.join(self.directory, 'base.json')
+
+    def _files(self) -> List[str]:
+        return [self.base_path] + sorted(glob.glob(os.path.join(self.directory, 'shard-*.json')))
+
+    def _version(self) -> Tuple:
+        version = []
+        for path in self._files():
+            try:
+                version.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(version)
+
+    def record_assessment(self, assessment: Dict[str, Any]) -> None:
+        """Add an assessment's scores to its cohorts' sketches, compacting once shards pile up"""
+        scores = assessment.get('scores') or {}
+        with self._lock:
+            if not os.path.exists(self.base_path):
+                # A rebuild already includes the assessment that was just saved
+                self._rebuild()
+                return
+            with file_lock(self.shard_path):
+                # Start over if a compaction has folded this shard into the base
+                try:
+                    mtime = os.stat(self.shard_path).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if mtime != self._shard_mtime:
+                    self._shard = {}
+                for cohort in cohorts(assessment):
+                    for riasec_type, score in scores.items():
+                        if isinstance(score, (int, float)):
+                            self._shard.setdefault(f"{cohort}:{riasec_type}", KLLSketch()).update(float(score))
+                _dump(self.shard_path, self._shard)
+                self._shard_mtime = os.stat(self.shard_path).st_mtime_ns
+            # Shards of exited processes are only ever removed by a compaction
+            if len(self._files()) - 1 > self.max_shards:
+                self._replace_base(_read(self.base_path), merge_shards=True)
+
+    def sketches(self) -> Dict[str, KLLSketch]:
+        """Get the base and all shards merged (cached until a file changes)"""
+        with self._lock:
+            if not os.path.exists(self.base_path):
+                self._rebuild()
+            version = self._version()
+            if self._merged is None or version != self._merged_version:
+                merged: Dict[str, KLLSketch] = {}
+                for path in self._files():
+                    _merge_into(merged, _read(path))
+                self._merged = merged
+                self._merged_version = version
+            return self._merged
+
+    def percentile(self, riasec_type: str, score: float, cohort: str = 'all') -> Optional[float]:
+        """Percentile of a score within a cohort, or None if the cohort is empty"""
+        sketch = self.sketches().get(f"{cohort}:{riasec_type}")
+        return sketch.percentile(score) if sketch is not None else None
+
+    def cohort_size(self, cohort: str = 'all') -> int:
+        """Number of assessments in a cohort"""
+        return _cohort_size(self.sketches(), cohort)
+
+    def percentiles(self,
+                    scores: Dict[str, float],
+                    persona: Optional[str] = None,
+                    min_size: int = MIN_COHORT_SIZE) -> Tuple[str, Dict[str, float]]:
+        """
+        Get the percentile of every score in the persona's cohort if big enough, else everyone's
+
+        Returns:
+            Tuple of (cohort name, type to percentile)
+        """
+        # One load for every lookup below, rather than re-checking the files each time
+        sketches = self.sketches()
+        cohort = f"persona:{persona}" if persona else 'all'
+        if _cohort_size(sketches, cohort) < min_size:
+            cohort = 'all'
+        results = {}
+        for riasec_type in RIASEC_TYPES:
+            sketch = sketches.get(f"{cohort}:{riasec_type}")
+            if riasec_type in scores and sketch is not None:
+                value = sketch.percentile(scores[riasec_type])
+                if value is not None:
+                    results[riasec_type] = value
+        return cohort, results
+
+    def _replace_base(self, sketches: Dict[str, KLLSketch], merge_shards: bool) -> int:
+        """Write a new base file and delete every shard, merging them in first if asked"""
+        with file_lock(self.base_path), ExitStack() as shard_locks:
+            shards = self._files()[1:]
+            for path in shards:
+                shard_locks.enter_context(file_lock(path))
+            if merge_shards:
+                for path in shards:
+                    _merge_into(sketches, _read(path))
+            _dump(self.base_path, sketches)
+            for path in shards:
+                for stale in (path, f"{path}.lock"):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+        self._merged = None
+        return len(shards)
+
+    def _rebuild(self) -> None:
+        sketches: Dict[str, KLLSketch] = {}
+        for assessment in self.storage.iter_assessments():
+            for cohort in cohorts(assessment):
+                for riasec_type, score in (assessment.get('scores') or {}).items():
+                    if isinstance(score, (int, float)):
+                        sketches.setdefault(f"{cohort}:{riasec_type}", KLLSketch()).update(float(score))
+        self._replace_base(sketches, merge_shards=False)
+
+    def compact(self) -> int:
+        """Merge every shard into the base file; returns the number of shards folded in"""
+        with self._lock:
+            return self._replace_base(_read(self.base_path), merge_shards=True)
+
+    def rebuild(self) -> None:
+        """Recompute every sketch from the stored assessments"""
+        with self._lock:
+            self._rebuild()
+
+
+def ordinal(value: float) -> str:
+    """Format a percentile as an ordinal ('83rd')"""
+    number = int(round(value))
+    suffix = 'th' if 10 <= number % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return f"{number}{suffix}"
+
+
+_sketches: Dict[str, CohortSketches] = {}
+_registry_lock = threading.Lock()
+
+
+def get_cohort_sketches(data_dir: str = 'data') -> CohortSketches:
+    """Get the shared cohort sketches for a data directory"""
+    with _registry_lock:
+        if data_dir not in _sketches:
+            _sketches[data_dir] = CohortSketches(get_storage(data_dir), data_dir=data_dir)
+        return _sketches[data_dir]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain Career Atlas cohort quantile sketches")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('compact', "Merge per-process shards into the base file"),
+                            ('rebuild', "Recompute all sketches from stored assessments")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    sketches = get_cohort_sketches(args.data_dir)
+    if args.command == 'compact':
+        print(json.dumps({'shards_merged': sketches.compact()}))
+    else:
+        sketches.rebuild()
+        print(json.dumps({'cohorts': sorted({key.rsplit(':', 1)[0] for key in sketches.sketches()})}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
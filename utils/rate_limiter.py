@@ -0,0 +1,258 @@
+"""
+Outbound Rate Limiting for Career Atlas
+
+Client-side scheduler for AI provider calls. Each provider gets token buckets
+for requests per minute and tokens per minute, and callers wait in a priority
+queue for capacity, so interactive page requests go ahead of batch and cache
+warm-up work. A job's priority can be a JobPriority, which can be raised
+while its calls are already queued. A provider 429 pauses that provider's buckets for the
+Retry-After period instead of surfacing an error straight away.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .prompt_budget import count_tokens
+from .provider_health import LatencyWindow
+
+INTERACTIVE = 0
+BATCH = 10
+
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch'}
+
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 90000
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+
+
+class JobPriority:
+    """Queue priority shared by a job's calls that can be raised while they wait"""
+
+    def __init__(self, level: int = BATCH):
+        self.level = level
+
+    def __int__(self) -> int:
+        return self.level
+
+
+class RateLimited(Exception):
+    """Raised when no provider capacity became available in time"""
+
+
+class TokenBucket:
+    """Refilling bucket of capacity units; a rate of 0 means unlimited"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount units can be taken (0 if available now)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        """Consume units (call after wait_time returned 0)"""
+        if self.rate <= 0:
+            return
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def block(self, seconds: float) -> None:
+        """Hand out nothing for the next seconds"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def _limit(name: str, provider: str, default: int) -> int:
+    value = os.getenv(f'{name}_{provider.upper()}', os.getenv(name, default))
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+class ProviderScheduler:
+    """Priority queue in front of one provider's request and token buckets"""
+
+    def __init__(self,
+                 provider: str,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None):
+        self.provider = provider
+        self.requests_per_minute = (requests_per_minute if requests_per_minute is not None
+                                    else _limit('LLM_RPM', provider, DEFAULT_REQUESTS_PER_MINUTE))
+        self.tokens_per_minute = (tokens_per_minute if tokens_per_minute is not None
+                                  else _limit('LLM_TPM', provider, DEFAULT_TOKENS_PER_MINUTE))
+        self.request_bucket = TokenBucket(self.requests_per_minute)
+        self.token_bucket = TokenBucket(self.tokens_per_minute)
+        self.waits = LatencyWindow()
+        self.granted = 0
+        self.timed_out = 0
+        self.throttled = 0
+        self.max_depth = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens: int, priority: int = INTERACTIVE, timeout: Optional[float] = None) -> float:
+        """
+        Wait for capacity to send one request of about `tokens` tokens
+
+        Lower priority values are served first; equal priorities are served
+        in arrival order. A JobPriority is re-read whenever the queue changes.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimited: If capacity did not free up within timeout
+        """
+        entry = [int(priority), next(self._sequence)]
+        enqueued_at = time.monotonic()
+        deadline = enqueued_at + timeout if timeout is not None else None
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            self.max_depth = max(self.max_depth, len(self._queue))
+            try:
+                while True:
+                    if entry[0] != int(priority):
+                        entry[0] = int(priority)
+                        heapq.heapify(self._queue)
+                    now = time.monotonic()
+                    wait = None
+                    if self._queue[0] is entry:
+                        wait = max(self.request_bucket.wait_time(1, now),
+                                   self.token_bucket.wait_time(tokens, now))
+                        if wait <= 0:
+                            heapq.heappop(self._queue)
+                            self.request_bucket.take(1, now)
+                            self.token_bucket.take(tokens, now)
+                            self.granted += 1
+                            waited = now - enqueued_at
+                            self.waits.record(waited)
+                            self._cond.notify_all()
+                            return waited
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self.timed_out += 1
+                            raise RateLimited(
+                                f"{self.provider} rate limit: no capacity within {timeout:.0f}s")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def wake(self) -> None:
+        """Make waiting callers re-read their priorities"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """Pause the provider after it answered 429 Too Many Requests"""
+        with self._cond:
+            self.throttled += 1
+            seconds = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER_SECONDS
+            self.request_bucket.block(seconds)
+            self.token_bucket.block(seconds)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get queue depth and wait-time metrics for dashboards"""
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._queue:
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                depth[name] = depth.get(name, 0) + 1
+            counters = {
+                'queue_depth': len(self._queue),
+                'depth_by_priority': depth,
+                'max_depth': self.max_depth,
+                'granted': self.granted,
+                'timed_out': self.timed_out,
+                'throttled': self.throttled
+            }
+        return {
+            'provider': self.provider,
+            'requests_per_minute': self.requests_per_minute,
+            'tokens_per_minute': self.tokens_per_minute,
+            'p50_wait_seconds': self.waits.percentile(50),
+            'p95_wait_seconds': self.waits.percentile(95),
+            'max_wait_seconds': self.waits.percentile(100),
+            **counters
+        }
+
+
+def estimate_request_tokens(provider: str, system_prompt: Optional[str], prompt: str, max_tokens: Optional[int]) -> int:
+    """Token cost of a request for the tokens/min bucket: prompt tokens plus the completion budget"""
+    return count_tokens(system_prompt, provider) + count_tokens(prompt, provider) + (max_tokens or 0)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Check whether a provider error is a 429 Too Many Requests"""
+    if getattr(error, 'status_code', None) == 429:
+        return True
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) == 429
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Read the Retry-After header from a provider error, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+_schedulers: Dict[str, ProviderScheduler] = {}
+_registry_lock = threading.Lock()
+
+
+def get_scheduler(provider: str) -> ProviderScheduler:
+    """Get the shared scheduler for a provider"""
+    with _registry_lock:
+        if provider not in _schedulers:
+            _schedulers[provider] = ProviderScheduler(provider)
+        return _schedulers[provider]
+
+
+def raise_priority(priority: JobPriority, level: int = INTERACTIVE) -> None:
+    """Move a job's calls, including ones already queued, up to level"""
+    priority.level = min(priority.level, level)
+    with _registry_lock:
+        schedulers = list(_schedulers.values())
+    for scheduler in schedulers:
+        scheduler.wake()
+
+
+def scheduler_snapshot() -> List[Dict[str, Any]]:
+    """Get queue snapshots for every provider used so far"""
+    with _registry_lock:
+        schedulers = list(_schedulers.values())
+    return [scheduler.snapshot() for scheduler in schedulers]
@@ -0,0 +1,118 @@
+"""
+Retention and Compaction for Career Atlas
+
+Keeps the per-user data directories from growing forever. Assessments and
+reports older than RETENTION_ARCHIVE_DAYS are packed into one gzip archive
+per user (user_data/<user>/archive.jsonl.gz) and their individual files,
+including the copies in assessments/ and reports/, are removed; reads and
+manifests include archived records, so nothing changes for the app. Records
+older than RETENTION_DELETE_DAYS are deleted outright. Each user's newest
+RETENTION_KEEP_LATEST records of each kind are never archived or deleted.
+With the SQLite backend old rows are compressed in place, and the database is
+vacuumed only when records were deleted. Intended to run off-peak, e.g. from cron:
+
+    python -m utils.retention run --archive-after 90 --delete-after 1095
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional
+
+from .activity_log import log_activity
+from .population_stats import get_population_stats
+from .quantile_sketches import get_cohort_sketches
+from .storage import TIMESTAMP_FORMAT, get_storage
+
+DEFAULT_ARCHIVE_DAYS = 90
+DEFAULT_KEEP_LATEST = 1
+
+
+class RetentionPolicy(NamedTuple):
+    """How long records stay as individual files, and whether they expire"""
+    archive_after_days: int = DEFAULT_ARCHIVE_DAYS
+    delete_after_days: Optional[int] = None
+    keep_latest: int = DEFAULT_KEEP_LATEST
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Build the policy from RETENTION_ARCHIVE_DAYS, RETENTION_DELETE_DAYS (0 = never) and RETENTION_KEEP_LATEST"""
+        delete_days = int(os.getenv('RETENTION_DELETE_DAYS', 0))
+        return cls(int(os.getenv('RETENTION_ARCHIVE_DAYS', DEFAULT_ARCHIVE_DAYS)),
+                   delete_days or None,
+                   int(os.getenv('RETENTION_KEEP_LATEST', DEFAULT_KEEP_LATEST)))
+
+    def validate(self) -> "RetentionPolicy":
+        """Check the policy is consistent, raising ValueError if not"""
+        if self.archive_after_days < 0 or self.keep_latest < 0:
+            raise ValueError("Retention days and keep-latest must not be negative")
+        if self.delete_after_days is not None and self.delete_after_days < self.archive_after_days:
+            raise ValueError("Records must be archived before they are deleted "
+                             "(delete-after must be at least archive-after)")
+        return self
+
+
+def run_retention(data_dir: str = 'data',
+                  policy: Optional[RetentionPolicy] = None,
+                  now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Archive and expire old records for every user
+
+    Args:
+        data_dir: Data directory to compact
+        policy: Retention policy (defaults to RetentionPolicy.from_env())
+        now: Reference time for the cutoffs (default now)
+
+    Returns:
+        Dict with the policy, users changed, records archived and deleted,
+        and bytes before, after and reclaimed
+    """
+    policy = (policy or RetentionPolicy.from_env()).validate()
+    now = now or datetime.now()
+    archive_before = (now - timedelta(days=policy.archive_after_days)).strftime(TIMESTAMP_FORMAT)
+    delete_before = None
+    if policy.delete_after_days is not None:
+        delete_before = (now - timedelta(days=policy.delete_after_days)).strftime(TIMESTAMP_FORMAT)
+
+    storage = get_storage(data_dir)
+    result = storage.apply_retention(archive_before, delete_before, policy.keep_latest)
+    result['bytes_reclaimed'] = result['bytes_before'] - result['bytes_after']
+
+    if result['deleted']:
+        # Deleted assessments must drop out of the population aggregates too
+        get_population_stats(data_dir).rebuild()
+        get_cohort_sketches(data_dir).rebuild()
+
+    log_activity('retention', archived=result['archived'], deleted=result['deleted'],
+                 bytes_reclaimed=result['bytes_reclaimed'])
+    return {'backend': storage.name, 'policy': policy._asdict(), **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and expire old Career Atlas records")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="Apply the retention policy to every user")
+    run_parser.add_argument('--archive-after', type=int, help="Archive records older than this many days")
+    run_parser.add_argument('--delete-after', type=int, help="Delete records older than this many days (0 = never)")
+    run_parser.add_argument('--keep-latest', type=int, help="Newest records of each kind per user left as files")
+    run_parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    policy = RetentionPolicy.from_env()
+    if args.archive_after is not None:
+        policy = policy._replace(archive_after_days=args.archive_after)
+    if args.delete_after is not None:
+        policy = policy._replace(delete_after_days=args.delete_after or None)
+    if args.keep_latest is not None:
+        policy = policy._replace(keep_latest=args.keep_latest)
+
+    try:
+        result = run_retention(args.data_dir, policy)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
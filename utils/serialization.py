@@ -0,0 +1,181 @@
+"""
+Document Serialization for Career Atlas
+
+Compact encoding for stored assessments and reports. Documents are written
+as minified JSON (through orjson when it is installed, the standard library
+otherwise) and optionally compressed with gzip, or zstd when the zstandard
+package is installed. decode() recognises compressed documents by their
+magic bytes, so pretty-printed, minified and compressed files can be mixed
+and read transparently.
+
+DATA_COMPRESSION picks the codec for new documents (default none). Cold
+documents already on disk can be compressed later, and the saving measured,
+with:
+
+    python -m utils.serialization measure
+    python -m utils.serialization compress --older-than 30 --codec gzip
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+CODECS = ('none', 'gzip', 'zstd')
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def default_codec() -> str:
+    """Get the codec for newly written documents (DATA_COMPRESSION)"""
+    codec = os.getenv('DATA_COMPRESSION', 'none').lower()
+    return codec if codec in CODECS else 'none'
+
+
+def check_codec(codec: str) -> str:
+    """Validate a codec name, raising ValueError if it is unknown or unavailable"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec '{codec}' (expected one of {', '.join(CODECS)})")
+    if codec == 'zstd' and zstandard is None:
+        raise ValueError("zstd compression needs the zstandard package (pip install zstandard)")
+    return codec
+
+
+def dumps(data: Any) -> bytes:
+    """Encode a document as minified JSON"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def loads(raw: Union[str, bytes]) -> Any:
+    """Decode JSON text"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def encode(data: Any, codec: Optional[str] = None) -> bytes:
+    """
+    Serialise a document for storage
+
+    Args:
+        data: JSON-serialisable document
+        codec: 'none', 'gzip' or 'zstd' (defaults to DATA_COMPRESSION)
+
+    Returns:
+        Encoded bytes
+    """
+    codec = check_codec(codec or default_codec())
+    raw = dumps(data)
+    if codec == 'gzip':
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return raw
+
+
+def detect_codec(raw: Union[str, bytes]) -> str:
+    """Tell which codec encoded a document from its leading bytes"""
+    if isinstance(raw, bytes):
+        if raw.startswith(GZIP_MAGIC):
+            return 'gzip'
+        if raw.startswith(ZSTD_MAGIC):
+            return 'zstd'
+    return 'none'
+
+
+def decode(raw: Union[str, bytes]) -> Any:
+    """Deserialise a document written by encode() or as plain (pretty) JSON"""
+    codec = detect_codec(raw)
+    try:
+        if codec == 'gzip':
+            raw = gzip.decompress(raw)
+        elif codec == 'zstd':
+            if zstandard is None:
+                raise ValueError("Document is zstd-compressed but the zstandard package is not installed")
+            raw = zstandard.ZstdDecompressor().decompress(raw)
+    except (OSError, EOFError, zlib.error) as e:
+        raise ValueError(f"Corrupt {codec} document: {e}")
+    return loads(raw)
+
+
+def measure(documents: List[Any], codecs: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Compare encodings of sample documents
+
+    Returns:
+        Per format: total bytes, ratio to pretty JSON and decode time per document (ms)
+    """
+    formats = {'pretty': lambda data: json.dumps(data, indent=2).encode('utf-8')}
+    for codec in codecs or [codec for codec in CODECS if codec != 'zstd' or zstandard is not None]:
+        formats[codec] = lambda data, codec=codec: encode(data, codec)
+    decoders = {'pretty': lambda raw: json.loads(raw)}
+
+    results = {}
+    baseline = None
+    for name, encoder in formats.items():
+        encoded = [encoder(document) for document in documents]
+        decoder = decoders.get(name, decode)
+        start = time.perf_counter()
+        for raw in encoded:
+            decoder(raw)
+        elapsed = time.perf_counter() - start
+        size = sum(len(raw) for raw in encoded)
+        baseline = baseline or size
+        results[name] = {
+            'bytes': size,
+            'ratio': round(size / baseline, 3) if baseline else 0.0,
+            'decode_ms': round(1000 * elapsed / max(len(encoded), 1), 4)
+        }
+    return results
+
+
+def main():
+    from .storage import RECORD_KINDS, get_storage
+
+    parser = argparse.ArgumentParser(description="Measure and compress stored Career Atlas documents")
+    commands = parser.add_subparsers(dest='command', required=True)
+    measure_parser = commands.add_parser('measure', help="Compare sizes and decode times of the stored documents")
+    measure_parser.add_argument('--limit', type=int, default=500, help="Documents to sample per kind")
+    compress_parser = commands.add_parser('compress', help="Rewrite cold documents compressed")
+    compress_parser.add_argument('--older-than', type=int, default=30, help="Age in days")
+    compress_parser.add_argument('--codec', choices=[codec for codec in CODECS if codec != 'none'], default='gzip')
+    for command in (measure_parser, compress_parser):
+        command.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    if args.command == 'compress':
+        try:
+            check_codec(args.codec)
+        except ValueError as e:
+            parser.error(str(e))
+
+    storage = get_storage(args.data_dir)
+    if args.command == 'measure':
+        documents = []
+        for kind in RECORD_KINDS:
+            for record in storage.records(kind, limit=args.limit):
+                documents.append(record.data)
+        print(json.dumps({'documents': len(documents), 'formats': measure(documents)}, indent=2))
+    else:
+        print(json.dumps(storage.compress_cold(args.older_than, args.codec), indent=2))
+
+
+if __name__ == '__main__':
+    main()
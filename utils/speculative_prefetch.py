@@ -0,0 +1,310 @@
+"""
+Speculative Prefetch for Career Atlas
+
+Starts career recommendations while the RIASEC assessment is still being
+filled in. As soon as the answered items pin down the ordered top-3 Holland
+code, recommendations for the scores the form would submit are generated in
+the background at batch priority. If the form changes afterwards, a new
+speculation starts once it has been still for LLM_SPECULATIVE_SETTLE_SECONDS,
+timed from the last change rather than from the next rerun. On submit the
+speculation is handed to the assessment only if its (bucketed) scores and
+additional information are the ones it used (and the same skills assessment), so the prompt is identical, and
+its calls still waiting are raised to interactive priority; otherwise it is
+cancelled or discarded. Each user gets at most LLM_SPECULATIVE_MAX_PER_USER
+speculations, and state for users who never submit expires after
+LLM_SPECULATIVE_TTL_SECONDS.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .background_jobs import AssessmentJobStore, assessment_key, get_job_store
+from .llm_manager import LLMManager
+from .profile_buckets import holland_code, quantize_scores
+from .rate_limiter import BATCH, JobPriority, raise_priority
+
+MIN_SCORE = 1
+MAX_SCORE = 5
+DEFAULT_MIN_ANSWERED = 0.6
+DEFAULT_MARGIN = 1.0
+DEFAULT_SETTLE_SECONDS = 3.0
+DEFAULT_MAX_PER_USER = 3
+DEFAULT_TTL_SECONDS = 1800
+
+
+def speculation_enabled() -> bool:
+    """Check whether speculative prefetch is switched on (LLM_SPECULATIVE_PREFETCH)"""
+    return os.getenv('LLM_SPECULATIVE_PREFETCH', 'true').lower() in ('1', 'true', 'yes')
+
+
+def score_bounds(responses: Dict[str, int],
+                 answered: Iterable[str],
+                 questions: Dict[str, List[str]],
+                 margin: float = DEFAULT_MARGIN) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Estimate each type's final score from the answered items
+
+    Unanswered items are assumed to land within margin points of the type's
+    answered mean (clamped to the 1-5 scale).
+
+    Returns:
+        Dict of type to (estimate, lowest likely score, highest likely score);
+        types with no answered items span the whole scale
+    """
+    answered = set(answered)
+    bounds = {}
+    for category, category_questions in questions.items():
+        total = len(category_questions)
+        values = [responses[f"{category}_{i}"] for i in range(total)
+                  if f"{category}_{i}" in answered and f"{category}_{i}" in responses]
+        if not values:
+            bounds[category] = ((MIN_SCORE + MAX_SCORE) / 2, MIN_SCORE, MAX_SCORE)
+            continue
+        remaining = total - len(values)
+        mean = sum(values) / len(values)
+        low = (sum(values) + remaining * max(MIN_SCORE, mean - margin)) / total
+        high = (sum(values) + remaining * min(MAX_SCORE, mean + margin)) / total
+        bounds[category] = (mean, low, high)
+    return bounds
+
+
+def stable_code(responses: Dict[str, int],
+                answered: Iterable[str],
+                questions: Dict[str, List[str]],
+                length: int = 3,
+                min_answered: Optional[float] = None,
+                margin: Optional[float] = None) -> Optional[str]:
+    """
+    Get the Holland code if the answers so far already fix it
+
+    The code is stable when every one of its letters would still outrank the
+    next one even if the letter's unanswered items came in low and the next
+    one's came in high.
+
+    Returns:
+        The code, or None while it can still change
+    """
+    if min_answered is None:
+        min_answered = float(os.getenv('LLM_SPECULATIVE_MIN_ANSWERED', DEFAULT_MIN_ANSWERED))
+    if margin is None:
+        margin = float(os.getenv('LLM_SPECULATIVE_MARGIN', DEFAULT_MARGIN))
+
+    answered = set(answered)
+    total = sum(len(category_questions) for category_questions in questions.values())
+    if not total or len(answered) < min_answered * total:
+        return None
+
+    bounds = score_bounds(responses, answered, questions, margin)
+    ranked = sorted(bounds, key=lambda category: bounds[category][0], reverse=True)
+    for position in range(min(length, len(ranked) - 1)):
+        if bounds[ranked[position]][1] <= bounds[ranked[position + 1]][2]:
+            return None
+    return holland_code({category: bounds[category][0] for category in ranked}, length)
+
+
+class Speculation(NamedTuple):
+    """Recommendations started for a partial assessment"""
+    scores: Dict[str, float]
+    additional_info: Dict[str, Any]
+    skills: Dict[str, Any]
+    key: str
+    future: Future
+    started_at: float
+    priority: JobPriority
+
+
+class FormState(NamedTuple):
+    """What a user's assessment form held at its last change"""
+    scores: Dict[str, float]
+    additional_info: Dict[str, Any]
+    skills: Dict[str, Any]
+    submitted_scores: Dict[str, float]
+    code: Optional[str]
+    changed_at: float
+    seen_at: float
+    speculations: int
+
+
+class SpeculativePrefetcher:
+    """Tracks one speculative recommendations job per user"""
+
+    def __init__(self,
+                 store: Optional[AssessmentJobStore] = None,
+                 settle_seconds: Optional[float] = None,
+                 max_per_user: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.store = store or get_job_store()
+        self.settle_seconds = (settle_seconds if settle_seconds is not None
+                               else float(os.getenv('LLM_SPECULATIVE_SETTLE_SECONDS', DEFAULT_SETTLE_SECONDS)))
+        self.max_per_user = (max_per_user if max_per_user is not None
+                             else int(os.getenv('LLM_SPECULATIVE_MAX_PER_USER', DEFAULT_MAX_PER_USER)))
+        self.ttl_seconds = (ttl_seconds if ttl_seconds is not None
+                            else float(os.getenv('LLM_SPECULATIVE_TTL_SECONDS', DEFAULT_TTL_SECONDS)))
+        self._pending: Dict[str, Speculation] = {}
+        self._forms: Dict[str, FormState] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.adopted = 0
+        self.discarded = 0
+
+    def observe(self,
+                username: str,
+                responses: Dict[str, int],
+                answered: Iterable[str],
+                questions: Dict[str, List[str]],
+                additional_info: Dict[str, Any],
+                scores: Dict[str, float],
+                skills: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Look at a partial assessment and start recommendations once its code is stable
+
+        The first speculation starts as soon as the code is stable. After a
+        change, a timer starts the next one when neither the scores nor the
+        additional information have changed for settle_seconds, so editing
+        the form doesn't launch a call per change and no rerun is needed.
+        A running speculation for different inputs is discarded first.
+
+        Args:
+            scores: The scores the form would submit as it stands
+            skills: The user's skills assessment responses, if any
+
+        Returns:
+            The Holland code being prefetched, or None
+        """
+        code = stable_code(responses, answered, questions)
+        bucketed = quantize_scores(scores)
+        additional_info = dict(additional_info)
+        skills = dict(skills or {})
+        now = time.monotonic()
+
+        with self._lock:
+            self._prune(now)
+            form = self._forms.get(username)
+            if (form is not None and form.scores == bucketed and form.additional_info == additional_info
+                    and form.skills == skills):
+                self._forms[username] = form._replace(seen_at=now)
+                pending = self._pending.get(username)
+                return form.code if pending is not None and pending.scores == bucketed else None
+
+            form = self._forms[username] = FormState(bucketed, additional_info, skills, dict(scores), code,
+                                                     now, now, form.speculations if form else 0)
+            self._cancel_timer(username)
+            if code is None:
+                return None
+            if form.speculations == 0 and username not in self._pending:
+                return self._start(username, form, now)
+
+            timer = threading.Timer(self.settle_seconds, self._settled, args=(username, now))
+            timer.daemon = True
+            self._timers[username] = timer
+            timer.start()
+            return None
+
+    def _settled(self, username: str, changed_at: float) -> None:
+        """Timer callback: speculate if the form hasn't changed since changed_at"""
+        with self._lock:
+            form = self._forms.get(username)
+            if form is None or form.changed_at != changed_at:
+                return
+            self._timers.pop(username, None)
+            self._start(username, form, time.monotonic())
+
+    def _start(self, username: str, form: FormState, now: float) -> Optional[str]:
+        """Start recommendations for a form unless one is already running for it (call under the lock)"""
+        pending = self._pending.get(username)
+        if pending is not None and (pending.scores, pending.additional_info, pending.skills) == (
+                form.scores, form.additional_info, form.skills):
+            return form.code
+        if form.speculations >= self.max_per_user:
+            return None
+        if pending is not None:
+            self._discard(self._pending.pop(username))
+
+        key = f"{username}_speculative_{form.speculations}"
+        priority = JobPriority(BATCH)
+        future = self.store.submit(
+            key, 'recommendations',
+            LLMManager(priority=priority).generate_career_recommendations,
+            dict(form.submitted_scores), form.additional_info, form.skills)
+        self._pending[username] = Speculation(form.scores, form.additional_info, form.skills, key, future, now,
+                                              priority)
+        self._forms[username] = form._replace(speculations=form.speculations + 1)
+        self.started += 1
+        return form.code
+
+    def _cancel_timer(self, username: str) -> None:
+        timer = self._timers.pop(username, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _prune(self, now: float) -> None:
+        """Forget users who stopped filling in the form without submitting"""
+        for username in [username for username, form in self._forms.items()
+                         if now - form.seen_at > self.ttl_seconds]:
+            del self._forms[username]
+            self._cancel_timer(username)
+        for username in [username for username, pending in self._pending.items()
+                         if now - pending.started_at > self.ttl_seconds]:
+            self._discard(self._pending.pop(username))
+
+    def claim(self, assessment_data: Dict[str, Any], skills: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Hand a matching speculation to a submitted assessment
+
+        Its calls still queued behind batch work are raised to interactive
+        priority, since the user is now waiting for them.
+
+        Returns:
+            True if the assessment's recommendations come from the speculation
+        """
+        username = assessment_data.get('username')
+        with self._lock:
+            self._forms.pop(username, None)
+            self._cancel_timer(username)
+            pending = self._pending.pop(username, None)
+            if pending is None:
+                return False
+            # Same bucketed scores, information and skills means the same prompt
+            if (pending.scores != quantize_scores(assessment_data['scores'])
+                    or pending.additional_info != assessment_data.get('additional_info', {})
+                    or pending.skills != dict(skills or {})):
+                self._discard(pending)
+                return False
+            raise_priority(pending.priority)
+            self.store.adopt(assessment_key(assessment_data), 'recommendations', pending.future)
+            self.store.forget(pending.key)
+            self.adopted += 1
+            return True
+
+    def _discard(self, pending: Speculation) -> None:
+        pending.future.cancel()
+        self.store.forget(pending.key)
+        self.discarded += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get speculation counts for dashboards"""
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'started': self.started,
+                'adopted': self.adopted,
+                'discarded': self.discarded
+            }
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> SpeculativePrefetcher:
+    """Get the process-wide speculative prefetcher"""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = SpeculativePrefetcher()
+    return _prefetcher
@@ -0,0 +1,732 @@
+"""
+Storage Backends for Career Atlas
+
+Pluggable persistence for assessments, reports and user preferences. The JSON
+file backend keeps the original layout (one pretty-printed file per record in
+user_data/<user>/ plus a copy in assessments/ or reports/). The SQLite backend
+stores the same records in one WAL-mode database indexed by user and time, so
+a save is a single transaction and lookups are indexed queries instead of
+directory scans. Documents are encoded by utils.serialization (minified, and
+compressed when DATA_COMPRESSION is set). Both keep a per-user manifest of assessment ids, timestamps,
+scores and top type, so the latest assessment and score history are found
+without opening every document. Old records can be packed into one gzip
+archive per user (see utils.retention); reads include archived records.
+DATA_BACKEND selects the backend; records can be copied between the two with:
+
+    python -m utils.storage migrate --to sqlite
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .file_io import atomic_write, atomic_write_json, file_lock
+from .serialization import GZIP_LEVEL, decode, detect_codec, dumps, encode, loads
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('json', 'sqlite')
+RECORD_KINDS = {'assessment': 'assessments', 'report': 'reports'}
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+ARCHIVE_FILE = 'archive.jsonl.gz'
+
+
+class Record(NamedTuple):
+    """A stored assessment or report"""
+    kind: str
+    record_id: str
+    username: str
+    created_at: str
+    data: Dict[str, Any]
+
+
+class ManifestEntry(NamedTuple):
+    """Manifest row for one assessment (enough for history without the document)"""
+    record_id: str
+    created_at: str
+    timestamp: Optional[str]
+    scores: Dict[str, float]
+    top_type: str
+
+
+def manifest_entry(record: Record) -> ManifestEntry:
+    """Build the manifest row for an assessment record"""
+    scores = record.data.get('scores') or {}
+    top_type = record.data.get('top_type') or (max(scores, key=scores.get) if scores else 'Unknown')
+    return ManifestEntry(record.record_id, record.created_at, record.data.get('timestamp'), scores, top_type)
+
+
+def new_record(kind: str, username: str, data: Dict[str, Any], created_at: Optional[datetime] = None) -> Record:
+    """Build a record named like the original files (<kind>_<user>_<YYYYmmdd_HHMMSS>)"""
+    stamp = (created_at or datetime.now()).strftime(TIMESTAMP_FORMAT)
+    return Record(kind, f"{kind}_{username}_{stamp}", username, stamp, data)
+
+
+class StorageBackend:
+    """Interface shared by the storage backends"""
+
+    name = ''
+
+    def put(self, record: Record) -> str:
+        """Store a record, replacing one with the same id; returns where it was stored"""
+        raise NotImplementedError
+
+    def records(self, kind: str, username: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Record]:
+        """Get records of a kind, newest first for a single user"""
+        raise NotImplementedError
+
+    def get(self, kind: str, username: str, record_id: str) -> Optional[Dict[str, Any]]:
+        """Get one record's data by id (None if missing)"""
+        raise NotImplementedError
+
+    def count(self, kind: str) -> int:
+        """Count stored records of a kind"""
+        raise NotImplementedError
+
+    def manifest(self, username: str, limit: Optional[int] = None) -> List[ManifestEntry]:
+        """Get a user's assessment manifest, newest first"""
+        return [manifest_entry(record) for record in self.records('assessment', username, limit)]
+
+    def has_records(self, kind: str, username: str) -> bool:
+        """Check whether a user has any records of a kind"""
+        return next(iter(self.records(kind, username, limit=1)), None) is not None
+
+    def compress_cold(self, older_than_days: int, codec: str) -> Dict[str, int]:
+        """
+        Re-encode records older than a number of days with a compression codec
+
+        Returns:
+            Number of documents rewritten, and their bytes before and after
+        """
+        raise NotImplementedError
+
+    def apply_retention(self,
+                        archive_before: str,
+                        delete_before: Optional[str] = None,
+                        keep_latest: int = 1) -> Dict[str, int]:
+        """
+        Archive and expire old records
+
+        Args:
+            archive_before: Records created before this YYYYmmdd_HHMMSS stamp
+                are packed into compressed storage
+            delete_before: Records created before this stamp are deleted
+                (None keeps everything)
+            keep_latest: Newest records of each kind per user left untouched
+
+        Returns:
+            Users changed, records archived and deleted, and bytes before and after
+        """
+        raise NotImplementedError
+
+    def put_preferences(self, username: str, preferences: Dict[str, Any]) -> None:
+        """Store a user's preferences"""
+        raise NotImplementedError
+
+    def get_preferences(self, username: str) -> Dict[str, Any]:
+        """Get a user's preferences ({} if none)"""
+        raise NotImplementedError
+
+    def all_preferences(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Get (username, preferences) for every user"""
+        raise NotImplementedError
+
+    def usernames(self) -> List[str]:
+        """Get every user with stored records, sorted"""
+        raise NotImplementedError
+
+    # Conveniences over put/records
+    def save_assessment(self, username: str, data: Dict[str, Any]) -> str:
+        """Store a new assessment"""
+        return self.put(new_record('assessment', username, data))
+
+    def save_report(self, username: str, data: Dict[str, Any]) -> str:
+        """Store a new report"""
+        return self.put(new_record('report', username, data))
+
+    def load_assessments(self, username: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get a user's assessments, newest first"""
+        return [record.data for record in self.records('assessment', username, limit)]
+
+    def latest_assessment(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get a user's newest assessment, loading only that document"""
+        entries = self.manifest(username, limit=1)
+        return self.get('assessment', username, entries[0].record_id) if entries else None
+
+    def iter_assessments(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every stored assessment"""
+        for record in self.records('assessment'):
+            yield record.data
+
+
+class JSONFileStorage(StorageBackend):
+    """
+    One JSON file per record under the data directory (the original layout),
+    plus user_data/<user>/archive.jsonl.gz holding the user's archived records
+    newest first, one JSON line each
+    """
+
+    name = 'json'
+
+    def __init__(self, data_dir: str = 'data'):
+        self.data_dir = data_dir
+
+    def _user_dir(self, username: str) -> str:
+        return os.path.join(self.data_dir, 'user_data', username)
+
+    def _kind_dir(self, kind: str) -> str:
+        return os.path.join(self.data_dir, RECORD_KINDS[kind])
+
+    def _manifest_path(self, username: str) -> str:
+        return os.path.join(self._user_dir(username), 'manifest.json')
+
+    def _archive_path(self, username: str) -> str:
+        return os.path.join(self._user_dir(username), ARCHIVE_FILE)
+
+    @staticmethod
+    def _read(filepath: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(filepath, 'rb') as f:
+                return decode(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable record %s: %s", filepath, e)
+            return None
+
+    def put(self, record: Record) -> str:
+        filename = f"{record.record_id}.json"
+        user_dir = self._user_dir(record.username)
+        os.makedirs(user_dir, exist_ok=True)
+        os.makedirs(self._kind_dir(record.kind), exist_ok=True)
+
+        filepath = os.path.join(user_dir, filename)
+        document = encode(record.data)
+        for path in (filepath, os.path.join(self._kind_dir(record.kind), filename)):
+            atomic_write(path, document)
+        if record.kind == 'assessment':
+            self._update_manifest(record)
+        return filepath
+
+    def get(self, kind: str, username: str, record_id: str) -> Optional[Dict[str, Any]]:
+        filepath = os.path.join(self._user_dir(username), f"{record_id}.json")
+        if os.path.exists(filepath):
+            return self._read(filepath)
+        for record in self._archived_records(kind, username):
+            if record.record_id == record_id:
+                return record.data
+        return None
+
+    def _load_manifest(self, username: str) -> Optional[List[ManifestEntry]]:
+        try:
+            with open(self._manifest_path(username), 'r') as f:
+                return [ManifestEntry(**entry) for entry in json.load(f)['assessments']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_manifest(self, username: str, entries: List[ManifestEntry]) -> None:
+        atomic_write_json(self._manifest_path(username), {'assessments': [entry._asdict() for entry in entries]})
+
+    def _update_manifest(self, record: Record) -> None:
+        with file_lock(self._manifest_path(record.username)):
+            entries = self._load_manifest(record.username)
+            if entries is None:
+                # Built from the directory, which already holds the new record
+                self.rebuild_manifest(record.username)
+                return
+            entries = [entry for entry in entries if entry.record_id != record.record_id]
+            entries.append(manifest_entry(record))
+            entries.sort(key=lambda entry: (entry.created_at, entry.record_id), reverse=True)
+            self._write_manifest(record.username, entries)
+
+    def rebuild_manifest(self, username: str) -> List[ManifestEntry]:
+        """Rebuild a user's manifest from their assessment files and archive"""
+        entries = [manifest_entry(record) for record in self.records('assessment', username)]
+        if os.path.isdir(self._user_dir(username)):
+            self._write_manifest(username, entries)
+        return entries
+
+    def manifest(self, username: str, limit: Optional[int] = None) -> List[ManifestEntry]:
+        entries = self._load_manifest(username)
+        if entries is None:
+            entries = self.rebuild_manifest(username)
+        return entries if limit is None else entries[:limit]
+
+    def _live_records(self, kind: str, username: Optional[str] = None) -> Iterator[Record]:
+        """Records stored as individual files, newest first"""
+        if username is not None:
+            directory = self._user_dir(username)
+            prefix = f"{kind}_{username}_"
+        else:
+            directory = self._kind_dir(kind)
+            prefix = f"{kind}_"
+        if not os.path.isdir(directory):
+            return
+
+        filenames = sorted((f for f in os.listdir(directory) if f.startswith(prefix) and f.endswith('.json')),
+                           reverse=True)
+        for filename in filenames:
+            data = self._read(os.path.join(directory, filename))
+            if data is None:
+                continue
+            record_id = filename[:-len('.json')]
+            created_at = '_'.join(record_id.split('_')[-2:])
+            owner = username or record_id[len(prefix):-(len(created_at) + 1)]
+            yield Record(kind, record_id, owner, created_at, data)
+
+    def _read_archive(self, username: str) -> Iterator[Record]:
+        """Every record in a user's archive, newest first"""
+        path = self._archive_path(username)
+        try:
+            f = gzip.open(path, 'rb')
+        except OSError:
+            return
+        with f:
+            try:
+                for line in f:
+                    if line.strip():
+                        entry = loads(line)
+                        yield Record(entry['kind'], entry['record_id'], username, entry['created_at'], entry['data'])
+            except (OSError, EOFError, zlib.error, ValueError, KeyError) as e:
+                logger.warning("Stopped reading unreadable archive %s: %s", path, e)
+
+    def _archived_records(self, kind: str, username: str) -> Iterator[Record]:
+        return (record for record in self._read_archive(username) if record.kind == kind)
+
+    def _user_records(self, kind: str, username: str) -> Iterator[Record]:
+        """Live and archived records of one user, merged newest first"""
+        merged = heapq.merge(self._live_records(kind, username), self._archived_records(kind, username),
+                             key=lambda record: (record.created_at, record.record_id), reverse=True)
+        previous = None
+        for record in merged:
+            # A record left live by an interrupted compaction is also archived
+            if record.record_id != previous:
+                yield record
+            previous = record.record_id
+
+    def _all_records(self, kind: str) -> Iterator[Record]:
+        live_ids = set()
+        for record in self._live_records(kind):
+            live_ids.add(record.record_id)
+            yield record
+        for username in self.usernames():
+            for record in self._archived_records(kind, username):
+                if record.record_id not in live_ids:
+                    yield record
+
+    def records(self, kind: str, username: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Record]:
+        records = self._user_records(kind, username) if username is not None else self._all_records(kind)
+        yield from islice(records, limit)
+
+    def count(self, kind: str) -> int:
+        directory = self._kind_dir(kind)
+        live = sum(1 for f in os.listdir(directory)
+                   if f.startswith(f"{kind}_") and f.endswith('.json')) if os.path.isdir(directory) else 0
+        return live + sum(1 for username in self.usernames() for _ in self._archived_records(kind, username))
+
+    def has_records(self, kind: str, username: str) -> bool:
+        directory = self._user_dir(username)
+        prefix = f"{kind}_{username}_"
+        if os.path.isdir(directory) and any(
+                f.startswith(prefix) and f.endswith('.json') for f in os.listdir(directory)):
+            return True
+        return next(self._archived_records(kind, username), None) is not None
+
+    def compress_cold(self, older_than_days: int, codec: str) -> Dict[str, int]:
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime(TIMESTAMP_FORMAT)
+        result = {'documents': 0, 'bytes_before': 0, 'bytes_after': 0}
+        for kind in RECORD_KINDS:
+            for record in self.records(kind):
+                if record.created_at >= cutoff:
+                    continue
+                filename = f"{record.record_id}.json"
+                for path in (os.path.join(self._user_dir(record.username), filename),
+                             os.path.join(self._kind_dir(kind), filename)):
+                    try:
+                        with open(path, 'rb') as f:
+                            raw = f.read()
+                    except OSError:
+                        continue
+                    if detect_codec(raw) != 'none':
+                        continue
+                    document = encode(record.data, codec)
+                    atomic_write(path, document)
+                    result['documents'] += 1
+                    result['bytes_before'] += len(raw)
+                    result['bytes_after'] += len(document)
+        return result
+
+    def apply_retention(self,
+                        archive_before: str,
+                        delete_before: Optional[str] = None,
+                        keep_latest: int = 1) -> Dict[str, int]:
+        result = {'users': 0, 'archived': 0, 'deleted': 0, 'files_removed': 0, 'bytes_before': 0, 'bytes_after': 0}
+        for username in self.usernames():
+            with file_lock(self._archive_path(username)):
+                changes = self._compact_user(username, archive_before, delete_before, keep_latest)
+            if changes:
+                result['users'] += 1
+                for key, value in changes.items():
+                    result[key] += value
+        return result
+
+    def _compact_user(self,
+                      username: str,
+                      archive_before: str,
+                      delete_before: Optional[str],
+                      keep_latest: int) -> Optional[Dict[str, int]]:
+        """Pack a user's old files into their archive; the caller holds the archive lock"""
+        kept = {record.record_id for kind in RECORD_KINDS
+                for record in islice(self.records(kind, username), keep_latest)}
+
+        def expired(record: Record) -> bool:
+            return bool(delete_before) and record.created_at < delete_before and record.record_id not in kept
+
+        to_remove = [record for kind in RECORD_KINDS for record in self._live_records(kind, username)
+                     if record.created_at < archive_before and record.record_id not in kept]
+        removed_ids = {record.record_id for record in to_remove}
+        archived = list(self._read_archive(username))
+        archive = [record for record in archived if record.record_id not in removed_ids] + to_remove
+        retained = [record for record in archive if not expired(record)]
+        deleted = [record for record in archive if expired(record)]
+        if not to_remove and not deleted:
+            return None
+
+        archive_path = self._archive_path(username)
+        removed_paths = [path for record in to_remove
+                         for path in (os.path.join(self._user_dir(username), f"{record.record_id}.json"),
+                                      os.path.join(self._kind_dir(record.kind), f"{record.record_id}.json"))
+                         if os.path.exists(path)]
+        bytes_before = sum(os.path.getsize(path) for path in removed_paths)
+        if os.path.exists(archive_path):
+            bytes_before += os.path.getsize(archive_path)
+
+        # Write the archive before removing anything, so an interruption
+        # leaves records duplicated (and read once) rather than lost
+        retained.sort(key=lambda record: (record.created_at, record.record_id), reverse=True)
+        if retained:
+            lines = b''.join(dumps({'kind': record.kind, 'record_id': record.record_id,
+                                    'created_at': record.created_at, 'data': record.data}) + b'\n'
+                             for record in retained)
+            atomic_write(archive_path, gzip.compress(lines, compresslevel=GZIP_LEVEL, mtime=0))
+        elif os.path.exists(archive_path):
+            os.remove(archive_path)
+        for path in removed_paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        deleted_ids = {record.record_id for record in deleted if record.kind == 'assessment'}
+        if deleted_ids:
+            with file_lock(self._manifest_path(username)):
+                entries = self._load_manifest(username)
+                if entries is None:
+                    self.rebuild_manifest(username)
+                else:
+                    self._write_manifest(username, [entry for entry in entries if entry.record_id not in deleted_ids])
+
+        return {
+            'archived': sum(1 for record in to_remove if not expired(record)),
+            'deleted': len(deleted),
+            'files_removed': len(removed_paths),
+            'bytes_before': bytes_before,
+            'bytes_after': os.path.getsize(archive_path) if retained else 0
+        }
+
+    def put_preferences(self, username: str, preferences: Dict[str, Any]) -> None:
+        user_dir = self._user_dir(username)
+        os.makedirs(user_dir, exist_ok=True)
+        atomic_write(os.path.join(user_dir, 'preferences.json'), encode(preferences, 'none'))
+
+    def get_preferences(self, username: str) -> Dict[str, Any]:
+        prefs_file = os.path.join(self._user_dir(username), 'preferences.json')
+        if not os.path.exists(prefs_file):
+            return {}
+        return self._read(prefs_file) or {}
+
+    def all_preferences(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        users_dir = os.path.join(self.data_dir, 'user_data')
+        if not os.path.isdir(users_dir):
+            return
+        for username in sorted(os.listdir(users_dir)):
+            if os.path.exists(os.path.join(users_dir, username, 'preferences.json')):
+                yield username, self.get_preferences(username)
+
+    def usernames(self) -> List[str]:
+        users_dir = os.path.join(self.data_dir, 'user_data')
+        if not os.path.isdir(users_dir):
+            return []
+        return sorted(name for name in os.listdir(users_dir) if os.path.isdir(os.path.join(users_dir, name)))
+
+
+class SQLiteStorage(StorageBackend):
+    """Records in a WAL-mode SQLite database, indexed by user and time"""
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: Optional[str] = None, data_dir: str = 'data'):
+        self.db_path = db_path or os.getenv(
+            'DATA_SQLITE_PATH', os.path.join(data_dir, 'career_atlas.sqlite3'))
+        self._local = threading.local()
+        self._ensure_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection to the database"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self) -> None:
+        """Create tables if they don't exist"""
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                kind TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                username TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (kind, record_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_user ON records(kind, username, created_at);
+            CREATE TABLE IF NOT EXISTS assessment_index (
+                record_id TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                timestamp TEXT,
+                scores TEXT NOT NULL,
+                top_type TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_assessment_index_user ON assessment_index(username, created_at);
+            CREATE TABLE IF NOT EXISTS preferences (
+                username TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+        """)
+
+        # Index assessments stored before the manifest table existed
+        conn = self._connect()
+        missing = conn.execute(
+            "SELECT record_id, username, created_at, data FROM records WHERE kind = 'assessment' "
+            "AND record_id NOT IN (SELECT record_id FROM assessment_index)").fetchall()
+        for record_id, owner, created_at, data in missing:
+            self._index(conn, Record('assessment', record_id, owner, created_at, decode(data)))
+
+    @staticmethod
+    def _index(conn: sqlite3.Connection, record: Record) -> None:
+        entry = manifest_entry(record)
+        conn.execute(
+            "INSERT OR REPLACE INTO assessment_index (record_id, username, created_at, timestamp, scores, top_type) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (entry.record_id, record.username, entry.created_at, entry.timestamp,
+             json.dumps(entry.scores), entry.top_type)
+        )
+
+    def put(self, record: Record) -> str:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO records (kind, record_id, username, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (record.kind, record.record_id, record.username, record.created_at, encode(record.data))
+            )
+            if record.kind == 'assessment':
+                self._index(conn, record)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return record.record_id
+
+    def get(self, kind: str, username: str, record_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT data FROM records WHERE kind = ? AND record_id = ?", (kind, record_id)).fetchone()
+        return decode(row[0]) if row else None
+
+    def manifest(self, username: str, limit: Optional[int] = None) -> List[ManifestEntry]:
+        query = ("SELECT record_id, created_at, timestamp, scores, top_type FROM assessment_index "
+                 "WHERE username = ? ORDER BY created_at DESC, record_id DESC")
+        params: List[Any] = [username]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [ManifestEntry(record_id, created_at, timestamp, json.loads(scores), top_type)
+                for record_id, created_at, timestamp, scores, top_type in self._connect().execute(query, params)]
+
+    def records(self, kind: str, username: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Record]:
+        query = "SELECT record_id, username, created_at, data FROM records WHERE kind = ?"
+        params: List[Any] = [kind]
+        if username is not None:
+            query += " AND username = ?"
+            params.append(username)
+        query += " ORDER BY created_at DESC, record_id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        for record_id, owner, created_at, data in self._connect().execute(query, params):
+            yield Record(kind, record_id, owner, created_at, decode(data))
+
+    def count(self, kind: str) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM records WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def compress_cold(self, older_than_days: int, codec: str) -> Dict[str, int]:
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime(TIMESTAMP_FORMAT)
+        result = {'documents': 0, 'bytes_before': 0, 'bytes_after': 0}
+        conn = self._connect()
+        rows = conn.execute("SELECT kind, record_id, data FROM records WHERE created_at < ?", (cutoff,)).fetchall()
+        for kind, record_id, data in rows:
+            if detect_codec(data) != 'none':
+                continue
+            document = encode(decode(data), codec)
+            conn.execute("UPDATE records SET data = ? WHERE kind = ? AND record_id = ?", (document, kind, record_id))
+            result['documents'] += 1
+            result['bytes_before'] += len(data.encode('utf-8') if isinstance(data, str) else data)
+            result['bytes_after'] += len(document)
+        return result
+
+    def _file_bytes(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.db_path, f"{self.db_path}-wal") if os.path.exists(path))
+
+    def apply_retention(self,
+                        archive_before: str,
+                        delete_before: Optional[str] = None,
+                        keep_latest: int = 1) -> Dict[str, int]:
+        # Archiving here means gzip-compressing the row in place; SQLite reuses
+        # the pages that frees. Only deletions are worth a VACUUM, which
+        # rewrites the whole file under an exclusive lock
+        result = {'users': 0, 'archived': 0, 'deleted': 0, 'bytes_before': self._file_bytes(), 'bytes_after': 0}
+        conn = self._connect()
+        users = set()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT kind, record_id, username, created_at, data FROM ("
+                "  SELECT *, ROW_NUMBER() OVER (PARTITION BY kind, username "
+                "                               ORDER BY created_at DESC, record_id DESC) AS position"
+                "  FROM records) WHERE position > ? AND created_at < ?",
+                (keep_latest, archive_before)).fetchall()
+            for kind, record_id, username, created_at, data in rows:
+                if delete_before and created_at < delete_before:
+                    conn.execute("DELETE FROM records WHERE kind = ? AND record_id = ?", (kind, record_id))
+                    if kind == 'assessment':
+                        conn.execute("DELETE FROM assessment_index WHERE record_id = ?", (record_id,))
+                    result['deleted'] += 1
+                elif detect_codec(data) == 'none':
+                    conn.execute("UPDATE records SET data = ? WHERE kind = ? AND record_id = ?",
+                                 (encode(decode(data), 'gzip'), kind, record_id))
+                    result['archived'] += 1
+                else:
+                    continue
+                users.add(username)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if result['deleted']:
+            conn.execute("VACUUM")
+        if users:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        result['users'] = len(users)
+        result['bytes_after'] = self._file_bytes()
+        return result
+
+    def put_preferences(self, username: str, preferences: Dict[str, Any]) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO preferences (username, data) VALUES (?, ?)",
+            (username, encode(preferences, 'none'))
+        )
+
+    def get_preferences(self, username: str) -> Dict[str, Any]:
+        row = self._connect().execute(
+            "SELECT data FROM preferences WHERE username = ?", (username,)).fetchone()
+        return decode(row[0]) if row else {}
+
+    def all_preferences(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for username, data in self._connect().execute("SELECT username, data FROM preferences ORDER BY username"):
+            yield username, decode(data)
+
+    def usernames(self) -> List[str]:
+        rows = self._connect().execute("SELECT DISTINCT username FROM records ORDER BY username")
+        return [username for (username,) in rows]
+
+
+def create_storage(backend: str, data_dir: str = 'data') -> StorageBackend:
+    """Create a storage backend by name ('json' or 'sqlite')"""
+    if backend == 'json':
+        return JSONFileStorage(data_dir)
+    if backend == 'sqlite':
+        return SQLiteStorage(data_dir=data_dir)
+    raise ValueError(f"Unknown storage backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+
+
+_storages: Dict[Tuple[str, str], StorageBackend] = {}
+_storage_lock = threading.Lock()
+
+
+def get_storage(data_dir: str = 'data') -> StorageBackend:
+    """Get the shared storage backend selected by DATA_BACKEND (default json)"""
+    backend = os.getenv('DATA_BACKEND', 'json').lower()
+    with _storage_lock:
+        if (backend, data_dir) not in _storages:
+            _storages[(backend, data_dir)] = create_storage(backend, data_dir)
+        return _storages[(backend, data_dir)]
+
+
+def migrate(source: StorageBackend, target: StorageBackend) -> Dict[str, int]:
+    """
+    Copy every record and preference set from one backend to another
+
+    Record ids are kept, so running it again only overwrites what was
+    already copied.
+
+    Returns:
+        Number of records copied per kind, plus preferences
+    """
+    copied = {kind: 0 for kind in RECORD_KINDS}
+    for kind in RECORD_KINDS:
+        for record in source.records(kind):
+            target.put(record)
+            copied[kind] += 1
+
+    copied['preferences'] = 0
+    for username, preferences in source.all_preferences():
+        target.put_preferences(username, preferences)
+        copied['preferences'] += 1
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage Career Atlas storage backends")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = commands.add_parser('migrate', help="Copy all records from one backend to the other")
+    migrate_parser.add_argument('--to', dest='target', choices=BACKENDS, required=True)
+    migrate_parser.add_argument('--from', dest='source', choices=BACKENDS,
+                                help="Backend to copy from (defaults to the other one)")
+    migrate_parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    source_name = args.source or next(name for name in BACKENDS if name != args.target)
+    if source_name == args.target:
+        parser.error("--from and --to must differ")
+    copied = migrate(create_storage(source_name, args.data_dir), create_storage(args.target, args.data_dir))
+    print(json.dumps({'from': source_name, 'to': args.target, 'copied': copied}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
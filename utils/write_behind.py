@@ -0,0 +1,192 @@
+"""
+Write-Behind Persistence for Career Atlas
+
+Moves disk writes off the Streamlit script thread. Persistence operations are
+queued and run in order by one background writer thread, which takes them in
+batches and resolves a future for each. WRITE_BEHIND_MODE picks how long
+callers wait:
+
+    sync       run the write inline, as before
+    async      queue it and return at once; failures are only logged
+    async_ack  queue it and return a future the caller may wait on (default)
+
+Writes can be tagged with a key (the username) so a reader waits only for
+that user's pending writes, not for everyone's. The queue is bounded
+(WRITE_BEHIND_MAX_PENDING), so callers slow down instead of piling up memory
+if the disk falls behind, and it is drained at interpreter exit so queued
+writes are not lost on a clean shutdown.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MODES = ('sync', 'async', 'async_ack')
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_BATCH_SIZE = 50
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Ordered background writer for persistence operations"""
+
+    def __init__(self,
+                 mode: Optional[str] = None,
+                 max_pending: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        mode = (mode or os.getenv('WRITE_BEHIND_MODE', 'async_ack')).lower()
+        self.mode = mode if mode in MODES else 'async_ack'
+        self.batch_size = batch_size
+        self._queue: "queue.Queue" = queue.Queue(
+            maxsize=max_pending or int(os.getenv('WRITE_BEHIND_MAX_PENDING', DEFAULT_MAX_PENDING)))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._puts_done = threading.Condition(self._lock)
+        self._putting = 0
+        self._closed = False
+        self._keyed: Dict[str, Set[Future]] = {}
+        self._keyed_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Optional[Future]:
+        """
+        Persist something according to the queue's mode
+
+        Returns:
+            Future for the operation's result (already resolved in sync mode
+            or once the queue is closed), or None in async mode
+        """
+        return self.submit_for(None, fn, *args, **kwargs)
+
+    def submit_for(self, key: Optional[str], fn: Callable[..., Any], *args, **kwargs) -> Optional[Future]:
+        """Like submit(), tagging the write with key (e.g. a username) so flush(key) waits for it"""
+        # Registered under the lock close() takes, but put outside it so a
+        # full queue only slows this caller; close() waits for registered
+        # puts, so nothing is queued behind the stop marker and never run
+        with self._lock:
+            queued = self.mode != 'sync' and not self._closed
+            if queued:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                    self._thread.start()
+                future: Future = Future()
+                if key is not None:
+                    self._track(key, future)
+                self._putting += 1
+        if queued:
+            try:
+                self._queue.put((fn, args, kwargs, future))
+            finally:
+                with self._lock:
+                    self._putting -= 1
+                    self._puts_done.notify_all()
+            return future if self.mode == 'async_ack' else None
+
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        return future
+
+    def _track(self, key: str, future: Future) -> None:
+        with self._keyed_lock:
+            self._keyed.setdefault(key, set()).add(future)
+        future.add_done_callback(lambda done: self._untrack(key, done))
+
+    def _untrack(self, key: str, future: Future) -> None:
+        with self._keyed_lock:
+            futures = self._keyed.get(key)
+            if futures is not None:
+                futures.discard(future)
+                if not futures:
+                    del self._keyed[key]
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                if item is _STOP:
+                    continue
+                fn, args, kwargs, future = item
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                    self.written += 1
+                except Exception as e:
+                    logger.error("Write-behind operation %s failed: %s", getattr(fn, '__name__', fn), e)
+                    future.set_exception(e)
+                    self.failed += 1
+            self.batches += 1
+            for _ in batch:
+                self._queue.task_done()
+            if any(item is _STOP for item in batch):
+                return
+
+    def flush(self, key: Optional[str] = None) -> None:
+        """
+        Wait until operations queued so far have been written
+
+        Args:
+            key: Only wait for operations submitted with this key; None waits
+                for every queued operation
+        """
+        if key is not None:
+            with self._keyed_lock:
+                futures = list(self._keyed.get(key, ()))
+            wait(futures)
+        elif self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Drain the queue and stop the writer; later writes run inline"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            while self._putting:
+                self._puts_done.wait()
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and write counts for dashboards"""
+        return {
+            'mode': self.mode,
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches
+        }
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> WriteBehindQueue:
+    """Get the process-wide write-behind queue (drained at exit)"""
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteBehindQueue()
+                atexit.register(_write_queue.close)
+    return _write_queue